@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from app.api.dependencies import get_database_session, get_templates, get_current_user_optional, get_current_user
 from app.service.auth_service import auth_service
 from app.core.config import settings
+from app.infrastructure.database import pool_metrics
+from app.infrastructure.executors import google_io_executor, slot_search_executor
 
 router = APIRouter()
 
@@ -60,8 +62,8 @@ async def callback(request: Request, db: Session = Depends(get_database_session)
             frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
             return RedirectResponse(url=f"{frontend_url}/dashboard", status_code=302)
         
-        # OAuth認証を処理
-        result = auth_service.handle_oauth_callback(request, db)
+        # OAuth認証を処理（トークン交換・初回同期のGoogle API呼び出しはI/O用のプールで実行）
+        result = await auth_service.handle_oauth_callback(request, db)
         
         user = result['user']
         credentials = result['credentials']
@@ -123,6 +125,14 @@ async def status():
         ]
     }
 
+@router.get("/metrics")
+async def metrics():
+    """DB接続プールと実行プールの計測値（監視用）"""
+    return {
+        "db_pool": pool_metrics.snapshot(),
+        "executors": [executor.snapshot() for executor in (google_io_executor, slot_search_executor)]
+    }
+
 @router.get("/auth/user")
 async def get_current_user_info(
     request: Request,
@@ -1,10 +1,11 @@
 from fastapi import Depends, Request, HTTPException
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from pathlib import Path
 
-from app.infrastructure.database import get_db
+from app.infrastructure.database import get_async_db, get_db
 from app.core.entities import User
 from app.service.auth_service import auth_service
 from app.core.config import settings
@@ -17,14 +18,19 @@ if not template_dir.exists():
 
 templates = Jinja2Templates(directory=str(template_dir))
 
-def get_database_session() -> Session:
-    """データベースセッションを取得"""
-    db = next(get_db())
+def get_database_session(request: Request) -> Session:
+    """データベースセッションを取得（ログインユーザーはレプリカの read-your-writes の判定に使う）"""
+    db = next(get_db(request.session.get('user_id')))
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_database_session(request: Request) -> AsyncSession:
+    """非同期データベースセッションを取得（async def のエンドポイントで使う）"""
+    async for db in get_async_db(request.session.get('user_id')):
+        yield db
+
 def get_current_user(request: Request, db: Session = Depends(get_database_session)) -> User:
     """現在認証されているユーザーを取得"""
     return auth_service.get_current_user(request, db)
@@ -51,10 +57,13 @@ def get_user_credentials(request: Request) -> dict:
     complete_credentials = {
         'token': credentials.get('token'),
         'refresh_token': credentials.get('refresh_token'),
-        'token_uri': credentials.get('token_uri', 'https://oauth2.googleapis.com/token'),
+        'token_uri': credentials.get('token_uri', settings.GOOGLE_OAUTH_TOKEN_URI),
         'client_id': credentials.get('client_id') or settings.GOOGLE_CLIENT_ID,
         'client_secret': credentials.get('client_secret') or settings.GOOGLE_CLIENT_SECRET,
-        'scopes': credentials.get('scopes', settings.GOOGLE_SCOPES)
+        'scopes': credentials.get('scopes', settings.GOOGLE_SCOPES),
+        'expiry': credentials.get('expiry'),
+        # 認証情報キャッシュのキー
+        'user_id': request.session.get('user_id')
     }
     
     # 必須フィールドの確認
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, Form
+from fastapi import APIRouter, Body, Request, Depends, HTTPException, Form
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
@@ -7,10 +7,11 @@ from app.api.dependencies import get_database_session, get_templates, get_curren
 from app.service.group_service import group_service
 from app.core.entities import User
 
+# DBを使うエンドポイントは同期版のセッションとGroupServiceを使うため def で定義し、スレッドプールで実行する
 router = APIRouter(prefix="/groups")
 
 @router.get("/", response_class=HTMLResponse)
-async def groups_list(
+def groups_list(
     request: Request,
     templates: Jinja2Templates = Depends(get_templates),
     current_user: User = Depends(get_current_user),
@@ -44,7 +45,7 @@ async def group_create_form(
     })
 
 @router.post("/create")
-async def group_create(
+def group_create(
     request: Request,
     name: str = Form(...),
     description: str = Form(""),
@@ -76,7 +77,7 @@ async def group_create(
         raise HTTPException(status_code=500, detail="グループの作成に失敗しました")
 
 @router.get("/{group_id}", response_class=HTMLResponse)
-async def group_detail(
+def group_detail(
     request: Request,
     group_id: int,
     templates: Jinja2Templates = Depends(get_templates),
@@ -114,7 +115,7 @@ async def group_detail(
         return RedirectResponse(url="/groups", status_code=302)
 
 @router.get("/join/{invite_code}")
-async def group_join(
+def group_join(
     invite_code: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database_session)
@@ -137,7 +138,7 @@ async def group_join(
         return RedirectResponse(url="/groups", status_code=302)
 
 @router.get("/{group_id}/schedule", response_class=HTMLResponse)
-async def meeting_scheduler_page(
+def meeting_scheduler_page(
     request: Request,
     group_id: int,
     templates: Jinja2Templates = Depends(get_templates),
@@ -175,8 +176,7 @@ async def meeting_scheduler_search(
     start_time: str = Form(...),
     end_time: str = Form(...),
     duration_minutes: int = Form(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session)
+    current_user: User = Depends(get_current_user)
 ):
     """ミーティング空き時間検索（フォーム処理）"""
     try:
@@ -203,7 +203,7 @@ async def meeting_scheduler_search(
 # JSON API エンドポイント（フロントエンド用）
 
 @router.get("/api/groups")
-async def get_user_groups_api(
+def get_user_groups_api(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database_session)
 ):
@@ -211,18 +211,15 @@ async def get_user_groups_api(
     try:
         groups = group_service.get_user_groups(db, current_user.id)
         
-        # フロントエンド形式に変換
+        # フロントエンド形式に変換（メンバー数はグループ一覧と同じクエリで集計済み）
         formatted_groups = []
         for group in groups:
-            # メンバー数を取得
-            members = group_service.get_group_members(db, group['id'])
-            
             formatted_groups.append({
                 "id": str(group['id']),
                 "name": group['name'],
                 "description": group['description'],
                 "invite_code": group['invite_code'],  # 招待コードを追加
-                "memberCount": len(members),
+                "memberCount": group['member_count'],
                 "role": "owner" if group['role'] == "admin" else group['role']
             })
         
@@ -235,7 +232,7 @@ async def get_user_groups_api(
         return JSONResponse(content=[], status_code=500)
 
 @router.get("/api/groups/{group_id}")
-async def get_group_detail_api(
+def get_group_detail_api(
     group_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database_session)
@@ -310,15 +307,14 @@ async def get_group_detail_api(
         raise HTTPException(status_code=500, detail=f"グループ詳細の取得に失敗しました: {str(e)}")
 
 @router.post("/api/groups")
-async def create_group_api(
-    request: Request,
+def create_group_api(
+    body: dict = Body(...),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database_session)
 ):
     """グループを作成（JSON）"""
     try:
         # リクエストボディから名前と説明を取得
-        body = await request.json()
         name = body.get('name', '').strip()
         description = body.get('description', '').strip()
         
@@ -352,7 +348,7 @@ async def create_group_api(
         raise HTTPException(status_code=500, detail="グループの作成に失敗しました")
 
 @router.get("/api/groups/{group_id}/members")
-async def get_group_members_api(
+def get_group_members_api(
     group_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_database_session)
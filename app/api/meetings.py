@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Form, Query
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
-from app.api.dependencies import get_database_session, get_templates, get_current_user, get_user_credentials
+from app.api.dependencies import get_async_database_session, get_templates, get_current_user, get_user_credentials
 from app.service.meeting_service import meeting_service
 from app.service.group_service import group_service
 from app.core.entities import User
-from app.infrastructure.repositories.calendar_repository import calendar_repository
-from app.infrastructure.repositories.user_repository import user_repository
+from app.infrastructure.executors import google_io_executor
+from app.infrastructure.repositories.calendar_repository import async_calendar_repository
+from app.infrastructure.repositories.user_repository import async_user_repository
 
 router = APIRouter()
 
@@ -54,8 +55,9 @@ async def create_meeting(
         if len(attendee_emails) < 1:
             raise HTTPException(status_code=400, detail="少なくとも1名の参加者が必要です")
         
-        # ミーティングイベントを作成
-        result = meeting_service.create_meeting_event(
+        # ミーティングイベントを作成（Google APIの呼び出しはI/O用のプールで実行）
+        result = await google_io_executor.run(
+            meeting_service.create_meeting_event,
             credentials=credentials,
             title=title.strip(),
             start_datetime=start_dt,
@@ -96,7 +98,7 @@ async def search_meeting_times(
     end_time: str = Form(...),
     duration: int = Form(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_async_database_session),
     credentials: dict = Depends(get_user_credentials)
 ):
     """ミーティング時間検索API"""
@@ -107,10 +109,10 @@ async def search_meeting_times(
         )
         
         # グループアクセス権限チェック
-        group_service.get_group_with_access_check(db, group_id, current_user.id)
+        await group_service.get_group_with_access_check_async(db, group_id, current_user.id)
         
-        # 空き時間を検索
-        search_result = meeting_service.find_available_times(
+        # 空き時間を検索（Google APIの呼び出しと空き時間の計算はそれぞれのプールで実行）
+        search_result = await meeting_service.search_available_times(
             db=db,
             member_emails=selected_members,
             start_date=start_date,
@@ -143,7 +145,7 @@ async def meeting_results_page(
     duration: int = Query(...),
     templates: Jinja2Templates = Depends(get_templates),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session),
+    db: AsyncSession = Depends(get_async_database_session),
     credentials: dict = Depends(get_user_credentials)
 ):
     """ミーティング検索結果ページ"""
@@ -157,10 +159,10 @@ async def meeting_results_page(
         )
         
         # グループアクセス権限チェック
-        group = group_service.get_group_with_access_check(db, group_id, current_user.id)
+        group = await group_service.get_group_with_access_check_async(db, group_id, current_user.id)
         
-        # 空き時間を検索
-        search_result = meeting_service.find_available_times(
+        # 空き時間を検索（Google APIの呼び出しと空き時間の計算はそれぞれのプールで実行）
+        search_result = await meeting_service.search_available_times(
             db=db,
             member_emails=member_emails,
             start_date=start_date,
@@ -208,7 +210,7 @@ async def calendar_page(
     request: Request,
     templates: Jinja2Templates = Depends(get_templates),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_database_session)
 ):
     """カレンダー表示ページ"""
     from datetime import datetime, timedelta
@@ -243,7 +245,7 @@ async def calendar_page(
         end_datetime = datetime.combine(week_end, datetime.max.time())
         
         # ユーザーのカレンダーイベントを取得
-        events = calendar_repository.get_user_calendar_events_for_period(
+        events = await async_calendar_repository.get_user_calendar_events_for_period(
             db, current_user.id, start_datetime, end_datetime
         )
         
@@ -313,7 +315,7 @@ async def get_calendar_events(
     start: str = Query(...),
     end: str = Query(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_database_session)
 ):
     """カレンダーイベント取得API（FullCalendar用）"""
     try:
@@ -324,7 +326,7 @@ async def get_calendar_events(
         end_date = datetime.fromisoformat(end.replace('Z', '+00:00'))
         
         # ユーザーのカレンダーイベントを取得
-        events = calendar_repository.get_user_calendar_events_for_period(db, current_user.id, start_date, end_date)
+        events = await async_calendar_repository.get_user_calendar_events_for_period(db, current_user.id, start_date, end_date)
         
         # FullCalendar形式に変換
         calendar_events = []
@@ -353,7 +355,7 @@ async def get_member_schedule_summary(
     start_time: str = Query(...),
     duration: int = Query(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_database_session)
 ):
     """特定メンバーの予定サマリーを取得（フロントエンド用）"""
     try:
@@ -365,13 +367,13 @@ async def get_member_schedule_summary(
         end_datetime = target_date + timedelta(days=1)
         
         # メンバーのユーザーIDを取得
-        member_user = user_repository.get_user_by_email(db, member_email)
+        member_user = await async_user_repository.get_user_by_email(db, member_email)
         
         if not member_user:
             return JSONResponse(content={'events': [], 'status': 'no_data'})
         
         # イベントを取得
-        events = calendar_repository.get_user_calendar_events_for_period(db, member_user.id, start_datetime, end_datetime)
+        events = await async_calendar_repository.get_user_calendar_events_for_period(db, member_user.id, start_datetime, end_datetime)
         
         # フロントエンド用にフォーマット
         formatted_events = []
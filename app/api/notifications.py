@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import get_database_session
+from app.service.calendar_sync_service import calendar_sync_service, calendar_sync_scheduler
+
+router = APIRouter(prefix="/api/calendar")
+
+@router.post("/notifications")
+async def receive_calendar_notification(
+    request: Request,
+    db: Session = Depends(get_database_session)
+):
+    """Google Calendarのプッシュ通知を受信して差分同期を予約"""
+    channel_id = request.headers.get('X-Goog-Channel-ID')
+    resource_state = request.headers.get('X-Goog-Resource-State')
+
+    if not channel_id or not resource_state:
+        raise HTTPException(status_code=400, detail="通知ヘッダーが不足しています")
+
+    channel = calendar_sync_service.verify_notification(
+        db,
+        channel_id,
+        request.headers.get('X-Goog-Channel-Token'),
+        request.headers.get('X-Goog-Resource-ID')
+    )
+
+    # チャンネル登録直後の確認通知には同期不要
+    if resource_state == 'sync':
+        return {"status": "sync"}
+
+    # 短時間に届いた通知はユーザー単位で1回の同期にまとめる
+    queued = calendar_sync_scheduler.notify(channel.user_id)
+    print(f"📨 ユーザー {channel.user_id} のカレンダー変更通知を受信 ({'予約' if queued else '予約済みにまとめました'})")
+
+    return {"status": "queued" if queued else "coalesced"}
@@ -9,6 +9,26 @@ class Settings:
     
     # データベース設定
     DATABASE_URL: str = os.getenv('DATABASE_URL')
+    DATABASE_ECHO: bool = os.getenv('DATABASE_ECHO', 'false').lower() == 'true'  # 実行したSQLをログ出力するか（開発用）
+    DATABASE_POOL_SIZE: int = int(os.getenv('DATABASE_POOL_SIZE', '5'))  # ワーカープロセスごとに保持する接続数
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))  # プールを超えて一時的に開く接続数
+    DATABASE_POOL_TIMEOUT: float = float(os.getenv('DATABASE_POOL_TIMEOUT', '10'))  # 空き接続を待つ最大秒数
+    DATABASE_POOL_RECYCLE: int = int(os.getenv('DATABASE_POOL_RECYCLE', '1800'))  # 接続を作り直すまでの秒数（サーバー側の切断対策）
+    DATABASE_POOL_PRE_PING: bool = os.getenv('DATABASE_POOL_PRE_PING', 'true').lower() == 'true'  # 貸し出し前に接続の生存確認をするか
+    DATABASE_STATEMENT_TIMEOUT_MS: int = int(os.getenv('DATABASE_STATEMENT_TIMEOUT_MS', '30000'))  # 1文の実行時間の上限（ミリ秒、PostgreSQLのみ、0で無制限）
+    DATABASE_POOL_SLOW_CHECKOUT_MS: float = float(os.getenv('DATABASE_POOL_SLOW_CHECKOUT_MS', '100'))  # 接続待ちがこれを超えたら警告を出す（ミリ秒）
+    DATABASE_REPLICA_URL: str = os.getenv('DATABASE_REPLICA_URL') or None  # 読み取り専用の検索を送るレプリカ（未設定なら全てプライマリ）
+    DATABASE_REPLICA_PIN_SECONDS: float = float(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '30'))  # 書き込んだユーザーの検索をプライマリに固定する秒数（レプリカの遅延より長くする）
+    DATABASE_OVERLAP_RANGE_INDEX: bool = os.getenv('DATABASE_OVERLAP_RANGE_INDEX', 'false').lower() == 'true'  # 期間をtstzrangeの生成列として持ち、GiSTインデックスで重なり検索するか（PostgreSQLのみ、テーブル作成時に適用）
+    DATABASE_PARTITION_CALENDAR_EVENTS: bool = (
+        os.getenv('DATABASE_PARTITION_CALENDAR_EVENTS', 'false').lower() == 'true'
+        and (os.getenv('DATABASE_URL') or '').startswith('postgresql')
+    )  # calendar_events を開始日時で月単位にパーティション分割するか（PostgreSQLのみ、テーブル作成時に適用）
+    DATABASE_SQLITE_TUNING: bool = os.getenv('DATABASE_SQLITE_TUNING', 'true').lower() == 'true'  # ファイルのSQLiteでWAL等のPRAGMAを設定し、書き込みを1つずつ実行するか
+    DATABASE_SQLITE_SYNCHRONOUS: str = os.getenv('DATABASE_SQLITE_SYNCHRONOUS', 'NORMAL')  # WALではNORMALでも破損しない（電源断で直前のコミットが失われる可能性のみ）
+    DATABASE_SQLITE_MMAP_SIZE: int = int(os.getenv('DATABASE_SQLITE_MMAP_SIZE', '268435456'))  # メモリマップで読むサイズ（バイト）
+    DATABASE_SQLITE_CACHE_SIZE: int = int(os.getenv('DATABASE_SQLITE_CACHE_SIZE', '-65536'))  # 接続ごとのページキャッシュ（負の値はKiB）
+    DATABASE_SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv('DATABASE_SQLITE_BUSY_TIMEOUT_MS', '5000'))  # ロック解除を待つ最大時間（ミリ秒、他の接続の書き込み中に書き込む場合の待ち時間）
     
     # アプリケーション設定
     BASE_URL: str = os.getenv('BASE_URL', 'http://localhost:8000')
@@ -22,7 +42,62 @@ class Settings:
     # セッション設定
     SECRET_KEY: str = os.getenv('SECRET_KEY')
     SESSION_MAX_AGE: int = 86400  # 24時間
-    
+    USER_CACHE_TTL: float = float(os.getenv('USER_CACHE_TTL', '300'))  # ログインユーザーの情報をキャッシュする秒数（0で無効）
+    USER_CACHE_MAXSIZE: int = int(os.getenv('USER_CACHE_MAXSIZE', '10000'))  # キャッシュするユーザー数の上限
+
+    # カレンダー同期設定
+    CALENDAR_SYNC_SHARDS: int = int(os.getenv('CALENDAR_SYNC_SHARDS', '4'))  # フル同期時の期間分割数
+    CALENDAR_SYNC_PAST_DAYS: int = int(os.getenv('CALENDAR_SYNC_PAST_DAYS', '7'))  # 同期対象とする過去の日数
+    CALENDAR_SYNC_FUTURE_DAYS: int = int(os.getenv('CALENDAR_SYNC_FUTURE_DAYS', '90'))  # 同期対象とする未来の日数
+    CALENDAR_RETENTION_DAYS: int = int(os.getenv('CALENDAR_RETENTION_DAYS', '7'))  # 終了後に保持する日数（超過分は定期処理で削除）
+    CALENDAR_PRUNE_BATCH_SIZE: int = int(os.getenv('CALENDAR_PRUNE_BATCH_SIZE', '1000'))  # 1トランザクションで削除する件数
+    CALENDAR_PARTITION_MONTHS_AHEAD: int = int(os.getenv('CALENDAR_PARTITION_MONTHS_AHEAD', '6'))  # 先に作っておく未来の月パーティション数（同期対象の未来の日数より長くする）
+    CALENDAR_MAINTENANCE_INTERVAL: int = int(os.getenv('CALENDAR_MAINTENANCE_INTERVAL', '3600'))  # 定期処理の間隔（秒）
+    CALENDAR_WINDOW_ADVANCE_INTERVAL: int = int(os.getenv('CALENDAR_WINDOW_ADVANCE_INTERVAL', '86400'))  # 差分同期がこの秒数行われていないユーザーは定期処理で同期し、同期期間の未来側を進める
+    CALENDAR_POLL_INTERVAL: int = int(os.getenv('CALENDAR_POLL_INTERVAL', '3600'))  # 通知を登録していないカレンダー（プライマリ以外、通知の受信先が未設定なら全て）を定期処理で差分同期する間隔（秒）
+    CALENDAR_SYNC_ALL_CALENDARS: bool = os.getenv('CALENDAR_SYNC_ALL_CALENDARS', 'true').lower() == 'true'  # 表示が選択されている全カレンダーを同期するか（falseならプライマリのみ）
+    CALENDAR_RECURRENCE_MODE: str = os.getenv('CALENDAR_RECURRENCE_MODE', 'expand')  # 繰り返しイベントの保存方法（expand: 1回ずつ保存 / rules: ルールを保存し検索時に展開）
+    CALENDAR_MAX_EVENT_DAYS: int = int(os.getenv('CALENDAR_MAX_EVENT_DAYS', '31'))  # 期間検索で考慮するイベントの最大の長さ（日）
+
+    # Google API部分レスポンス設定（fieldsマスク、追加のフィールドが必要な場合は環境変数で上書き）
+    GOOGLE_EVENTS_LIST_FIELDS: str = os.getenv('GOOGLE_EVENTS_LIST_FIELDS', 'nextPageToken,items(id,summary,start,end,transparency)')
+    GOOGLE_EVENT_INSERT_FIELDS: str = os.getenv('GOOGLE_EVENT_INSERT_FIELDS', 'id,htmlLink')
+    GOOGLE_EVENTS_RULES_FIELDS: str = os.getenv('GOOGLE_EVENTS_RULES_FIELDS', 'nextPageToken,items(id,status,summary,start,end,transparency,recurrence,recurringEventId,originalStartTime)')
+    GOOGLE_CALENDAR_LIST_FIELDS: str = os.getenv('GOOGLE_CALENDAR_LIST_FIELDS', 'nextPageToken,items(id,primary,selected)')
+    GOOGLE_FREEBUSY_FIELDS: str = os.getenv('GOOGLE_FREEBUSY_FIELDS', 'calendars')
+    GOOGLE_USERINFO_FIELDS: str = os.getenv('GOOGLE_USERINFO_FIELDS', 'id,email,name')
+
+    # Google APIの接続先（ローカルのフェイクサーバーでテスト・ベンチマークする場合に上書き）
+    GOOGLE_API_BASE_URL: str = os.getenv('GOOGLE_API_BASE_URL')  # 未設定ならDiscoveryドキュメントのrootUrl（https://www.googleapis.com/）
+    GOOGLE_OAUTH_AUTH_URI: str = os.getenv('GOOGLE_OAUTH_AUTH_URI', 'https://accounts.google.com/o/oauth2/auth')
+    GOOGLE_OAUTH_TOKEN_URI: str = os.getenv('GOOGLE_OAUTH_TOKEN_URI', 'https://oauth2.googleapis.com/token')
+
+    # Google API HTTPトランスポート設定（ワーカープロセスごとに共有するコネクションプール）
+    GOOGLE_HTTP_POOL_CONNECTIONS: int = int(os.getenv('GOOGLE_HTTP_POOL_CONNECTIONS', '4'))  # ホストごとのプール数
+    GOOGLE_HTTP_POOL_MAXSIZE: int = int(os.getenv('GOOGLE_HTTP_POOL_MAXSIZE', '16'))  # プールあたりの最大接続数
+    GOOGLE_HTTP_TIMEOUT: float = float(os.getenv('GOOGLE_HTTP_TIMEOUT', '30'))  # リクエストタイムアウト（秒）
+    GOOGLE_FREEBUSY_CACHE_TTL: float = float(os.getenv('GOOGLE_FREEBUSY_CACHE_TTL', '60'))  # ログインユーザーの予定あり時間帯をキャッシュする秒数
+    GOOGLE_CALENDAR_LIST_CACHE_TTL: float = float(os.getenv('GOOGLE_CALENDAR_LIST_CACHE_TTL', '600'))  # FreeBusy対象のカレンダーリストをキャッシュする秒数
+    GOOGLE_TOKEN_REFRESH_MARGIN: int = int(os.getenv('GOOGLE_TOKEN_REFRESH_MARGIN', '300'))  # 有効期限の何秒前からトークンを更新するか
+    GOOGLE_CREDENTIAL_CACHE_TTL: float = float(os.getenv('GOOGLE_CREDENTIAL_CACHE_TTL', '604800'))  # 最後のリクエストから認証情報を保持する秒数（通知による差分同期でも使うためチャンネルの有効期間に合わせる）
+    GOOGLE_CREDENTIAL_CACHE_MAXSIZE: int = int(os.getenv('GOOGLE_CREDENTIAL_CACHE_MAXSIZE', '10000'))  # 認証情報を保持するユーザー数の上限
+
+    # ブロッキング処理の実行プール設定（async def のエンドポイントからオフロードする）
+    GOOGLE_IO_EXECUTOR_WORKERS: int = int(os.getenv('GOOGLE_IO_EXECUTOR_WORKERS', '16'))  # Google API呼び出しの同時実行数
+    GOOGLE_IO_EXECUTOR_QUEUE: int = int(os.getenv('GOOGLE_IO_EXECUTOR_QUEUE', '64'))  # 実行待ちの上限（超えたら503）
+    GOOGLE_IO_TIMEOUT: float = float(os.getenv('GOOGLE_IO_TIMEOUT', '60'))  # 1回の呼び出しを待つ最大秒数（超えたら504）
+    SLOT_SEARCH_WORKERS: int = int(os.getenv('SLOT_SEARCH_WORKERS', '2'))  # 空き時間計算の同時実行数
+    SLOT_SEARCH_USE_PROCESSES: bool = os.getenv('SLOT_SEARCH_USE_PROCESSES', 'false').lower() == 'true'  # 空き時間計算をプロセスで実行するか（デフォルトはスレッド）
+    SLOT_SEARCH_QUEUE: int = int(os.getenv('SLOT_SEARCH_QUEUE', '32'))  # 実行待ちの上限（超えたら503）
+    SLOT_SEARCH_TIMEOUT: float = float(os.getenv('SLOT_SEARCH_TIMEOUT', '10'))  # 1回の計算を待つ最大秒数（超えたら504）
+
+    # プッシュ通知（events.watch）設定
+    GOOGLE_WEBHOOK_URL: str = os.getenv('GOOGLE_WEBHOOK_URL')  # 通知の受信先（HTTPS必須、未設定なら通知を登録しない）
+    GOOGLE_EVENTS_SYNC_FIELDS: str = os.getenv('GOOGLE_EVENTS_SYNC_FIELDS', 'nextPageToken,items(id,status,summary,start,end,transparency)')
+    CALENDAR_CHANNEL_TTL: int = int(os.getenv('CALENDAR_CHANNEL_TTL', '604800'))  # チャンネルの有効期間（秒）
+    CALENDAR_CHANNEL_RENEW_MARGIN: int = int(os.getenv('CALENDAR_CHANNEL_RENEW_MARGIN', '86400'))  # 期限の何秒前に更新するか
+    CALENDAR_SYNC_DEBOUNCE: float = float(os.getenv('CALENDAR_SYNC_DEBOUNCE', '5'))  # 通知をまとめる待ち時間（秒）
+
     def __init__(self):
         """設定初期化時のバリデーション"""
         print(f"🔍 SECRET_KEY loaded: {'***' + self.SECRET_KEY[-4:] if self.SECRET_KEY else 'None'}")
@@ -54,8 +129,8 @@ class Settings:
             "web": {
                 "client_id": self.GOOGLE_CLIENT_ID,
                 "client_secret": self.GOOGLE_CLIENT_SECRET,
-                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
+                "auth_uri": self.GOOGLE_OAUTH_AUTH_URI,
+                "token_uri": self.GOOGLE_OAUTH_TOKEN_URI,
                 "redirect_uris": [self.GOOGLE_REDIRECT_URI]
             }
         }
@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple
+
+import pytz
+
+_fromisoformat = datetime.fromisoformat
+
+# 終日イベントの日付を解釈するタイムゾーン（カレンダーのタイムゾーン）
+DEFAULT_ALL_DAY_TIMEZONE = 'Asia/Tokyo'
+
+
+class ParsedEvent(NamedTuple):
+    """変換済みのGoogleイベント（開始・終了はUTCのエポック秒）"""
+    google_event_id: str
+    start: int
+    end: int
+    title: str
+    is_all_day: bool
+    is_busy: bool = True  # 予定ありとして扱うか（「空き時間」に設定された予定はFalse、FreeBusyと同じ扱い）
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """グレゴリオ暦の日付を1970-01-01からの日数に変換"""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_rfc3339(value: str) -> int:
+    """
+    RFC3339文字列をUTCのエポック秒に変換（小数秒は切り捨て）
+
+    文字列の置換やpytzによるタイムゾーン変換を行わず、C実装の fromisoformat() と
+    timestamp() だけで変換する。タイムゾーンなしの文字列はUTCとして扱う。
+    """
+    try:
+        dt = _fromisoformat(value)
+    except ValueError:
+        # Python 3.10以前の fromisoformat() は 'Z' を解釈できない
+        dt = _fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+@lru_cache(maxsize=4096)
+def all_day_epoch(date_value: str, timezone_name: str = DEFAULT_ALL_DAY_TIMEZONE) -> int:
+    """終日イベントの日付（YYYY-MM-DD）をタイムゾーンの0時のエポック秒に変換（日付ごとにキャッシュ）"""
+    local_midnight = datetime(int(date_value[0:4]), int(date_value[5:7]), int(date_value[8:10]))
+    offset = pytz.timezone(timezone_name).localize(local_midnight).utcoffset()
+    return _days_from_civil(local_midnight.year, local_midnight.month, local_midnight.day) * 86400 - int(offset.total_seconds())
+
+
+def epoch_to_datetime(epoch: int) -> datetime:
+    """エポック秒をUTCのdatetimeに変換"""
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+
+def parse_google_events(
+    events: Iterable[Dict],
+    default_title: str = '無題',
+    include_all_day: bool = True,
+    all_day_timezone: str = DEFAULT_ALL_DAY_TIMEZONE
+) -> List[ParsedEvent]:
+    """
+    Googleイベントのリストを一括変換
+
+    Args:
+        events: events.list のitems
+        default_title: タイトルがないイベントのタイトル
+        include_all_day: 終日イベントを含めるか
+        all_day_timezone: 終日イベントの日付を解釈するタイムゾーン
+
+    Returns:
+        変換済みイベントのリスト（変換できないイベントはスキップ）
+    """
+    parsed = []
+    append = parsed.append
+    skipped = 0
+
+    for event in events:
+        try:
+            start = event['start']
+            start_time = start.get('dateTime')
+            if start_time is not None:
+                append(ParsedEvent(
+                    event['id'],
+                    parse_rfc3339(start_time),
+                    parse_rfc3339(event['end']['dateTime']),
+                    event.get('summary', default_title),
+                    False,
+                    event.get('transparency') != 'transparent'
+                ))
+            elif include_all_day:
+                append(ParsedEvent(
+                    event['id'],
+                    all_day_epoch(start['date'], all_day_timezone),
+                    all_day_epoch(event['end']['date'], all_day_timezone),
+                    event.get('summary', default_title),
+                    True,
+                    event.get('transparency') != 'transparent'
+                ))
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+
+    if skipped:
+        print(f"⚠️ 変換できないイベントを{skipped}件スキップしました")
+
+    return parsed
+
+
+def events_to_db_format(parsed_events: Iterable[ParsedEvent]) -> List[Dict]:
+    """変換済みイベントをDB保存形式に変換（UTC統一）"""
+    return [
+        {
+            'google_event_id': event.google_event_id,
+            'start_datetime': epoch_to_datetime(event.start),
+            'end_datetime': epoch_to_datetime(event.end),
+            'title': event.title,
+            'is_all_day': event.is_all_day,
+            'is_busy': event.is_busy
+        }
+        for event in parsed_events
+    ]
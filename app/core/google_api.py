@@ -0,0 +1,487 @@
+import json
+import socket
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import google_auth_httplib2
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from googleapiclient.discovery import Resource, fix_method_name
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest
+from googleapiclient.model import JsonModel
+from googleapiclient.schema import Schemas
+
+from app.core.config import settings
+
+
+def to_rfc3339(dt: datetime) -> str:
+    """datetimeをGoogle API用のRFC3339文字列に変換（naiveはUTCとして扱う）"""
+    if dt.tzinfo is None:
+        return dt.isoformat() + 'Z'
+    return dt.isoformat()
+
+
+class GoogleCalendarAPI:
+    """Google Calendar API呼び出しの共通処理"""
+
+    # 1回のバッチHTTPリクエストに含められるリクエスト数の上限
+    BATCH_LIMIT = 50
+    # 1回のFreeBusyクエリに含められるカレンダー数の上限
+    FREEBUSY_LIMIT = 50
+
+    def _list_request_params(self, time_min: datetime, time_max: datetime, fields: Optional[str], params: Dict) -> Dict:
+        """events.list のリクエストパラメータを組み立てる"""
+        return {
+            'maxResults': 250,
+            'singleEvents': True,
+            'orderBy': 'startTime',
+            'showDeleted': False,  # 削除されたイベントを除外（差分同期では上書きする）
+            **params,
+            'timeMin': to_rfc3339(time_min),
+            'timeMax': to_rfc3339(time_max),
+            'fields': settings.GOOGLE_EVENTS_LIST_FIELDS if fields is None else fields
+        }
+
+    def list_events(
+        self,
+        service,
+        calendar_id: str,
+        time_min: datetime,
+        time_max: datetime,
+        fields: Optional[str] = None,
+        page_token: Optional[str] = None,
+        **params
+    ) -> List[Dict]:
+        """指定期間のイベントをページングしながら全件取得（fieldsマスクで必要な項目のみ取得）"""
+        all_events = []
+        request_params = self._list_request_params(time_min, time_max, fields, params)
+
+        while True:
+            events_result = service.events().list(
+                calendarId=calendar_id,
+                pageToken=page_token,
+                **request_params
+            ).execute()
+
+            all_events.extend(events_result.get('items', []))
+
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                break
+
+        return all_events
+
+    def list_calendar_ids(self, service) -> List[str]:
+        """同期対象のカレンダーID（カレンダーリストで表示が選択されているもの、プライマリは 'primary'）"""
+        calendar_ids = []
+        page_token = None
+
+        while True:
+            result = service.calendarList().list(
+                fields=settings.GOOGLE_CALENDAR_LIST_FIELDS,
+                minAccessRole='freeBusyReader',
+                pageToken=page_token
+            ).execute()
+
+            for item in result.get('items', []):
+                if item.get('primary'):
+                    calendar_ids.insert(0, 'primary')
+                elif item.get('selected'):
+                    calendar_ids.append(item['id'])
+
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                break
+
+        return calendar_ids or ['primary']
+
+    def query_freebusy(
+        self,
+        service,
+        calendar_ids: List[str],
+        time_min: datetime,
+        time_max: datetime
+    ) -> Dict[str, List[Dict]]:
+        """
+        FreeBusy APIで複数カレンダーの予定あり時間帯をまとめて取得
+
+        イベント本体を取得せず、カレンダーごとにマージ済みの時間帯のみが返る。
+
+        Returns:
+            カレンダーIDごとの [{'start': RFC3339, 'end': RFC3339}] のリスト
+        """
+        busy_by_calendar = {}
+
+        for offset in range(0, len(calendar_ids), self.FREEBUSY_LIMIT):
+            result = service.freebusy().query(
+                body={
+                    'timeMin': to_rfc3339(time_min),
+                    'timeMax': to_rfc3339(time_max),
+                    'items': [{'id': calendar_id} for calendar_id in calendar_ids[offset:offset + self.FREEBUSY_LIMIT]]
+                },
+                fields=settings.GOOGLE_FREEBUSY_FIELDS
+            ).execute()
+
+            for calendar_id, calendar in result.get('calendars', {}).items():
+                if calendar.get('errors'):
+                    print(f"⚠️ 予定あり時間帯を取得できないカレンダー: {calendar_id} {calendar['errors']}")
+                busy_by_calendar[calendar_id] = calendar.get('busy', [])
+
+        return busy_by_calendar
+
+    def split_time_window(self, time_min: datetime, time_max: datetime, shards: int) -> List[Tuple[datetime, datetime]]:
+        """期間を等間隔のシャードに分割"""
+        shards = max(1, shards)
+        step = (time_max - time_min) / shards
+
+        windows = []
+        for i in range(shards):
+            shard_start = time_min + step * i
+            # 最後のシャードは端数を含めて終端まで
+            shard_end = time_max if i == shards - 1 else time_min + step * (i + 1)
+            windows.append((shard_start, shard_end))
+
+        return windows
+
+    def merge_events(self, shard_results: List[List[Dict]]) -> List[Dict]:
+        """シャードごとの取得結果をイベントIDで重複排除しながら結合"""
+        merged = {}
+        for events in shard_results:
+            for event in events:
+                # シャード境界をまたぐイベントは両方のシャードに含まれるため最初の1件を採用
+                merged.setdefault(event['id'], event)
+        return list(merged.values())
+
+    def _list_first_pages_batch(
+        self,
+        service,
+        tasks: List[Tuple[str, datetime, datetime]],
+        fields: Optional[str],
+        params: Dict
+    ) -> Dict[int, Dict]:
+        """
+        複数の events.list の1ページ目をバッチリクエストでまとめて取得
+
+        Returns:
+            タスクの番号ごとのレスポンス（失敗したタスクは含まない）
+        """
+        new_batch = getattr(service, 'new_batch_http_request', None)
+        if new_batch is None:
+            return {}
+
+        responses: Dict[int, Dict] = {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                responses[int(request_id)] = response
+            else:
+                print(f"⚠️ バッチ内のイベント取得に失敗したため個別に再取得します: {exception}")
+
+        for offset in range(0, len(tasks), self.BATCH_LIMIT):
+            batch = new_batch(callback=callback)
+            for index, (calendar_id, time_min, time_max) in enumerate(tasks[offset:offset + self.BATCH_LIMIT], start=offset):
+                batch.add(
+                    service.events().list(
+                        calendarId=calendar_id,
+                        **self._list_request_params(time_min, time_max, fields, params)
+                    ),
+                    request_id=str(index)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                print(f"⚠️ バッチリクエストに失敗したため個別に取得します: {e}")
+
+        return responses
+
+    def list_events_multi(
+        self,
+        service_builder: Callable[[], object],
+        calendar_ids: List[str],
+        time_min: datetime,
+        time_max: datetime,
+        shards: Optional[int] = None,
+        fields: Optional[str] = None,
+        **params
+    ) -> Dict[str, List[Dict]]:
+        """
+        複数カレンダーのイベントをまとめて取得
+
+        (カレンダー, 期間シャード) ごとの1ページ目を1回のバッチHTTPリクエストで取得し、
+        続きのページがあるものや失敗したものだけを並列にページングする。
+
+        Args:
+            service_builder: Calendar APIサービスを生成する関数（スレッドごとに呼び出す）
+            calendar_ids: カレンダーIDのリスト
+            time_min: 取得開始時刻
+            time_max: 取得終了時刻
+            shards: 分割数（省略時は設定値）
+            fields: fieldsマスク
+            **params: list_events に渡す追加パラメータ
+
+        Returns:
+            カレンダーIDごとの、イベントIDで重複排除されたイベントリスト
+        """
+        if shards is None:
+            shards = settings.CALENDAR_SYNC_SHARDS
+        windows = self.split_time_window(time_min, time_max, shards)
+        tasks = [(calendar_id, start, end) for calendar_id in calendar_ids for start, end in windows]
+
+        first_pages = self._list_first_pages_batch(service_builder(), tasks, fields, params)
+
+        def fetch_task(index: int) -> List[Dict]:
+            calendar_id, start, end = tasks[index]
+            first_page = first_pages.get(index)
+            if first_page is None:
+                return self.list_events(service_builder(), calendar_id, start, end, fields=fields, **params)
+
+            events = first_page.get('items', [])
+            if first_page.get('nextPageToken'):
+                events = events + self.list_events(
+                    service_builder(), calendar_id, start, end,
+                    fields=fields, page_token=first_page['nextPageToken'], **params
+                )
+            return events
+
+        remaining = [index for index in range(len(tasks)) if index not in first_pages or first_pages[index].get('nextPageToken')]
+        results: Dict[int, List[Dict]] = {
+            index: response.get('items', []) for index, response in first_pages.items() if index not in remaining
+        }
+        if remaining:
+            with ThreadPoolExecutor(max_workers=len(remaining)) as executor:
+                results.update(zip(remaining, executor.map(fetch_task, remaining)))
+
+        events_by_calendar = {}
+        for calendar_id in calendar_ids:
+            events_by_calendar[calendar_id] = self.merge_events([
+                results[index] for index, task in enumerate(tasks) if task[0] == calendar_id
+            ])
+
+        print(f"📊 カレンダー別取得件数: {[len(events) for events in events_by_calendar.values()]} (バッチ取得 {len(first_pages)}/{len(tasks)})")
+        return events_by_calendar
+
+
+class PooledHttp:
+    """
+    コネクションプール付きのhttplib2互換HTTPトランスポート
+
+    httplib2.Httpはスレッドセーフでなく、サービスごとに生成すると
+    リクエストのたびにTCP/TLSハンドシェイクが発生する。requests.Session
+    （urllib3のコネクションプール）をプロセス内で共有し、keep-aliveで
+    googleapis.comへの接続を再利用する。
+    """
+
+    def __init__(self, pool_connections: int, pool_maxsize: int, timeout: float):
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        """httplib2.Http.request() と同じ形式でリクエストを送信"""
+        try:
+            response = self._session.request(
+                method,
+                uri,
+                data=body,
+                headers=headers,
+                timeout=self.timeout,
+                allow_redirects=redirections > 0
+            )
+        except requests.exceptions.Timeout as e:
+            # googleapiclientのリトライ対象となる例外に変換
+            raise socket.timeout(str(e))
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionError(str(e))
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        # requestsが展開済みのため、httplib2と同様に content-encoding を無効化する
+        if 'content-encoding' in info:
+            info['-content-encoding'] = info.pop('content-encoding')
+        info['status'] = str(response.status_code)
+
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, response.content
+
+    def close(self):
+        """共有トランスポートのため、サービス単位のclose()では接続を閉じない"""
+        pass
+
+    def shutdown(self):
+        """プール内の全接続を閉じる"""
+        self._session.close()
+
+
+# 生成済みのAPIメソッドの再利用に使うResourceの内部フック（ライブラリの更新で無くなった場合は通常のResourceを使う）
+_RESOURCE_HOOKS_AVAILABLE = all(
+    callable(getattr(Resource, name, None))
+    for name in ('_set_service_methods', '_add_nested_resources', '_set_dynamic_attr')
+)
+
+# リソースのパスごとの生成済みメソッド（名前, 関数, バインドが必要か）
+ResourceMethods = List[Tuple[str, Callable, bool]]
+
+
+class _ReusableResource(Resource):
+    """
+    生成済みのAPIメソッドをファクトリ内で共有するResource
+
+    通常のResourceはインスタンス化のたびにDiscoveryドキュメントから全メソッドを
+    生成し直す（events() 1回で数ミリ秒）。メソッド関数自体はHTTPオブジェクトに
+    依存しないため、(API, バージョン, リソースのパス) ごとに1度だけ生成して
+    以降はバインドのみ行う。キャッシュはファクトリが持つ。
+    """
+
+    def __init__(self, method_cache: Dict[Tuple[str, ...], ResourceMethods], resource_path: Tuple[str, ...], **kwargs):
+        self._method_cache = method_cache
+        self._resource_path = resource_path
+        super().__init__(**kwargs)
+
+    def _set_service_methods(self):
+        methods = self._method_cache.get(self._resource_path)
+
+        if methods is None:
+            super()._set_service_methods()
+            dynamic_attrs = getattr(self, '_dynamic_attrs', None)
+            if dynamic_attrs is None:
+                return
+            methods = []
+            for name in dynamic_attrs:
+                attr = self.__dict__[name]
+                if hasattr(attr, '__func__'):
+                    methods.append((name, attr.__func__, True))
+                else:
+                    methods.append((name, attr, False))
+            self._method_cache[self._resource_path] = methods
+            return
+
+        for name, function, is_bound in methods:
+            self._set_dynamic_attr(name, function.__get__(self, self.__class__) if is_bound else function)
+
+    def _add_nested_resources(self, resourceDesc, rootDesc, schema):
+        # ネストしたリソース（events() など）も同じクラスで生成してキャッシュを効かせる
+        for method_name, method_desc in resourceDesc.get('resources', {}).items():
+
+            def method_resource(self, resource_desc=method_desc, resource_path=self._resource_path + (method_name,)):
+                return _ReusableResource(
+                    self._method_cache,
+                    resource_path,
+                    http=self._http,
+                    baseUrl=self._baseUrl,
+                    model=self._model,
+                    developerKey=self._developerKey,
+                    requestBuilder=self._requestBuilder,
+                    resourceDesc=resource_desc,
+                    rootDesc=rootDesc,
+                    schema=schema
+                )
+
+            method_resource.__doc__ = "A collection resource."
+            method_resource.__is_resource__ = True
+            self._set_dynamic_attr(fix_method_name(method_name), method_resource.__get__(self, self.__class__))
+
+
+class GoogleServiceFactory:
+    """
+    Google APIサービスオブジェクトのファクトリ
+
+    Discoveryドキュメントはgoogle-api-python-clientに同梱の静的コピーから
+    プロセスごとに1度だけ読み込み、スキーマとAPIメソッドを再利用する。
+    HTTPトランスポートも全サービスで共有し、リクエストごとに差し替えるのは
+    認証情報のみ。
+    """
+
+    def __init__(self):
+        self._discovery: Dict[Tuple[str, str], Dict] = {}
+        # (API, バージョン, リソースのパス) ごとの生成済みメソッド（Discoveryドキュメントのリソース数で上限が決まる）
+        self._resource_methods: Dict[Tuple[str, ...], ResourceMethods] = {}
+        self._transport: Optional[PooledHttp] = None
+        self._lock = threading.Lock()
+
+    @property
+    def transport(self) -> PooledHttp:
+        """全サービスで共有するHTTPトランスポート（初回アクセス時に生成）"""
+        if self._transport is None:
+            with self._lock:
+                if self._transport is None:
+                    self._transport = PooledHttp(
+                        pool_connections=settings.GOOGLE_HTTP_POOL_CONNECTIONS,
+                        pool_maxsize=settings.GOOGLE_HTTP_POOL_MAXSIZE,
+                        timeout=settings.GOOGLE_HTTP_TIMEOUT
+                    )
+        return self._transport
+
+    def _load_discovery(self, api: str, version: str) -> Dict:
+        """Discoveryドキュメントを読み込み、パース済みの状態でキャッシュ"""
+        key = (api, version)
+        discovery = self._discovery.get(key)
+        if discovery is not None:
+            return discovery
+
+        with self._lock:
+            discovery = self._discovery.get(key)
+            if discovery is None:
+                content = get_static_doc(api, version)
+                if content is None:
+                    raise ValueError(f"Discoveryドキュメントが見つかりません: {api} {version}")
+
+                document = json.loads(content)
+                if settings.GOOGLE_API_BASE_URL:
+                    # 接続先を差し替える（バッチリクエストのURLもrootUrlから組み立てられる）
+                    document['rootUrl'] = settings.GOOGLE_API_BASE_URL
+                discovery = {
+                    'document': document,
+                    'schema': Schemas(document),
+                    'base_url': urllib.parse.urljoin(document['rootUrl'], document['servicePath']),
+                    'model': JsonModel('dataWrapper' in document.get('features', []))
+                }
+                self._discovery[key] = discovery
+                print(f"✅ Discoveryドキュメントを読み込みました: {api} {version}")
+
+        return discovery
+
+    def build(self, api: str, version: str, credentials) -> Resource:
+        """認証情報を指定してAPIサービスを生成"""
+        discovery = self._load_discovery(api, version)
+        # 共有トランスポートの上で認証情報だけを差し替える（トークン更新も同じプールを使う）
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=self.transport)
+
+        resource_args = dict(
+            http=http,
+            baseUrl=discovery['base_url'],
+            model=discovery['model'],
+            requestBuilder=HttpRequest,
+            developerKey=None,
+            resourceDesc=discovery['document'],
+            rootDesc=discovery['document'],
+            schema=discovery['schema']
+        )
+        if not _RESOURCE_HOOKS_AVAILABLE:
+            return Resource(**resource_args)
+        return _ReusableResource(self._resource_methods, (api, version), **resource_args)
+
+    def calendar(self, credentials) -> Resource:
+        """Calendar API v3 サービスを生成"""
+        return self.build('calendar', 'v3', credentials)
+
+    def oauth2(self, credentials) -> Resource:
+        """OAuth2 API v2 サービスを生成（ユーザー情報取得用）"""
+        return self.build('oauth2', 'v2', credentials)
+
+    def shutdown(self):
+        """共有トランスポートの接続を閉じる"""
+        with self._lock:
+            if self._transport is not None:
+                self._transport.shutdown()
+                self._transport = None
+
+# グローバルインスタンス
+google_calendar_api = GoogleCalendarAPI()
+google_service_factory = GoogleServiceFactory()
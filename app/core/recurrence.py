@@ -0,0 +1,187 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rrulestr
+
+from app.core.event_parsing import DEFAULT_ALL_DAY_TIMEZONE, all_day_epoch, epoch_to_datetime, parse_rfc3339
+
+# 展開結果のキャッシュ件数（(シリーズ, 検索期間) の組み合わせごと）
+EXPANSION_CACHE_SIZE = 4096
+
+
+class RecurringSeries(NamedTuple):
+    """繰り返しイベントのマスター（開始はUTCのエポック秒）"""
+    google_event_id: str
+    recurrence: str  # RRULE/RDATE/EXDATE行を改行で連結したもの
+    start: int
+    duration: int  # 1回あたりの長さ（秒）
+    timezone_name: str  # 繰り返しを展開するタイムゾーン（夏時間を正しく扱うため）
+    title: str
+    is_all_day: bool
+    is_busy: bool = True  # 予定ありとして扱うか（「空き時間」に設定された予定はFalse）
+
+
+def split_recurring_events(events: Iterable[Dict]) -> Tuple[List[Dict], List[Dict], Dict[str, List[int]]]:
+    """
+    singleEvents=False で取得したイベントを分類
+
+    Returns:
+        (通常のイベント, 繰り返しのマスター, マスターIDごとの除外する元の開始時刻)
+        個別に変更された回は通常のイベントとして扱い、元の開始時刻を展開から除外する。
+        キャンセルされた回は除外する開始時刻のみ記録する。
+    """
+    single_events = []
+    masters = []
+    exceptions: Dict[str, List[int]] = {}
+
+    for event in events:
+        if event.get('recurrence'):
+            masters.append(event)
+            continue
+
+        master_id = event.get('recurringEventId')
+        original_start = event.get('originalStartTime')
+        if master_id and original_start:
+            try:
+                if original_start.get('dateTime'):
+                    epoch = parse_rfc3339(original_start['dateTime'])
+                else:
+                    epoch = all_day_epoch(original_start['date'], original_start.get('timeZone') or DEFAULT_ALL_DAY_TIMEZONE)
+                exceptions.setdefault(master_id, []).append(epoch)
+            except (KeyError, TypeError, ValueError):
+                pass
+            if event.get('status') == 'cancelled':
+                continue
+
+        single_events.append(event)
+
+    return single_events, masters, exceptions
+
+
+def parse_recurring_masters(
+    masters: Iterable[Dict],
+    default_title: str = '無題',
+    default_timezone: str = DEFAULT_ALL_DAY_TIMEZONE
+) -> List[RecurringSeries]:
+    """繰り返しのマスターを一括変換（変換できないものはスキップ）"""
+    parsed = []
+    skipped = 0
+
+    for event in masters:
+        try:
+            start = event['start']
+            timezone_name = start.get('timeZone') or default_timezone
+            if start.get('dateTime'):
+                start_epoch = parse_rfc3339(start['dateTime'])
+                end_epoch = parse_rfc3339(event['end']['dateTime'])
+                is_all_day = False
+            else:
+                start_epoch = all_day_epoch(start['date'], timezone_name)
+                end_epoch = all_day_epoch(event['end']['date'], timezone_name)
+                is_all_day = True
+            parsed.append(RecurringSeries(
+                event['id'],
+                '\n'.join(event['recurrence']),
+                start_epoch,
+                end_epoch - start_epoch,
+                timezone_name,
+                event.get('summary', default_title),
+                is_all_day,
+                event.get('transparency') != 'transparent'
+            ))
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+
+    if skipped:
+        print(f"⚠️ 変換できない繰り返しイベントを{skipped}件スキップしました")
+
+    return parsed
+
+
+@lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def expand_occurrences(
+    recurrence: str,
+    start: int,
+    duration: int,
+    timezone_name: str,
+    exdates: Tuple[int, ...],
+    window_start: int,
+    window_end: int,
+    is_all_day: bool = False
+) -> Tuple[Tuple[int, int], ...]:
+    """
+    繰り返しルールを検索期間内の回だけ展開（(シリーズ, 期間) ごとにメモ化）
+
+    Args:
+        recurrence: RRULE/RDATE/EXDATE行
+        start: 初回の開始（UTCのエポック秒）
+        duration: 1回あたりの長さ（秒）
+        timezone_name: 繰り返しを展開するタイムゾーン
+        exdates: 除外する回の元の開始時刻（エポック秒、ソート済み）
+        window_start: 検索期間の開始（エポック秒）
+        window_end: 検索期間の終了（エポック秒）
+        is_all_day: 終日イベントか（UNTILが日付のみのため現地時刻のまま展開する）
+
+    Returns:
+        期間に重なる回の (開始, 終了) エポック秒のタプル
+    """
+    tz = ZoneInfo(timezone_name)
+
+    def to_rule_time(epoch: int) -> datetime:
+        local = datetime.fromtimestamp(epoch, tz)
+        return local.replace(tzinfo=None) if is_all_day else local
+
+    try:
+        rules = rrulestr(recurrence, dtstart=to_rule_time(start), forceset=True)
+        for exdate in exdates:
+            rules.exdate(to_rule_time(exdate))
+
+        # 期間の開始より前に始まり、期間内まで続く回も含める
+        occurrences = rules.between(to_rule_time(window_start - duration), to_rule_time(window_end), inc=True)
+    except (ValueError, TypeError) as e:
+        print(f"⚠️ 繰り返しルールを展開できません ({recurrence!r}): {e}")
+        return ()
+
+    expanded = []
+    for occurrence in occurrences:
+        if occurrence.tzinfo is None:
+            occurrence = occurrence.replace(tzinfo=tz)
+        occurrence_start = int(occurrence.timestamp())
+        occurrence_end = occurrence_start + duration
+        if occurrence_end > window_start and occurrence_start < window_end:
+            expanded.append((occurrence_start, occurrence_end))
+
+    return tuple(expanded)
+
+
+def series_to_db_format(series: Iterable[RecurringSeries], exceptions: Dict[str, List[int]]) -> List[Dict]:
+    """繰り返しのマスターをDB保存形式に変換（除外する回を含める）"""
+    return [
+        {
+            'google_event_id': item.google_event_id,
+            'recurrence': item.recurrence,
+            'start_datetime': epoch_to_datetime(item.start),
+            'duration_seconds': item.duration,
+            'timezone': item.timezone_name,
+            'exdates': exceptions.get(item.google_event_id, []),
+            'title': item.title,
+            'is_all_day': item.is_all_day,
+            'is_busy': item.is_busy
+        }
+        for item in series
+    ]
+
+
+def exdates_to_text(exdates: Iterable[int]) -> Optional[str]:
+    """除外する開始時刻をDB保存用の文字列に変換"""
+    values = sorted(set(exdates))
+    return ','.join(str(value) for value in values) if values else None
+
+
+def exdates_from_text(text: Optional[str]) -> Tuple[int, ...]:
+    """DBに保存した除外する開始時刻を読み込む"""
+    if not text:
+        return ()
+    return tuple(int(value) for value in text.split(','))
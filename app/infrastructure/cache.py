@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    有効期限付きのインメモリキャッシュ（スレッドセーフ）
+
+    期限切れのエントリは取得時に破棄し、件数が上限を超えた場合は
+    最も長く使われていないエントリから削除する。
+    on_evict を指定すると、期限切れ・上限超過で破棄したエントリのキーと値を渡して呼び出す
+    （ロックの外で呼び出すため、コールバックからキャッシュを操作してもよい）。
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._clock = clock
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """有効なエントリを取得（期限切れ・未登録ならdefault）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            expired = expires_at <= self._clock()
+            if expired:
+                del self._entries[key]
+            else:
+                self._entries.move_to_end(key)
+
+        if expired:
+            self._evicted([(key, value)])
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """エントリを登録（ttl_secondsを省略した場合はキャッシュ全体の有効期間）"""
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_seconds
+        evicted = []
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted_key, (_, evicted_value) = self._entries.popitem(last=False)
+                evicted.append((evicted_key, evicted_value))
+        self._evicted(evicted)
+
+    def _evicted(self, entries):
+        if self._on_evict is not None:
+            for key, value in entries:
+                self._on_evict(key, value)
+
+    def pop(self, key: Hashable):
+        """エントリを破棄"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """条件に一致するキーのエントリをまとめて破棄"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        """全エントリを破棄"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
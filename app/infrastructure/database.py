@@ -1,9 +1,26 @@
+import functools
+import inspect
+import itertools
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from sqlalchemy import DDL, Select, create_engine, event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 
-from app.infrastructure.models import Base
+from app.core.config import settings
+from app.infrastructure.cache import TTLCache
+from app.infrastructure.models import Base, CalendarEvent, User
+from app.infrastructure.partitioning import calendar_event_partitions
+
+logger = logging.getLogger(__name__)
 
 # 環境変数を読み込み
 load_dotenv()
@@ -11,22 +28,315 @@ load_dotenv()
 # .envファイルからデータベースURLを取得
 DATABASE_URL = os.getenv('DATABASE_URL', "sqlite:///./calendar_app.db")
 
-# PostgreSQLの場合、psycopg3用のURL形式に変換
-if DATABASE_URL.startswith('postgresql://'):
-    DATABASE_URL = DATABASE_URL.replace('postgresql://', 'postgresql+psycopg://', 1)
+def psycopg_database_url(database_url: str) -> str:
+    """PostgreSQLの場合、psycopg3用のURL形式に変換"""
+    if database_url.startswith('postgresql://'):
+        return database_url.replace('postgresql://', 'postgresql+psycopg://', 1)
+    return database_url
+
+DATABASE_URL = psycopg_database_url(DATABASE_URL)
+
+# PostgreSQLでは期間をtstzrangeの生成列として持ち、GiSTインデックスで重なり検索できるようにする（オプション）
+for statement in [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS time_range tstzrange "
+    "GENERATED ALWAYS AS (tstzrange(start_datetime, end_datetime, '[)')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_calendar_events_user_time_range ON calendar_events USING gist (user_id, time_range)"
+]:
+    event.listen(
+        CalendarEvent.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect='postgresql', callable_=lambda *args, **kwargs: settings.DATABASE_OVERLAP_RANGE_INDEX)
+    )
+
+def _create_calendar_event_partitions(target, connection, **kwargs):
+    """パーティション分割する場合、テーブル作成時にデフォルトと直近の月のパーティションを作成"""
+    if connection.dialect.name == 'postgresql' and settings.DATABASE_PARTITION_CALENDAR_EVENTS:
+        calendar_event_partitions.ensure_partitions(connection)
+
+event.listen(CalendarEvent.__table__, "after_create", _create_calendar_event_partitions)
+
+class PoolMetrics:
+    """
+    コネクションプールの接続待ち時間の計測（スレッドセーフ）
+
+    空き接続を待つ時間が伸びている、またはタイムアウトが発生している場合はプールが枯渇している。
+    計測値は /metrics で確認でき、タイムアウトはERROR、長い待ちはWARNINGでログに出力する。
+    """
+
+    def __init__(self, slow_checkout_ms: float, sample_size: int = 1000):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._samples = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """計測値をリセット"""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.slow_checkouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self._samples.clear()
+
+    def record(self, wait_ms: float, timed_out: bool = False):
+        """1回分の接続待ち時間を記録"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait_ms += wait_ms
+                self._samples.append(wait_ms)
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            slow = wait_ms >= self.slow_checkout_ms
+            if slow:
+                self.slow_checkouts += 1
+
+        if timed_out:
+            logger.error("DB接続の待ちがタイムアウトしました（%.0fms）", wait_ms)
+        elif slow:
+            logger.warning("DB接続の待ちが長くなっています（%.0fms）", wait_ms)
+
+    def snapshot(self) -> dict:
+        """現在の計測値（待ち時間はミリ秒、p95は直近の貸し出しから算出）"""
+        with self._lock:
+            samples = sorted(self._samples)
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'slow_checkouts': self.slow_checkouts,
+                'avg_wait_ms': self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                'p95_wait_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0,
+                'max_wait_ms': self.max_wait_ms
+            }
+
+
+pool_metrics = PoolMetrics(settings.DATABASE_POOL_SLOW_CHECKOUT_MS)
+
+
+class _TimedCheckout:
+    """空き接続を待った時間を pool_metrics に記録するプールの共通処理"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        pool_metrics.record((time.perf_counter() - started) * 1000)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """空き接続を待った時間を pool_metrics に記録する QueuePool"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """空き接続を待った時間を pool_metrics に記録する非同期エンジン用のプール"""
+
+
+def async_database_url(database_url: str) -> str:
+    """非同期ドライバ用のURLに変換（SQLiteはaiosqlite、PostgreSQLはpsycopgの非同期モード）"""
+    if database_url.startswith('sqlite://'):
+        return database_url.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+    return database_url
+
+
+def is_sqlite_file(database_url: str) -> bool:
+    """ファイルに保存するSQLiteか（インメモリは除く）"""
+    return (
+        database_url.startswith('sqlite')
+        and ':memory:' not in database_url
+        and database_url.split(':', 1)[1].rstrip('/') != ''
+    )
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    """エンジンの接続プール・SQLログ設定（インメモリのSQLiteはプール設定を使わない）"""
+    options = {'echo': settings.DATABASE_ECHO}
+    if database_url.startswith('sqlite') and not is_sqlite_file(database_url):
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING
+    )
+    if database_url.startswith('postgresql') and settings.DATABASE_STATEMENT_TIMEOUT_MS > 0:
+        # URLで指定した options（例: -csearch_path=replica）は残す
+        url_options = make_url(database_url).query.get('options')
+        options['connect_args'] = {
+            'options': ' '.join(filter(None, [url_options, f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_MS}"]))
+        }
+    return options
+
+
+def sqlite_pragmas() -> list:
+    """ファイルのSQLiteの接続ごとに設定するPRAGMA"""
+    return [
+        "journal_mode=WAL",  # 読み取りが書き込みを待たない（書き込み中も直前のコミットまでを読める）
+        f"synchronous={settings.DATABASE_SQLITE_SYNCHRONOUS}",
+        f"mmap_size={settings.DATABASE_SQLITE_MMAP_SIZE}",
+        f"cache_size={settings.DATABASE_SQLITE_CACHE_SIZE}",
+        f"busy_timeout={settings.DATABASE_SQLITE_BUSY_TIMEOUT_MS}"
+    ]
+
+
+def configure_sqlite(engine):
+    """ファイルのSQLiteのエンジンに、接続時にPRAGMAを設定するフックを登録（非同期エンジンは sync_engine を渡す）"""
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+# Session.info に置くレプリカ振り分け用の状態のキー
+REPLICA_READS_KEY = 'replica_reads'  # replica_read のメソッドの実行中（ネストの深さ）
+WROTE_KEY = 'wrote'  # このセッションで書き込んだか
+WRITTEN_USER_IDS_KEY = 'written_user_ids'  # このセッションで書き込んだデータの持ち主のユーザーID
+
+# 書き込んだユーザーの検索をプライマリに固定する期間（ワーカープロセスごと）
+replica_pins = TTLCache(ttl_seconds=settings.DATABASE_REPLICA_PIN_SECONDS, maxsize=100000)
+
+
+class RoutingSession(Session):
+    """
+    replica_read のリポジトリメソッド内の検索をレプリカに、それ以外をプライマリに送るセッション
+
+    以下の場合は read-your-writes のためプライマリで検索する。
+      - このセッションで書き込んだ後（未コミットの変更や直前のコミットを読めるように）
+      - リクエストのユーザーが直近（DATABASE_REPLICA_PIN_SECONDS以内）にデータを書き込んだ場合（自分の同期直後など）
+    レプリカが設定されていなければ常にプライマリを使う。
+    """
+
+    def __init__(self, *args, replica_bind=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica_bind = replica_bind
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or (clause is not None and not isinstance(clause, Select)):
+            self.info[WROTE_KEY] = True
+        elif self._use_replica(clause):
+            return self.replica_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+    def _use_replica(self, clause) -> bool:
+        return (
+            self.replica_bind is not None
+            and self.info.get(REPLICA_READS_KEY, 0) > 0
+            and not self.info.get(WROTE_KEY)
+            and not (clause is not None and clause._for_update_arg is not None)
+            and replica_pins.get(self.info.get('user_id')) is None
+        )
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _track_written_users(session: Session, flush_context):
+    """書き込んだデータの持ち主を記録（同期では users.calendar_last_synced が必ず更新される）"""
+    written = session.info.setdefault(WRITTEN_USER_IDS_KEY, set())
+    for instance in itertools.chain(session.new, session.dirty, session.deleted):
+        user_id = instance.id if isinstance(instance, User) else getattr(instance, 'user_id', None)
+        if user_id is not None:
+            written.add(user_id)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_written_users(session: Session):
+    """コミットしたら書き込んだユーザーとリクエストのユーザーの検索をしばらくプライマリに固定"""
+    written = session.info.pop(WRITTEN_USER_IDS_KEY, set())
+    if session.info.get(WROTE_KEY) and session.info.get('user_id') is not None:
+        written.add(session.info['user_id'])
+    for user_id in written:
+        replica_pins.set(user_id, True)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_written_users(session: Session):
+    session.info.pop(WRITTEN_USER_IDS_KEY, None)
+
+
+@contextmanager
+def reading_from_replica(session):
+    """ブロック内の検索をレプリカに送る（RoutingSession以外では何もしない）"""
+    info = session.info
+    info[REPLICA_READS_KEY] = info.get(REPLICA_READS_KEY, 0) + 1
+    try:
+        yield
+    finally:
+        info[REPLICA_READS_KEY] -= 1
+
+
+def replica_read(method):
+    """読み取り専用のリポジトリメソッド（第1引数のセッションがRoutingSessionならレプリカで検索）"""
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, session, *args, **kwargs):
+            with reading_from_replica(session):
+                return await method(self, session, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, session, *args, **kwargs):
+        with reading_from_replica(session):
+            return method(self, session, *args, **kwargs)
+    return wrapper
+
 
 # 同期エンジンの作成（PostgreSQL/SQLite対応）
-engine = create_engine(DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+# レプリカ（読み取り専用の検索用、オプション）
+DATABASE_REPLICA_URL = psycopg_database_url(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+replica_engine = create_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)) if DATABASE_REPLICA_URL else None
+
+# ファイルのSQLite（単一ノード構成）ではPRAGMAを設定する（書き込みはSQLiteのロックで1つずつ実行され、待ちは busy_timeout まで）
+SQLITE_TUNING = settings.DATABASE_SQLITE_TUNING and is_sqlite_file(DATABASE_URL)
+if SQLITE_TUNING:
+    configure_sqlite(engine)
+if replica_engine is not None and settings.DATABASE_SQLITE_TUNING and is_sqlite_file(DATABASE_REPLICA_URL):
+    configure_sqlite(replica_engine)
+
+SessionLocal = sessionmaker(class_=RoutingSession, bind=engine, replica_bind=replica_engine, expire_on_commit=False)
 
-def get_db():
-    """データベースセッションを取得"""
-    session = SessionLocal()
+# 非同期エンジンの作成（async def のエンドポイントからイベントループを止めずに検索する）
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+async_replica_engine = None
+if DATABASE_REPLICA_URL:
+    ASYNC_DATABASE_REPLICA_URL = async_database_url(DATABASE_REPLICA_URL)
+    async_replica_engine = create_async_engine(ASYNC_DATABASE_REPLICA_URL, **engine_options(ASYNC_DATABASE_REPLICA_URL, is_async=True))
+    if settings.DATABASE_SQLITE_TUNING and is_sqlite_file(DATABASE_REPLICA_URL):
+        configure_sqlite(async_replica_engine.sync_engine)
+if SQLITE_TUNING:
+    configure_sqlite(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    replica_bind=async_replica_engine.sync_engine if async_replica_engine else None,
+    expire_on_commit=False
+)
+
+def get_db(user_id: Optional[int] = None):
+    """データベースセッションを取得（user_id はリクエストのユーザー、レプリカの振り分けに使う）"""
+    session = SessionLocal(info={'user_id': user_id})
     try:
         yield session
     finally:
         session.close()
 
+async def get_async_db(user_id: Optional[int] = None):
+    """非同期データベースセッションを取得（user_id はリクエストのユーザー、レプリカの振り分けに使う）"""
+    async with AsyncSessionLocal(info={'user_id': user_id}) as session:
+        yield session
+
 def init_db():
     """データベースを初期化（テーブル作成）"""
     # 既存のテーブルを削除してから再作成
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+
+class BoundedExecutor:
+    """
+    async def のエンドポイントからブロッキング処理を実行する上限付きのプール
+
+    実行中と待機中の件数の合計が上限に達している場合は待たずに503を返し、
+    呼び出しごとのタイムアウトを超えた場合は504を返す（遅い処理がワーカーの
+    イベントループや他のユーザーのリクエストを止めないようにする）。
+    プールは最初に使われたときに作成する。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        timeout: float,
+        executor_factory: Optional[Callable[[int], Executor]] = None
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor_factory = executor_factory or (
+            lambda workers: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        )
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """計測値をリセット"""
+        with self._lock:
+            self.in_flight = 0
+            self.max_queue_depth = 0
+            self.submitted = 0
+            self.completed = 0
+            self.failed = 0
+            self.rejected = 0
+            self.timeouts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """実行待ちの件数"""
+        return max(0, self.in_flight - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._executor_factory(self.max_workers)
+            return self._executor
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        プールで関数を実行して結果を待つ
+
+        Raises:
+            HTTPException: 503（プールが満杯）/ 504（タイムアウト）
+        """
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                rejected = True
+            else:
+                rejected = False
+                self.in_flight += 1
+                self.submitted += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if rejected:
+            print(f"⚠️ {self.name}: 実行待ちが上限（{self.max_queue}件）に達しているため受け付けません")
+            raise HTTPException(status_code=503, detail="サーバーが混み合っています。しばらくしてから再度お試しください")
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._on_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            print(f"❌ {self.name}: {timeout or self.timeout}秒以内に完了しませんでした ({getattr(func, '__name__', func)})")
+            raise HTTPException(status_code=504, detail="処理がタイムアウトしました")
+
+    def _on_done(self, future: asyncio.Future):
+        """実行が終わったら件数を戻す（タイムアウト後に終わった場合も含む）"""
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def snapshot(self) -> dict:
+        """現在の計測値"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts
+            }
+
+    def shutdown(self):
+        """プールを停止（実行中の処理は待たない）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _slot_search_pool(workers: int) -> Executor:
+    """空き時間計算用のプール（デフォルトはスレッド、設定で有効にするとGILに縛られないようにプロセスで実行）"""
+    if settings.SLOT_SEARCH_USE_PROCESSES:
+        # スレッドを持つワーカーからforkしないようにspawnで起動する
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slot-search')
+
+
+# Google APIの呼び出し（ブロッキングI/O）用
+google_io_executor = BoundedExecutor(
+    'google-io',
+    settings.GOOGLE_IO_EXECUTOR_WORKERS,
+    settings.GOOGLE_IO_EXECUTOR_QUEUE,
+    settings.GOOGLE_IO_TIMEOUT
+)
+
+# 空き時間の計算（CPU処理）用
+slot_search_executor = BoundedExecutor(
+    'slot-search',
+    settings.SLOT_SEARCH_WORKERS,
+    settings.SLOT_SEARCH_QUEUE,
+    settings.SLOT_SEARCH_TIMEOUT,
+    executor_factory=_slot_search_pool
+)
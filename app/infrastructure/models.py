@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 
+from app.core.config import settings
+
 Base = declarative_base()
 
 class User(Base):
@@ -19,6 +21,8 @@ class User(Base):
     # リレーション
     group_memberships = relationship("GroupMember", back_populates="user")
     calendar_events = relationship("CalendarEvent", back_populates="user", cascade="all, delete-orphan")
+    busy_blocks = relationship("BusyBlock", back_populates="user", cascade="all, delete-orphan")
+    recurring_events = relationship("RecurringEvent", back_populates="user", cascade="all, delete-orphan")
 
 class Group(Base):
     __tablename__ = "groups"
@@ -51,23 +55,88 @@ class GroupMember(Base):
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    calendar_id = Column(String, nullable=False, default="primary")  # 取得元のカレンダー（プライマリは 'primary'）
     google_event_id = Column(String, nullable=False)
-    start_datetime = Column(DateTime(timezone=True), nullable=False)
+    # パーティション分割する場合、主キーにパーティションキーを含める必要がある
+    start_datetime = Column(DateTime(timezone=True), nullable=False, primary_key=settings.DATABASE_PARTITION_CALENDAR_EVENTS)
     end_datetime = Column(DateTime(timezone=True), nullable=False)
     title = Column(String, default="予定あり")
     is_all_day = Column(Boolean, default=False)
+    is_busy = Column(Boolean, default=True)  # 予定ありとして扱うか（「空き時間」に設定された予定はFalse）
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # リレーション
     user = relationship("User", back_populates="calendar_events")
     
+    # インデックス（検索はユーザー + 期間の範囲条件、差分同期はユーザー + カレンダー + イベントID）
+    __table_args__ = (
+        Index("ix_calendar_events_user_start", "user_id", "start_datetime"),
+        Index("ix_calendar_events_user_end", "user_id", "end_datetime"),
+        Index("ix_calendar_events_user_calendar_event", "user_id", "calendar_id", "google_event_id"),
+        {
+            "extend_existing": True,
+            "postgresql_partition_by": "RANGE (start_datetime)" if settings.DATABASE_PARTITION_CALENDAR_EVENTS else None
+        }
+    )
+    # ORMの識別子は id のみ（パーティション分割時も）
+    __mapper_args__ = {"primary_key": [id]}
+
+class BusyBlock(Base):
+    """ユーザーごとにマージ済みの予定時間帯（FreeBusyと同じく「空き時間」の予定を除き終日イベントを含む、同期時に更新）"""
+    __tablename__ = "busy_blocks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    start_datetime = Column(DateTime(timezone=True), nullable=False)
+    end_datetime = Column(DateTime(timezone=True), nullable=False)
+    
+    # リレーション
+    user = relationship("User", back_populates="busy_blocks")
+    
     # インデックス
     __table_args__ = (
+        Index("ix_busy_blocks_user_start", "user_id", "start_datetime"),
         {"extend_existing": True}
     )
 
+class RecurringEvent(Base):
+    """繰り返しイベントのマスター（ルール保存モードで使用、検索時に期間内の回だけ展開）"""
+    __tablename__ = "recurring_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    calendar_id = Column(String, nullable=False, default="primary")  # 取得元のカレンダー（プライマリは 'primary'）
+    google_event_id = Column(String, nullable=False)
+    recurrence = Column(Text, nullable=False)  # RRULE/RDATE/EXDATE行（改行区切り）
+    start_datetime = Column(DateTime(timezone=True), nullable=False)  # 初回の開始
+    duration_seconds = Column(Integer, nullable=False)  # 1回あたりの長さ
+    timezone = Column(String, nullable=False)  # 繰り返しを展開するタイムゾーン
+    exdates = Column(Text)  # 個別に変更・キャンセルされた回の元の開始時刻（エポック秒、カンマ区切り）
+    title = Column(String, default="予定あり")
+    is_all_day = Column(Boolean, default=False)
+    is_busy = Column(Boolean, default=True)  # 予定ありとして扱うか（「空き時間」に設定された予定はFalse）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # リレーション
+    user = relationship("User", back_populates="recurring_events")
+
+class CalendarChannel(Base):
+    __tablename__ = "calendar_channels"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    channel_id = Column(String, unique=True, index=True, nullable=False)
+    resource_id = Column(String, nullable=False)
+    token = Column(String, nullable=False)  # 通知の検証用トークン
+    expiration = Column(DateTime, nullable=False)  # チャンネルの有効期限（UTC）
+    synced_at = Column(DateTime)  # 差分同期の起点（UTC）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # リレーション
+    user = relationship("User")
+
 def generate_invite_code() -> str:
     """グループ招待コードを生成"""
     return str(uuid.uuid4()).replace('-', '')[:12].upper() 
\ No newline at end of file
@@ -0,0 +1,124 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+PARENT_TABLE = 'calendar_events'
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+_PARTITION_NAME = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$')
+
+
+def month_start(dt: datetime) -> datetime:
+    """その日時を含む月の初日（UTC）"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """月の初日から指定した月数だけ進めた（戻した）月の初日"""
+    year, index = divmod(month.month - 1 + months, 12)
+    return month.replace(year=month.year + year, month=index + 1)
+
+
+def partition_name(month: datetime) -> str:
+    """月パーティションのテーブル名（calendar_events_pYYYYMM）"""
+    return f'{PARENT_TABLE}_p{month:%Y%m}'
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """月パーティションのテーブル名から月の初日を取得（月パーティションでなければNone）"""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class CalendarEventPartitions:
+    """
+    calendar_events の開始日時による月単位のパーティション管理（PostgreSQLのみ）
+
+    未来の月のパーティションを先に作り、保持期間を過ぎた月はパーティションごと
+    切り離して削除する（行単位のDELETEと違い、テーブルの肥大化やVACUUMの負荷がない）。
+    どの月にも入らない行はデフォルトパーティションに入る。
+    """
+
+    def __init__(self, months_ahead: int, history: timedelta, max_event_duration: timedelta):
+        self.months_ahead = months_ahead
+        self.history = history
+        self.max_event_duration = max_event_duration
+
+    def months_to_keep(self, now: datetime) -> List[datetime]:
+        """作成しておく月（history 前を含む月から未来 months_ahead か月まで）"""
+        month = month_start(now - self.history)
+        last = add_months(month_start(now), self.months_ahead)
+        months = []
+        while month <= last:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    def is_expired(self, month: datetime, before: datetime) -> bool:
+        """月内に始まるイベントがすべて before より前に終わっているか（イベントの最大の長さで判定）"""
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=timezone.utc)
+        return add_months(month, 1) + self.max_event_duration <= before
+
+    def list_partitions(self, connection) -> List[str]:
+        """calendar_events のパーティション名の一覧"""
+        return list(connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+        ), {'parent': PARENT_TABLE}).scalars())
+
+    def ensure_partitions(self, connection, now: Optional[datetime] = None) -> List[str]:
+        """デフォルトパーティションと未作成の月パーティションを作成し、作成した月パーティション名を返す"""
+        existing = set(self.list_partitions(connection))
+        if DEFAULT_PARTITION not in existing:
+            connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+        created = []
+        for month in self.months_to_keep(now or datetime.now(timezone.utc)):
+            name = partition_name(month)
+            if name in existing:
+                continue
+
+            bounds = {'start': month, 'end': add_months(month, 1)}
+            # デフォルトパーティションにその月の行があると作成できないため、次回以降に持ち越す
+            if connection.execute(text(
+                f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE start_datetime >= :start AND start_datetime < :end LIMIT 1"
+            ), bounds).first():
+                print(f"⚠️ {DEFAULT_PARTITION} に {month:%Y-%m} の行があるため {name} を作成できません")
+                continue
+
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+            ))
+            created.append(name)
+
+        return created
+
+    def drop_expired_partitions(self, connection, before: datetime) -> List[str]:
+        """保持期間を過ぎた月パーティションを切り離して削除し、削除したパーティション名を返す"""
+        dropped = []
+        for name in self.list_partitions(connection):
+            month = partition_month(name)
+            if month is None or not self.is_expired(month, before):
+                continue
+            connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+
+        return dropped
+
+
+# 過去の月は同期対象の過去の日数とイベントの最大の長さ（開始がそれだけ前のイベントも同期される）をカバーする
+calendar_event_partitions = CalendarEventPartitions(
+    months_ahead=settings.CALENDAR_PARTITION_MONTHS_AHEAD,
+    history=timedelta(days=settings.CALENDAR_SYNC_PAST_DAYS + settings.CALENDAR_MAX_EVENT_DAYS),
+    max_event_duration=timedelta(days=settings.CALENDAR_MAX_EVENT_DAYS)
+)
@@ -1,13 +1,174 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete
-from datetime import datetime, timedelta
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func, literal_column
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
 
-from app.infrastructure.models import CalendarEvent, User
+from app.core.config import settings
+from app.core.event_parsing import epoch_to_datetime
+from app.core.recurrence import exdates_from_text, exdates_to_text, expand_occurrences
+from app.infrastructure.database import replica_read
+from app.infrastructure.models import BusyBlock, CalendarEvent, RecurringEvent, User
+from app.infrastructure.partitioning import calendar_event_partitions, partition_month
+
+# 重なり検索で開始時刻の下限に使うイベントの最大の長さ（これより長いイベントは期間の開始からこの範囲内に始まるもののみ取得）
+MAX_EVENT_DURATION = timedelta(days=settings.CALENDAR_MAX_EVENT_DAYS)
+
+# 期間検索で返す列
+EVENT_COLUMNS = (
+    CalendarEvent.google_event_id,
+    CalendarEvent.start_datetime,
+    CalendarEvent.end_datetime,
+    CalendarEvent.title,
+    CalendarEvent.is_all_day
+)
+
+def _as_utc(dt: datetime) -> datetime:
+    """DBから取得した日時をUTCのaware datetimeに揃える（SQLiteはnaiveで返す）"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def merge_intervals(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """重複・隣接する時間帯をマージ"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+# 以下は同期版・非同期版のリポジトリで共有する検索文と結果の組み立て
+
+def _overlap_filter(dialect_name: str, start_date: datetime, end_date: datetime) -> list:
+    """
+    期間に重なるイベントの検索条件（start < 期間の終了 かつ end > 期間の開始）
+
+    開始時刻の下限を「期間の開始 - イベントの最大の長さ」で区切り、
+    (user_id, start_datetime) インデックスの範囲スキャンで検索できるようにする
+    （パーティション分割している場合は同じ条件で対象の月のパーティションだけを検索する）。
+    PostgreSQLで time_range 列がある場合はGiSTインデックスで厳密に検索する。
+    """
+    start_bounds = [
+        CalendarEvent.start_datetime >= start_date - MAX_EVENT_DURATION,
+        CalendarEvent.start_datetime < end_date
+    ]
+    if settings.DATABASE_OVERLAP_RANGE_INDEX and dialect_name == 'postgresql':
+        overlap = literal_column('calendar_events.time_range').op('&&')(func.tstzrange(start_date, end_date, '[)'))
+        return [overlap, *start_bounds] if settings.DATABASE_PARTITION_CALENDAR_EVENTS else [overlap]
+    return [*start_bounds, CalendarEvent.end_datetime > start_date]
+
+def _user_events_statement(overlap_filter: list, user_id: int):
+    """ユーザーの期間内のイベント（必要な列のみ）"""
+    return select(*EVENT_COLUMNS).where(
+        CalendarEvent.user_id == user_id,
+        *overlap_filter
+    ).order_by(CalendarEvent.start_datetime)
+
+def _multiple_users_events_statement(overlap_filter: list, user_emails: List[str]):
+    """複数ユーザーの期間内のイベント（必要な列のみ）"""
+    return select(User.email, *EVENT_COLUMNS).join(
+        CalendarEvent, User.id == CalendarEvent.user_id
+    ).where(
+        User.email.in_(user_emails),
+        *overlap_filter
+    ).order_by(CalendarEvent.start_datetime)
+
+def _events_by_email(user_emails: List[str], rows) -> Dict[str, List[Dict]]:
+    """メールアドレスごとにイベントをまとめる"""
+    events_by_email = {email: [] for email in user_emails}
+    for row in rows:
+        event = dict(row)
+        events_by_email[event.pop('email')].append(event)
+    return events_by_email
+
+def _busy_blocks_statement(user_emails: List[str], start_date: datetime, end_date: datetime):
+    """複数ユーザーの期間に重なるマージ済み予定時間帯"""
+    return select(User.email, BusyBlock.start_datetime, BusyBlock.end_datetime).join(
+        BusyBlock, User.id == BusyBlock.user_id
+    ).where(
+        User.email.in_(user_emails),
+        BusyBlock.start_datetime < end_date,
+        BusyBlock.end_datetime > start_date
+    ).order_by(BusyBlock.start_datetime)
+
+def _busy_blocks_by_email(user_emails: List[str], rows, occurrences: list) -> Dict[str, List[Dict]]:
+    """予定時間帯と繰り返しの回をメールアドレスごとにまとめる（繰り返しの回がある場合はマージし直す）"""
+    intervals_by_email = {email: [] for email in user_emails}
+
+    for email, start, end in rows:
+        intervals_by_email[email].append((_as_utc(start), _as_utc(end)))
+
+    for email, _, start, end in occurrences:
+        intervals_by_email[email].append((start, end))
+
+    return {
+        email: [
+            {'start_datetime': start, 'end_datetime': end}
+            for start, end in (merge_intervals(intervals) if occurrences else intervals)
+        ]
+        for email, intervals in intervals_by_email.items()
+    }
+
+def _recurring_events_statement(user_filter, end_date: datetime, busy_only: bool):
+    """期間の終了より前に始まる繰り返しのマスター（busy_only の場合は予定ありとして扱うもののみ）"""
+    conditions = [user_filter, RecurringEvent.start_datetime < end_date]
+    if busy_only:
+        conditions.append(RecurringEvent.is_busy.isnot(False))
+
+    return select(User.email, RecurringEvent).join(
+        RecurringEvent, User.id == RecurringEvent.user_id
+    ).where(*conditions)
+
+def _expand_recurring_rows(rows, start_date: datetime, end_date: datetime) -> List[Tuple[str, RecurringEvent, datetime, datetime]]:
+    """繰り返しのマスターを期間内の回だけ展開"""
+    window_start = int(_as_utc(start_date).timestamp())
+    window_end = int(_as_utc(end_date).timestamp())
+
+    occurrences = []
+    for email, series in rows:
+        for occurrence_start, occurrence_end in expand_occurrences(
+            series.recurrence,
+            int(_as_utc(series.start_datetime).timestamp()),
+            series.duration_seconds,
+            series.timezone,
+            exdates_from_text(series.exdates),
+            window_start,
+            window_end,
+            series.is_all_day
+        ):
+            occurrences.append((email, series, epoch_to_datetime(occurrence_start), epoch_to_datetime(occurrence_end)))
+
+    return occurrences
+
+def _occurrence_event_id(series: RecurringEvent, start: datetime) -> str:
+    """繰り返しの回の識別子（保存しないため、マスターのIDと回の開始時刻から作る）"""
+    return f"recurring_{series.id}_{int(_as_utc(start).timestamp())}"
+
+def _with_occurrence_events(user_id: int, events: List[CalendarEvent], occurrences: list) -> List[CalendarEvent]:
+    """繰り返しの回を保存しないイベント（id は _occurrence_event_id）として追加し、開始順に並べる"""
+    if occurrences:
+        events += [
+            CalendarEvent(
+                id=_occurrence_event_id(series, start),
+                user_id=user_id,
+                google_event_id=series.google_event_id,
+                start_datetime=start,
+                end_datetime=end,
+                title=series.title,
+                is_all_day=series.is_all_day,
+                is_busy=series.is_busy
+            )
+            for _, series, start, end in occurrences
+        ]
+        events.sort(key=lambda event: _as_utc(event.start_datetime))
+    return events
 
 class CalendarRepository:
-    def sync_user_calendar_events(self, session: Session, user_id: int, events_data: list) -> int:
-        """ユーザーのカレンダーイベントを同期（既存削除→新規追加）"""
+    def sync_user_calendar_events(self, session: Session, user_id: int, events_data: list, series_data: Optional[list] = None) -> int:
+        """ユーザーのカレンダーイベントを同期（既存削除→新規追加、series_dataを渡すと繰り返しのマスターも入れ替える）"""
         try:
             # 既存のイベントを削除
             session.execute(delete(CalendarEvent).where(CalendarEvent.user_id == user_id))
@@ -17,15 +178,26 @@ class CalendarRepository:
             for event_data in events_data:
                 calendar_event = CalendarEvent(
                     user_id=user_id,
+                    calendar_id=event_data.get('calendar_id', 'primary'),
                     google_event_id=event_data['google_event_id'],
                     start_datetime=event_data['start_datetime'],
                     end_datetime=event_data['end_datetime'],
                     title=event_data.get('title', '予定あり'),
-                    is_all_day=event_data.get('is_all_day', False)
+                    is_all_day=event_data.get('is_all_day', False),
+                    is_busy=event_data.get('is_busy', True)
                 )
                 session.add(calendar_event)
                 events_added += 1
             
+            # 繰り返しのマスターを入れ替え
+            if series_data is not None:
+                session.execute(delete(RecurringEvent).where(RecurringEvent.user_id == user_id))
+                self._add_recurring_events(session, user_id, series_data)
+            
+            # マージ済みの予定時間帯を作り直す
+            session.flush()
+            self._rebuild_busy_blocks(session, user_id)
+            
             # ユーザーの最終同期時刻を更新
             user = session.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
             if user:
@@ -39,67 +211,340 @@ class CalendarRepository:
         except Exception as e:
             session.rollback()
             print(f"❌ カレンダー同期エラー (ユーザー {user_id}): {e}")
-            return 0
+            raise
     
-    def get_user_calendar_events(self, session: Session, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
-        """指定期間のユーザーカレンダーイベントを取得"""
-        result = session.execute(
-            select(CalendarEvent).where(
-                CalendarEvent.user_id == user_id,
-                CalendarEvent.start_datetime >= start_date,
-                CalendarEvent.start_datetime <= end_date
-            ).order_by(CalendarEvent.start_datetime)
+    def apply_calendar_event_changes(
+        self,
+        session: Session,
+        user_id: int,
+        events_data: list,
+        deleted_event_ids: List[str],
+        series_data: Optional[list] = None,
+        series_exdates: Optional[Dict[str, List[int]]] = None,
+        calendar_id: str = 'primary'
+    ) -> int:
+        """差分同期の結果を反映（指定カレンダーの変更・削除されたイベントのみ入れ替え）"""
+        try:
+            series_data = series_data or []
+            self._apply_recurring_changes(session, user_id, calendar_id, series_data, deleted_event_ids, series_exdates or {})
+
+            changed_ids = [event_data['google_event_id'] for event_data in events_data] + list(deleted_event_ids)
+
+            # 予定時間帯の再計算が必要な範囲（変更前後のイベントの期間）
+            affected = [
+                (_as_utc(start), _as_utc(end))
+                for start, end in session.execute(
+                    select(CalendarEvent.start_datetime, CalendarEvent.end_datetime).where(
+                        CalendarEvent.user_id == user_id,
+                        CalendarEvent.calendar_id == calendar_id,
+                        CalendarEvent.google_event_id.in_(changed_ids)
+                    )
+                ).all()
+            ] if changed_ids else []
+            affected += [(_as_utc(e['start_datetime']), _as_utc(e['end_datetime'])) for e in events_data]
+
+            # 変更・削除されたイベントの既存行を削除
+            if changed_ids:
+                session.execute(
+                    delete(CalendarEvent).where(
+                        CalendarEvent.user_id == user_id,
+                        CalendarEvent.calendar_id == calendar_id,
+                        CalendarEvent.google_event_id.in_(changed_ids)
+                    )
+                )
+
+            # 変更後のイベントを追加
+            for event_data in events_data:
+                session.add(CalendarEvent(
+                    user_id=user_id,
+                    calendar_id=calendar_id,
+                    google_event_id=event_data['google_event_id'],
+                    start_datetime=event_data['start_datetime'],
+                    end_datetime=event_data['end_datetime'],
+                    title=event_data.get('title', '予定あり'),
+                    is_all_day=event_data.get('is_all_day', False),
+                    is_busy=event_data.get('is_busy', True)
+                ))
+
+            # 変更のあった範囲の予定時間帯のみ作り直す
+            if affected:
+                session.flush()
+                self._rebuild_busy_blocks(
+                    session,
+                    user_id,
+                    min(start for start, _ in affected),
+                    max(end for _, end in affected)
+                )
+
+            # ユーザーの最終同期時刻を更新
+            user = session.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+            if user:
+                user.calendar_last_synced = datetime.now()
+
+            session.commit()
+
+            print(f"✅ ユーザー {user_id} の差分を反映しました: 更新 {len(events_data) + len(series_data)}件, 削除 {len(deleted_event_ids)}件")
+            return len(events_data) + len(series_data) + len(deleted_event_ids)
+
+        except Exception as e:
+            session.rollback()
+            print(f"❌ 差分反映エラー (ユーザー {user_id}): {e}")
+            raise
+
+    def _add_recurring_events(self, session: Session, user_id: int, series_data: list, carried_exdates: Optional[Dict[str, str]] = None):
+        """繰り返しのマスターを追加（コミットは呼び出し側で行う）"""
+        carried_exdates = carried_exdates or {}
+        for series in series_data:
+            exdates = list(series.get('exdates', []))
+            exdates += exdates_from_text(carried_exdates.get(series['google_event_id']))
+            session.add(RecurringEvent(
+                user_id=user_id,
+                calendar_id=series.get('calendar_id', 'primary'),
+                google_event_id=series['google_event_id'],
+                recurrence=series['recurrence'],
+                start_datetime=series['start_datetime'],
+                duration_seconds=series['duration_seconds'],
+                timezone=series['timezone'],
+                exdates=exdates_to_text(exdates),
+                title=series.get('title', '予定あり'),
+                is_all_day=series.get('is_all_day', False),
+                is_busy=series.get('is_busy', True)
+            ))
+
+    def _apply_recurring_changes(
+        self,
+        session: Session,
+        user_id: int,
+        calendar_id: str,
+        series_data: list,
+        deleted_event_ids: List[str],
+        series_exdates: Dict[str, List[int]]
+    ):
+        """繰り返しのマスターの差分を反映（コミットは呼び出し側で行う）"""
+        changed_ids = [series['google_event_id'] for series in series_data] + list(deleted_event_ids) + list(series_exdates)
+        if not changed_ids:
+            return
+
+        existing = {
+            row.google_event_id: row
+            for row in session.execute(
+                select(RecurringEvent).where(
+                    RecurringEvent.user_id == user_id,
+                    RecurringEvent.calendar_id == calendar_id,
+                    RecurringEvent.google_event_id.in_(changed_ids)
+                )
+            ).scalars().all()
+        }
+
+        # 個別に変更・キャンセルされた回を既存のマスターの展開から除外
+        for master_id, exdates in series_exdates.items():
+            if master_id in existing:
+                row = existing[master_id]
+                row.exdates = exdates_to_text(exdates_from_text(row.exdates) + tuple(exdates))
+
+        # 変更・削除されたマスターを入れ替え（除外済みの回は引き継ぐ）
+        replaced_ids = [series['google_event_id'] for series in series_data] + list(deleted_event_ids)
+        carried_exdates = {
+            master_id: row.exdates for master_id, row in existing.items() if master_id in replaced_ids
+        }
+        if replaced_ids:
+            session.execute(
+                delete(RecurringEvent).where(
+                    RecurringEvent.user_id == user_id,
+                    RecurringEvent.calendar_id == calendar_id,
+                    RecurringEvent.google_event_id.in_(replaced_ids)
+                )
+            )
+        self._add_recurring_events(
+            session, user_id, [{**series, 'calendar_id': calendar_id} for series in series_data], carried_exdates
         )
-        
-        events = result.scalars().all()
-        
-        return [
-            {
-                'google_event_id': event.google_event_id,
-                'start_datetime': event.start_datetime,
-                'end_datetime': event.end_datetime,
-                'title': event.title,
-                'is_all_day': event.is_all_day
-            }
-            for event in events
+
+    def _expand_recurring_events(
+        self,
+        session: Session,
+        user_filter,
+        start_date: datetime,
+        end_date: datetime,
+        busy_only: bool = False
+    ) -> List[Tuple[str, RecurringEvent, datetime, datetime]]:
+        """
+        繰り返しのマスターを期間内の回だけ展開
+
+        Returns:
+            (ユーザーのメールアドレス, マスター, 開始, 終了) のリスト
+        """
+        rows = session.execute(_recurring_events_statement(user_filter, end_date, busy_only)).all()
+        return _expand_recurring_rows(rows, start_date, end_date)
+
+    def _partitioned(self, session: Session) -> bool:
+        """calendar_events を月単位のパーティションに分割しているか"""
+        return settings.DATABASE_PARTITION_CALENDAR_EVENTS and session.get_bind().dialect.name == 'postgresql'
+
+    def ensure_calendar_event_partitions(self, session: Session) -> List[str]:
+        """未来の月のパーティションを作成（パーティション分割していなければ何もしない）"""
+        if not self._partitioned(session):
+            return []
+
+        created = calendar_event_partitions.ensure_partitions(session)
+        session.commit()
+        return created
+
+    def prune_calendar_events_before(self, session: Session, before: datetime, batch_size: int = 1000) -> int:
+        """
+        指定時刻より前に終了したイベントをバッチ単位で削除（ロック時間を短く保つ）
+
+        パーティション分割している場合は、保持期間を過ぎた月のパーティションを
+        切り離して削除し、行単位の削除はデフォルトパーティションに入った古い行だけに行う
+        （月パーティション内の行は月ごと削除されるまで残す）。
+        """
+        total_deleted = 0
+        event_filter = [CalendarEvent.end_datetime < before]
+
+        if self._partitioned(session):
+            dropped = calendar_event_partitions.drop_expired_partitions(session, before)
+            session.commit()
+            if dropped:
+                print(f"🧹 保持期間を過ぎたパーティションを削除しました: {', '.join(dropped)}")
+
+            months = [partition_month(name) for name in calendar_event_partitions.list_partitions(session)]
+            months = [month for month in months if month is not None]
+            if months:
+                event_filter.append(CalendarEvent.start_datetime < min(months))
+
+        while True:
+            event_ids = session.execute(
+                select(CalendarEvent.id).where(
+                    *event_filter
+                ).order_by(CalendarEvent.id).limit(batch_size)
+            ).scalars().all()
+
+            if not event_ids:
+                break
+
+            session.execute(delete(CalendarEvent).where(CalendarEvent.id.in_(event_ids)))
+            session.commit()
+            total_deleted += len(event_ids)
+
+            if len(event_ids) < batch_size:
+                break
+
+        # 同じ時刻より前に終わる予定時間帯も削除
+        session.execute(delete(BusyBlock).where(BusyBlock.end_datetime < before))
+        session.commit()
+
+        return total_deleted
+
+    def _rebuild_busy_blocks(
+        self,
+        session: Session,
+        user_id: int,
+        range_start: Optional[datetime] = None,
+        range_end: Optional[datetime] = None
+    ):
+        """
+        ユーザーのマージ済み予定時間帯を作り直す（コミットは呼び出し側で行う）
+
+        範囲を指定した場合は、その範囲に重なる予定時間帯とイベントが
+        それ以上広がらなくなるまで範囲を広げ、その中だけを作り直す。
+        """
+        # FreeBusyと同じく「空き時間」の予定を除き、終日イベントは含める
+        event_filter = [CalendarEvent.user_id == user_id, CalendarEvent.is_busy.isnot(False)]
+        block_filter = [BusyBlock.user_id == user_id]
+
+        if range_start is not None and range_end is not None:
+            while True:
+                extents = [
+                    (_as_utc(start), _as_utc(end))
+                    for start, end in session.execute(
+                        select(BusyBlock.start_datetime, BusyBlock.end_datetime).where(
+                            *block_filter,
+                            BusyBlock.start_datetime <= range_end,
+                            BusyBlock.end_datetime >= range_start
+                        )
+                    ).all()
+                ]
+                extents += [
+                    (_as_utc(start), _as_utc(end))
+                    for start, end in session.execute(
+                        select(CalendarEvent.start_datetime, CalendarEvent.end_datetime).where(
+                            *event_filter,
+                            CalendarEvent.start_datetime >= range_start - MAX_EVENT_DURATION,
+                            CalendarEvent.start_datetime <= range_end,
+                            CalendarEvent.end_datetime >= range_start
+                        )
+                    ).all()
+                ]
+                new_start = min([range_start] + [start for start, _ in extents])
+                new_end = max([range_end] + [end for _, end in extents])
+                if (new_start, new_end) == (range_start, range_end):
+                    break
+                range_start, range_end = new_start, new_end
+
+            block_filter += [BusyBlock.start_datetime <= range_end, BusyBlock.end_datetime >= range_start]
+            event_filter += [
+                CalendarEvent.start_datetime >= range_start - MAX_EVENT_DURATION,
+                CalendarEvent.start_datetime <= range_end,
+                CalendarEvent.end_datetime >= range_start
+            ]
+
+        session.execute(delete(BusyBlock).where(*block_filter))
+
+        intervals = [
+            (_as_utc(start), _as_utc(end))
+            for start, end in session.execute(
+                select(CalendarEvent.start_datetime, CalendarEvent.end_datetime).where(*event_filter)
+            ).all()
         ]
+        for start, end in merge_intervals(intervals):
+            session.add(BusyBlock(user_id=user_id, start_datetime=start, end_datetime=end))
+
+    @replica_read
+    def get_multiple_users_busy_blocks(self, session: Session, user_emails: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[Dict]]:
+        """複数ユーザーのマージ済み予定時間帯を一括取得（期間に重なるもの）"""
+        rows = session.execute(_busy_blocks_statement(user_emails, start_date, end_date)).all()
+
+        # 繰り返しのマスターは検索期間内の回だけ展開して重ねる
+        occurrences = self._expand_recurring_events(
+            session, User.email.in_(user_emails), start_date, end_date, busy_only=True
+        )
+
+        return _busy_blocks_by_email(user_emails, rows, occurrences)
+
+    def _overlap_filter(self, session: Session, start_date: datetime, end_date: datetime) -> list:
+        """期間に重なるイベントの検索条件"""
+        return _overlap_filter(session.get_bind().dialect.name, start_date, end_date)
+
+    @replica_read
+    def get_user_calendar_events(self, session: Session, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """指定期間に重なるユーザーカレンダーイベントを取得"""
+        result = session.execute(_user_events_statement(self._overlap_filter(session, start_date, end_date), user_id))
+        
+        return [dict(row) for row in result.mappings().all()]
     
+    @replica_read
     def get_user_calendar_events_for_period(self, session: Session, user_id: int, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
-        """指定期間のユーザーカレンダーイベントを取得（オブジェクト形式）"""
+        """指定期間に重なるユーザーカレンダーイベントを取得（オブジェクト形式）"""
         result = session.execute(
             select(CalendarEvent).where(
                 CalendarEvent.user_id == user_id,
-                CalendarEvent.start_datetime >= start_date,
-                CalendarEvent.start_datetime <= end_date
+                *self._overlap_filter(session, start_date, end_date)
             ).order_by(CalendarEvent.start_datetime)
         )
         
-        return result.scalars().all()
+        events = list(result.scalars().all())
+        
+        # 繰り返しのマスターは期間内の回を保存しないイベントとして追加
+        occurrences = self._expand_recurring_events(session, User.id == user_id, start_date, end_date)
+        return _with_occurrence_events(user_id, events, occurrences)
     
+    @replica_read
     def get_multiple_users_calendar_events(self, session: Session, user_emails: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[Dict]]:
-        """複数ユーザーのカレンダーイベントを一括取得"""
+        """複数ユーザーの指定期間に重なるカレンダーイベントを一括取得（必要な列のみ）"""
         result = session.execute(
-            select(User, CalendarEvent).join(
-                CalendarEvent, User.id == CalendarEvent.user_id
-            ).where(
-                User.email.in_(user_emails),
-                CalendarEvent.start_datetime >= start_date,
-                CalendarEvent.start_datetime <= end_date
-            ).order_by(CalendarEvent.start_datetime)
+            _multiple_users_events_statement(self._overlap_filter(session, start_date, end_date), user_emails)
         )
         
-        events_by_email = {email: [] for email in user_emails}
-        
-        for user, event in result.fetchall():
-            events_by_email[user.email].append({
-                'google_event_id': event.google_event_id,
-                'start_datetime': event.start_datetime,
-                'end_datetime': event.end_datetime,
-                'title': event.title,
-                'is_all_day': event.is_all_day
-            })
-        
-        return events_by_email
+        return _events_by_email(user_emails, result.mappings().all())
     
     def check_calendar_sync_needed(self, session: Session, user_id: int, hours_threshold: int = 24) -> bool:
         """カレンダー同期が必要かチェック（最終同期から指定時間経過で必要）"""
@@ -111,5 +556,75 @@ class CalendarRepository:
         time_diff = datetime.now() - user.calendar_last_synced
         return time_diff > timedelta(hours=hours_threshold)
 
+class AsyncCalendarRepository:
+    """
+    CalendarRepository の検索系メソッドの非同期版（async def のエンドポイント用）
+
+    同期・削除はバックグラウンドのスレッドで行うため、同期版のリポジトリのみが持つ。
+    """
+
+    async def _expand_recurring_events(
+        self,
+        session: AsyncSession,
+        user_filter,
+        start_date: datetime,
+        end_date: datetime,
+        busy_only: bool = False
+    ) -> List[Tuple[str, RecurringEvent, datetime, datetime]]:
+        """繰り返しのマスターを期間内の回だけ展開"""
+        result = await session.execute(_recurring_events_statement(user_filter, end_date, busy_only))
+        return _expand_recurring_rows(result.all(), start_date, end_date)
+
+    @replica_read
+    async def get_multiple_users_busy_blocks(self, session: AsyncSession, user_emails: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[Dict]]:
+        """複数ユーザーのマージ済み予定時間帯を一括取得（期間に重なるもの）"""
+        result = await session.execute(_busy_blocks_statement(user_emails, start_date, end_date))
+        occurrences = await self._expand_recurring_events(
+            session, User.email.in_(user_emails), start_date, end_date, busy_only=True
+        )
+        return _busy_blocks_by_email(user_emails, result.all(), occurrences)
+
+    def _overlap_filter(self, session: AsyncSession, start_date: datetime, end_date: datetime) -> list:
+        """期間に重なるイベントの検索条件"""
+        return _overlap_filter(session.get_bind().dialect.name, start_date, end_date)
+
+    @replica_read
+    async def get_user_calendar_events(self, session: AsyncSession, user_id: int, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """指定期間に重なるユーザーカレンダーイベントを取得"""
+        result = await session.execute(_user_events_statement(self._overlap_filter(session, start_date, end_date), user_id))
+        return [dict(row) for row in result.mappings().all()]
+
+    @replica_read
+    async def get_user_calendar_events_for_period(self, session: AsyncSession, user_id: int, start_date: datetime, end_date: datetime) -> List[CalendarEvent]:
+        """指定期間に重なるユーザーカレンダーイベントを取得（オブジェクト形式）"""
+        result = await session.execute(
+            select(CalendarEvent).where(
+                CalendarEvent.user_id == user_id,
+                *self._overlap_filter(session, start_date, end_date)
+            ).order_by(CalendarEvent.start_datetime)
+        )
+        events = list(result.scalars().all())
+        occurrences = await self._expand_recurring_events(session, User.id == user_id, start_date, end_date)
+        return _with_occurrence_events(user_id, events, occurrences)
+
+    @replica_read
+    async def get_multiple_users_calendar_events(self, session: AsyncSession, user_emails: List[str], start_date: datetime, end_date: datetime) -> Dict[str, List[Dict]]:
+        """複数ユーザーの指定期間に重なるカレンダーイベントを一括取得（必要な列のみ）"""
+        result = await session.execute(
+            _multiple_users_events_statement(self._overlap_filter(session, start_date, end_date), user_emails)
+        )
+        return _events_by_email(user_emails, result.mappings().all())
+
+    async def check_calendar_sync_needed(self, session: AsyncSession, user_id: int, hours_threshold: int = 24) -> bool:
+        """カレンダー同期が必要かチェック（最終同期から指定時間経過で必要）"""
+        result = await session.execute(select(User.calendar_last_synced).where(User.id == user_id))
+        last_synced = result.scalar_one_or_none()
+        
+        if not last_synced:
+            return True  # 未同期の場合は同期が必要
+        
+        return datetime.now() - last_synced > timedelta(hours=hours_threshold)
+
 # グローバルインスタンス
-calendar_repository = CalendarRepository() 
\ No newline at end of file
+calendar_repository = CalendarRepository()
+async_calendar_repository = AsyncCalendarRepository() 
\ No newline at end of file
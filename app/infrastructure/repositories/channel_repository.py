@@ -0,0 +1,67 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from datetime import datetime
+from typing import List, Optional
+
+from app.infrastructure.models import CalendarChannel
+
+class ChannelRepository:
+    def get_by_channel_id(self, session: Session, channel_id: str) -> Optional[CalendarChannel]:
+        """チャンネルIDで通知チャンネルを取得"""
+        result = session.execute(select(CalendarChannel).where(CalendarChannel.channel_id == channel_id))
+        return result.scalar_one_or_none()
+
+    def get_by_user_id(self, session: Session, user_id: int) -> Optional[CalendarChannel]:
+        """ユーザーの通知チャンネルを取得"""
+        result = session.execute(select(CalendarChannel).where(CalendarChannel.user_id == user_id))
+        return result.scalar_one_or_none()
+
+    def save_channel(
+        self,
+        session: Session,
+        user_id: int,
+        channel_id: str,
+        resource_id: str,
+        token: str,
+        expiration: datetime,
+        synced_at: Optional[datetime]
+    ) -> CalendarChannel:
+        """ユーザーの通知チャンネルを保存（既存のチャンネルは置き換える）"""
+        session.execute(delete(CalendarChannel).where(CalendarChannel.user_id == user_id))
+
+        channel = CalendarChannel(
+            user_id=user_id,
+            channel_id=channel_id,
+            resource_id=resource_id,
+            token=token,
+            expiration=expiration,
+            synced_at=synced_at
+        )
+        session.add(channel)
+        session.commit()
+        session.refresh(channel)
+
+        print(f"✅ ユーザー {user_id} の通知チャンネルを保存しました (期限: {expiration})")
+        return channel
+
+    def update_synced_at(self, session: Session, user_id: int, synced_at: datetime) -> bool:
+        """差分同期の起点を更新"""
+        channel = self.get_by_user_id(session, user_id)
+        if not channel:
+            return False
+
+        channel.synced_at = synced_at
+        session.commit()
+        return True
+
+    def get_expiring_channels(self, session: Session, before: datetime) -> List[CalendarChannel]:
+        """指定時刻までに期限切れとなるチャンネルを取得"""
+        result = session.execute(
+            select(CalendarChannel).where(
+                CalendarChannel.expiration <= before
+            ).order_by(CalendarChannel.expiration)
+        )
+        return result.scalars().all()
+
+# グローバルインスタンス
+channel_repository = ChannelRepository()
@@ -1,9 +1,50 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional, List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import aliased
+from typing import Optional, List, Dict, Tuple
 
+from app.infrastructure.database import replica_read
 from app.infrastructure.models import Group, GroupMember, User, generate_invite_code
 
+# 以下は同期版・非同期版のリポジトリで共有する検索文（一覧は必要な列のみ取得し、ORMオブジェクトを作らない）
+
+def _user_groups_statement(user_id: int):
+    """ユーザーが所属する有効なグループ一覧（メンバー数も同じ文で集計）"""
+    members = aliased(GroupMember)
+    member_count = select(func.count(members.id)).where(
+        members.group_id == Group.id
+    ).correlate(Group).scalar_subquery()
+
+    return select(
+        Group.id,
+        Group.name,
+        Group.description,
+        GroupMember.role,
+        GroupMember.joined_at,
+        Group.invite_code,
+        member_count.label('member_count')
+    ).join(
+        Group, GroupMember.group_id == Group.id
+    ).where(GroupMember.user_id == user_id, Group.is_active == True)
+
+def _group_members_statement(group_id: int):
+    """グループメンバー一覧"""
+    return select(
+        User.name,
+        User.email,
+        GroupMember.role,
+        GroupMember.joined_at
+    ).join(
+        User, GroupMember.user_id == User.id
+    ).where(GroupMember.group_id == group_id)
+
+def _group_with_membership_statement(group_id: int, user_id: int):
+    """グループとユーザーのメンバーシップ（メンバーでなければNone）"""
+    return select(Group, GroupMember).outerjoin(
+        GroupMember, and_(GroupMember.group_id == Group.id, GroupMember.user_id == user_id)
+    ).where(Group.id == group_id)
+
 class GroupRepository:
     def create_group(self, session: Session, name: str, description: str, created_by: int) -> Group:
         """グループを作成し、作成者を管理者として追加"""
@@ -44,46 +85,24 @@ class GroupRepository:
         ))
         return result.scalar_one_or_none()
     
+    def get_group_with_membership(self, session: Session, group_id: int, user_id: int) -> Optional[Tuple[Group, Optional[GroupMember]]]:
+        """グループとユーザーのメンバーシップを1回のクエリで取得（グループがなければNone）"""
+        row = session.execute(_group_with_membership_statement(group_id, user_id)).first()
+        return tuple(row) if row else None
+    
+    @replica_read
     def get_user_groups(self, session: Session, user_id: int) -> List[Dict]:
-        """ユーザーが所属するグループ一覧を取得"""
-        # ユーザーのメンバーシップを取得
-        result = session.execute(
-            select(GroupMember, Group)
-            .join(Group, GroupMember.group_id == Group.id)
-            .where(GroupMember.user_id == user_id, Group.is_active == True)
-        )
-        
-        groups = []
-        for membership, group in result.fetchall():
-            groups.append({
-                'id': group.id,
-                'name': group.name,
-                'description': group.description,
-                'role': membership.role,
-                'joined_at': membership.joined_at,
-                'invite_code': group.invite_code
-            })
+        """ユーザーが所属するグループ一覧を取得（必要な列のみ）"""
+        result = session.execute(_user_groups_statement(user_id))
         
-        return groups
+        return [dict(row) for row in result.mappings().all()]
     
+    @replica_read
     def get_group_members(self, session: Session, group_id: int) -> List[Dict]:
-        """グループメンバー一覧を取得"""
-        result = session.execute(
-            select(GroupMember, User)
-            .join(User, GroupMember.user_id == User.id)
-            .where(GroupMember.group_id == group_id)
-        )
-        
-        members = []
-        for membership, user in result.fetchall():
-            members.append({
-                'name': user.name,
-                'email': user.email,
-                'role': membership.role,
-                'joined_at': membership.joined_at
-            })
+        """グループメンバー一覧を取得（必要な列のみ）"""
+        result = session.execute(_group_members_statement(group_id))
         
-        return members
+        return [dict(row) for row in result.mappings().all()]
     
     def get_user_membership(self, session: Session, group_id: int, user_id: int) -> Optional[GroupMember]:
         """ユーザーのグループメンバーシップを取得"""
@@ -111,5 +130,51 @@ class GroupRepository:
         
         return True
 
+class AsyncGroupRepository:
+    """GroupRepository の非同期版（async def のエンドポイント用）"""
+
+    async def get_group_by_id(self, session: AsyncSession, group_id: int) -> Optional[Group]:
+        """IDでグループを取得"""
+        result = await session.execute(select(Group).where(Group.id == group_id))
+        return result.scalar_one_or_none()
+    
+    async def get_group_by_invite_code(self, session: AsyncSession, invite_code: str) -> Optional[Group]:
+        """招待コードでグループを取得"""
+        result = await session.execute(select(Group).where(
+            Group.invite_code == invite_code,
+            Group.is_active == True
+        ))
+        return result.scalar_one_or_none()
+    
+    async def get_group_with_membership(self, session: AsyncSession, group_id: int, user_id: int) -> Optional[Tuple[Group, Optional[GroupMember]]]:
+        """グループとユーザーのメンバーシップを1回のクエリで取得（グループがなければNone）"""
+        row = (await session.execute(_group_with_membership_statement(group_id, user_id))).first()
+        return tuple(row) if row else None
+    
+    @replica_read
+    async def get_user_groups(self, session: AsyncSession, user_id: int) -> List[Dict]:
+        """ユーザーが所属するグループ一覧を取得（必要な列のみ）"""
+        result = await session.execute(_user_groups_statement(user_id))
+        
+        return [dict(row) for row in result.mappings().all()]
+    
+    @replica_read
+    async def get_group_members(self, session: AsyncSession, group_id: int) -> List[Dict]:
+        """グループメンバー一覧を取得（必要な列のみ）"""
+        result = await session.execute(_group_members_statement(group_id))
+        
+        return [dict(row) for row in result.mappings().all()]
+    
+    async def get_user_membership(self, session: AsyncSession, group_id: int, user_id: int) -> Optional[GroupMember]:
+        """ユーザーのグループメンバーシップを取得"""
+        result = await session.execute(
+            select(GroupMember).where(
+                GroupMember.group_id == group_id,
+                GroupMember.user_id == user_id
+            )
+        )
+        return result.scalar_one_or_none()
+
 # グローバルインスタンス
-group_repository = GroupRepository() 
\ No newline at end of file
+group_repository = GroupRepository()
+async_group_repository = AsyncGroupRepository() 
\ No newline at end of file
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select
+from datetime import datetime
+from typing import List, Optional
 
 from app.infrastructure.models import User
 
@@ -40,6 +42,15 @@ class UserRepository:
         result = session.execute(select(User).where(User.google_user_id == google_user_id))
         return result.scalar_one_or_none()
     
+    def get_user_ids_synced_before(self, session: Session, before: datetime) -> List[int]:
+        """カレンダーの最終同期が指定時刻より前（未同期を含む）のユーザーID（古い順）"""
+        result = session.execute(
+            select(User.id).where(
+                or_(User.calendar_last_synced.is_(None), User.calendar_last_synced < before)
+            ).order_by(User.calendar_last_synced.asc().nullsfirst())
+        )
+        return list(result.scalars().all())
+    
     def update_user_calendar_sync(self, session: Session, user_id: int) -> bool:
         """ユーザーのカレンダー同期時刻を更新"""
         from datetime import datetime
@@ -56,5 +67,24 @@ class UserRepository:
             session.rollback()
             return False
 
+class AsyncUserRepository:
+    """UserRepository の非同期版（async def のエンドポイント用）"""
+
+    async def get_user_by_id(self, session: AsyncSession, user_id: int) -> Optional[User]:
+        """IDでユーザーを取得"""
+        result = await session.execute(select(User).where(User.id == user_id))
+        return result.scalar_one_or_none()
+    
+    async def get_user_by_email(self, session: AsyncSession, email: str) -> Optional[User]:
+        """メールアドレスでユーザーを取得"""
+        result = await session.execute(select(User).where(User.email == email))
+        return result.scalar_one_or_none()
+    
+    async def get_user_by_google_id(self, session: AsyncSession, google_user_id: str) -> Optional[User]:
+        """Google User IDでユーザーを取得"""
+        result = await session.execute(select(User).where(User.google_user_id == google_user_id))
+        return result.scalar_one_or_none()
+
 # グローバルインスタンス
-user_repository = UserRepository() 
\ No newline at end of file
+user_repository = UserRepository()
+async_user_repository = AsyncUserRepository() 
\ No newline at end of file
@@ -4,7 +4,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from .core.config import settings
-from .api import auth, groups, meetings
+from .core.google_api import google_service_factory
+from .infrastructure.database import async_engine, async_replica_engine, pool_metrics
+from .infrastructure.executors import google_io_executor, slot_search_executor
+from .service.calendar_sync_service import calendar_sync_scheduler
+from .api import auth, groups, meetings, notifications
 
 
 @asynccontextmanager
@@ -12,10 +16,21 @@ async def lifespan(app: FastAPI):
     # 起動時
     print("🚀 Clean Architecture FastAPI アプリケーション起動中...")
     print(f"📊 登録されたルート数: {len(app.routes)}")
+    # プッシュ通知による差分同期と定期処理（チャンネル更新・古いイベントの削除）
+    calendar_sync_scheduler.start()
     print("✅ アプリケーション起動完了")
     yield
     # 終了時
     print("🛑 アプリケーション終了中...")
+    calendar_sync_scheduler.shutdown()
+    google_service_factory.shutdown()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+    print(f"📊 DB接続プール: {pool_metrics.snapshot()}")
+    for executor in (google_io_executor, slot_search_executor):
+        print(f"📊 実行プール: {executor.snapshot()}")
+        executor.shutdown()
     print("✅ 正常終了")
 
 
@@ -55,6 +70,7 @@ app.add_middleware(
 app.include_router(auth.router, tags=["認証"])
 app.include_router(groups.router, tags=["グループ"])
 app.include_router(meetings.router, tags=["ミーティング"])
+app.include_router(notifications.router, tags=["カレンダー通知"])
 
 if __name__ == "__main__":
     import uvicorn
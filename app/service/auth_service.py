@@ -1,24 +1,47 @@
+import itertools
 import os
-from typing import Dict, Optional
+from dataclasses import replace
+from typing import Dict, Optional, Tuple
 from fastapi import Request, HTTPException
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 import pytz
-from datetime import datetime, timedelta
 
 # 開発環境でHTTP localhost を許可（本番環境では削除推奨）
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
 from app.core.config import settings
 from app.core.entities import User
+from app.core.google_api import google_service_factory
+from app.infrastructure.cache import TTLCache
+from app.infrastructure.executors import google_io_executor
+from app.infrastructure.models import User as UserModel
 from app.infrastructure.repositories.user_repository import user_repository
-from app.infrastructure.repositories.calendar_repository import calendar_repository
+from app.service.calendar_sync_service import calendar_sync_service
+from app.service.credential_service import credential_manager
+
+# セッションで更新・削除したユーザーID（session.info のキー、ALL_USERS は一括更新）
+CHANGED_USER_IDS_KEY = 'changed_user_ids'
+ALL_USERS = object()
+
+def _to_user(db_user: UserModel) -> User:
+    """SQLAlchemyオブジェクトをエンティティに変換"""
+    return User(
+        id=db_user.id,
+        google_user_id=db_user.google_user_id,
+        email=db_user.email,
+        name=db_user.name,
+        created_at=db_user.created_at,
+        calendar_last_synced=db_user.calendar_last_synced
+    )
 
 class AuthService:
     def __init__(self):
         self.timezone = pytz.timezone('Asia/Tokyo')
+        # 認証済みリクエストごとにusersテーブルを引かないよう、ユーザー情報をユーザーIDごとにキャッシュ
+        self._user_cache = TTLCache(ttl_seconds=settings.USER_CACHE_TTL, maxsize=settings.USER_CACHE_MAXSIZE)
     
     def create_oauth_flow(self, state: Optional[str] = None) -> Flow:
         """OAuth認証フローを作成"""
@@ -44,8 +67,13 @@ class AuthService:
         
         return authorization_url, state
     
-    def handle_oauth_callback(self, request: Request, db: Session) -> Dict:
-        """OAuth認証コールバックを処理"""
+    async def handle_oauth_callback(self, request: Request, db: Session) -> Dict:
+        """
+        OAuth認証コールバックを処理
+
+        Google APIの呼び出し（トークン交換・ユーザー情報・初回同期）はI/O用のプールで実行し、
+        リクエストのセッション（Request・DBセッション）はプールに渡さない。
+        """
         # デバッグ情報を追加
         print(f"🔍 OAuth コールバック処理開始")
         print(f"🔍 セッション keys: {list(request.session.keys())}")
@@ -60,14 +88,7 @@ class AuthService:
             db_user = user_repository.get_user_by_id(db, user_id)
             
             if db_user:
-                user = User(
-                    id=db_user.id,
-                    google_user_id=db_user.google_user_id,
-                    email=db_user.email,
-                    name=db_user.name,
-                    created_at=db_user.created_at,
-                    calendar_last_synced=db_user.calendar_last_synced
-                )
+                user = _to_user(db_user)
                 
                 return {
                     'user': user,
@@ -91,51 +112,8 @@ class AuthService:
             raise HTTPException(status_code=400, detail="Invalid state - セッションの状態が無効です。再度ログインしてください。")
         
         try:
-            flow = self.create_oauth_flow(state)
-            
-            # 認証コードからトークンを取得
-            authorization_response = str(request.url)
-            print(f"🔍 Authorization response: {authorization_response}")
-            
-            # スコープ変更警告を無視してトークンを取得
-            import warnings
-            from urllib.parse import parse_qs, urlparse
-            
-            credentials = None
-            
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                try:
-                    flow.fetch_token(authorization_response=authorization_response)
-                    credentials = flow.credentials
-                    print("✅ 通常のOAuth flowでトークン取得成功")
-                except Exception as e:
-                    print(f"⚠️ OAuth flow エラー: {e}")
-                    
-                    # 代替方法：認証コードから直接トークンを取得
-                    try:
-                        print("🔄 代替方法でトークン取得を試行")
-                        parsed_url = urlparse(authorization_response)
-                        query_params = parse_qs(parsed_url.query)
-                        auth_code = query_params.get('code', [None])[0]
-                        
-                        if auth_code:
-                            # 新しいflowを作成して直接トークン交換
-                            new_flow = self.create_oauth_flow()
-                            new_flow.fetch_token(code=auth_code)
-                            credentials = new_flow.credentials
-                            print("✅ 代替方法でトークン取得成功")
-                        else:
-                            raise Exception("認証コードが見つかりません")
-                    except Exception as alt_error:
-                        print(f"❌ 代替方法も失敗: {alt_error}")
-                        raise Exception(f"OAuth認証に失敗しました: {e}")
-            
-            if not credentials:
-                raise Exception("認証情報の取得に失敗しました")
-            
-            # ユーザー情報を取得
-            user_info = self._get_user_info_from_google(credentials)
+            # 認証コードからトークンとユーザー情報を取得
+            credentials, user_info = await google_io_executor.run(self._exchange_code, state, str(request.url))
             
             # データベースにユーザーを保存
             user = user_repository.get_or_create_user(
@@ -145,8 +123,16 @@ class AuthService:
                 user_info['name']
             )
             
-            # カレンダーデータを同期
-            sync_success = self._sync_user_calendar(db, user.id, credentials)
+            # 取得したCredentialsをユーザーごとのキャッシュに登録
+            credential_manager.store(user.id, credentials)
+            
+            # 通知チャンネルの登録とカレンダーデータの同期（ワーカーは自前のセッションを使う）
+            try:
+                sync_success = await google_io_executor.run(calendar_sync_service.sync_user_on_login, user.id, credentials)
+            except HTTPException as e:
+                # 同期が混み合っている・時間がかかっている場合もログインは継続（タイムアウト時はワーカーが同期を続ける）
+                print(f"⚠️ ユーザー {user.id} の初回同期を待てませんでした: {e.detail}")
+                sync_success = False
             
             return {
                 'user': user,
@@ -154,16 +140,64 @@ class AuthService:
                 'sync_success': sync_success
             }
             
+        except HTTPException:
+            # I/O用のプールが満杯（503）・タイムアウト（504）
+            raise
         except Exception as e:
             print(f"❌ OAuth認証エラー: {e}")
             print(f"🔍 エラータイプ: {type(e)}")
             raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
     
+    def _exchange_code(self, state: str, authorization_response: str) -> Tuple[Credentials, Dict]:
+        """認証コードをトークンに交換し、ユーザー情報を取得（Google APIのみ、DBには触れない）"""
+        flow = self.create_oauth_flow(state)
+        print(f"🔍 Authorization response: {authorization_response}")
+        
+        # スコープ変更警告を無視してトークンを取得
+        import warnings
+        from urllib.parse import parse_qs, urlparse
+        
+        credentials = None
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                flow.fetch_token(authorization_response=authorization_response)
+                credentials = flow.credentials
+                print("✅ 通常のOAuth flowでトークン取得成功")
+            except Exception as e:
+                print(f"⚠️ OAuth flow エラー: {e}")
+                
+                # 代替方法：認証コードから直接トークンを取得
+                try:
+                    print("🔄 代替方法でトークン取得を試行")
+                    parsed_url = urlparse(authorization_response)
+                    query_params = parse_qs(parsed_url.query)
+                    auth_code = query_params.get('code', [None])[0]
+                    
+                    if auth_code:
+                        # 新しいflowを作成して直接トークン交換
+                        new_flow = self.create_oauth_flow()
+                        new_flow.fetch_token(code=auth_code)
+                        credentials = new_flow.credentials
+                        print("✅ 代替方法でトークン取得成功")
+                    else:
+                        raise Exception("認証コードが見つかりません")
+                except Exception as alt_error:
+                    print(f"❌ 代替方法も失敗: {alt_error}")
+                    raise Exception(f"OAuth認証に失敗しました: {e}")
+        
+        if not credentials:
+            raise Exception("認証情報の取得に失敗しました")
+        
+        # ユーザー情報を取得
+        return credentials, self._get_user_info_from_google(credentials)
+    
     def _get_user_info_from_google(self, credentials: Credentials) -> Dict:
         """Google APIからユーザー情報を取得"""
         try:
-            oauth2_service = build('oauth2', 'v2', credentials=credentials)
-            user_info = oauth2_service.userinfo().get().execute()
+            oauth2_service = google_service_factory.oauth2(credentials)
+            user_info = oauth2_service.userinfo().get(fields=settings.GOOGLE_USERINFO_FIELDS).execute()
             
             return {
                 'google_user_id': user_info.get('id', ''),
@@ -174,111 +208,16 @@ class AuthService:
             print(f"❌ ユーザー情報取得エラー: {e}")
             raise
     
-    def _sync_user_calendar(self, db: Session, user_id: int, credentials: Credentials) -> bool:
-        """ユーザーのカレンダーデータを同期"""
-        try:
-            print(f"🔄 ユーザー {user_id} のカレンダー同期を開始...")
-            
-            service = build('calendar', 'v3', credentials=credentials)
-            
-            # 3ヶ月の期間を設定
-            start_date = datetime.utcnow()
-            end_date = start_date + timedelta(days=90)
-            
-            start_time_str = start_date.isoformat() + 'Z'
-            end_time_str = end_date.isoformat() + 'Z'
-            
-            # カレンダーイベントを取得
-            all_events = []
-            page_token = None
-            
-            while True:
-                events_result = service.events().list(
-                    calendarId='primary',
-                    timeMin=start_time_str,
-                    timeMax=end_time_str,
-                    maxResults=250,
-                    singleEvents=True,
-                    orderBy='startTime',
-                    showDeleted=False,  # 削除されたイベントを除外
-                    pageToken=page_token
-                ).execute()
-                
-                events = events_result.get('items', [])
-                all_events.extend(events)
-                
-                page_token = events_result.get('nextPageToken')
-                if not page_token:
-                    break
-            
-            print(f"📊 取得したイベント数: {len(all_events)}件")
-            
-            # データベース用にイベントデータを変換
-            events_data = []
-            for event in all_events:
-                event_data = self._convert_google_event_to_db_format(event)
-                if event_data:
-                    events_data.append(event_data)
-            
-            # データベースに同期
-            synced_count = calendar_repository.sync_user_calendar_events(db, user_id, events_data)
-            print(f"✅ カレンダー同期完了: {synced_count}件のイベントを保存")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ カレンダー同期エラー (ユーザー {user_id}): {e}")
-            return False
-    
-    def _convert_google_event_to_db_format(self, event: Dict) -> Optional[Dict]:
-        """GoogleカレンダーイベントをDB保存形式に変換（UTC統一）"""
-        try:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            
-            # 終日イベントの処理
-            is_all_day = 'date' in event['start']
-            
-            if is_all_day:
-                # 終日イベントはJSTの日付として解釈し、UTCに変換
-                start_dt = datetime.fromisoformat(start)
-                end_dt = datetime.fromisoformat(end)
-                start_dt = self.timezone.localize(start_dt).astimezone(pytz.UTC)
-                end_dt = self.timezone.localize(end_dt).astimezone(pytz.UTC)
-            else:
-                if start.endswith('Z'):
-                    # UTC時刻として解釈
-                    start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                    end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                else:
-                    # タイムゾーン情報付きの時刻として解釈
-                    start_dt = datetime.fromisoformat(start)
-                    end_dt = datetime.fromisoformat(end)
-                
-                # UTC統一で保存
-                start_dt = start_dt.astimezone(pytz.UTC)
-                end_dt = end_dt.astimezone(pytz.UTC)
-            
-            return {
-                'google_event_id': event['id'],
-                'start_datetime': start_dt,
-                'end_datetime': end_dt,
-                'title': event.get('summary', '無題'),
-                'is_all_day': is_all_day
-            }
-        except Exception as e:
-            print(f"⚠️ イベント変換エラー: {e}")
-            return None
-    
     def _credentials_to_dict(self, credentials: Credentials) -> Dict:
         """Credentialsオブジェクトを辞書に変換（設定から不足フィールドを補完）"""
         return {
             'token': credentials.token,
             'refresh_token': credentials.refresh_token,
-            'token_uri': credentials.token_uri or 'https://oauth2.googleapis.com/token',
+            'token_uri': credentials.token_uri or settings.GOOGLE_OAUTH_TOKEN_URI,
             'client_id': credentials.client_id or settings.GOOGLE_CLIENT_ID,
             'client_secret': credentials.client_secret or settings.GOOGLE_CLIENT_SECRET,
-            'scopes': credentials.scopes or settings.GOOGLE_SCOPES
+            'scopes': credentials.scopes or settings.GOOGLE_SCOPES,
+            'expiry': credentials.expiry.isoformat() if credentials.expiry else None
         }
     
     def get_current_user(self, request: Request, db: Session) -> User:
@@ -287,20 +226,27 @@ class AuthService:
             raise HTTPException(status_code=401, detail="認証が必要です")
         
         user_id = request.session['user_id']
-        db_user = user_repository.get_user_by_id(db, user_id)
+        user = self._user_cache.get(user_id)
         
-        if not db_user:
-            raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
+        if user is None:
+            db_user = user_repository.get_user_by_id(db, user_id)
+            
+            if not db_user:
+                raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
+            
+            user = _to_user(db_user)
+            self._user_cache.set(user_id, user)
         
-        # SQLAlchemyオブジェクトをエンティティに変換
-        return User(
-            id=db_user.id,
-            google_user_id=db_user.google_user_id,
-            email=db_user.email,
-            name=db_user.name,
-            created_at=db_user.created_at,
-            calendar_last_synced=db_user.calendar_last_synced
-        )
+        # 呼び出し側で変更されてもキャッシュに影響しないようコピーを返す
+        return replace(user)
+    
+    def invalidate_user(self, user_id: int):
+        """キャッシュしたユーザー情報を破棄（同期時刻やプロフィールの更新時）"""
+        self._user_cache.pop(user_id)
+    
+    def invalidate_all_users(self):
+        """キャッシュしたユーザー情報をすべて破棄（usersの一括更新時）"""
+        self._user_cache.clear()
     
     def update_session(self, request: Request, user: User, credentials: Dict):
         """セッションを更新"""
@@ -311,7 +257,47 @@ class AuthService:
     
     def clear_session(self, request: Request):
         """セッションをクリア"""
+        user_id = request.session.get('user_id')
+        if user_id is not None:
+            credential_manager.invalidate(user_id)
+            self.invalidate_user(user_id)
         request.session.clear()
 
 # グローバルインスタンス
 auth_service = AuthService()
+
+@event.listens_for(Session, "after_flush")
+def _track_changed_users(session: Session, flush_context):
+    """更新・削除したusersの行のユーザーIDを記録（キャッシュの破棄はトランザクションの終了時）"""
+    user_ids = [
+        instance.id
+        for instance in itertools.chain(session.dirty, session.deleted)
+        if isinstance(instance, UserModel) and instance.id is not None
+    ]
+    if user_ids:
+        session.info.setdefault(CHANGED_USER_IDS_KEY, set()).update(user_ids)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_user_changes(orm_execute_state):
+    """update(User) / delete(User) の一括実行は対象の行が分からないため、全ユーザーを破棄対象にする"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is UserModel.__mapper__:
+        orm_execute_state.session.info.setdefault(CHANGED_USER_IDS_KEY, set()).add(ALL_USERS)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_changed_users(session: Session):
+    """
+    コミット・ロールバックしたら、更新・削除したユーザー（同期時刻の更新を含む）のキャッシュを破棄
+
+    フラッシュの時点で破棄すると、コミットまでの間に他のリクエストが古い行を読んで
+    キャッシュし直してしまう。ロールバックでも、同じトランザクション内で読んだ
+    未コミットの値がキャッシュされている可能性があるため破棄する。
+    """
+    user_ids = session.info.pop(CHANGED_USER_IDS_KEY, None)
+    if not user_ids:
+        return
+    if ALL_USERS in user_ids:
+        auth_service.invalidate_all_users()
+        return
+    for user_id in user_ids:
+        auth_service.invalidate_user(user_id)
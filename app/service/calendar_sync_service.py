@@ -0,0 +1,520 @@
+import hmac
+import math
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.event_parsing import parse_google_events, events_to_db_format
+from app.core.recurrence import parse_recurring_masters, series_to_db_format, split_recurring_events
+from app.core.google_api import google_calendar_api, google_service_factory, to_rfc3339
+from app.infrastructure.database import SessionLocal
+from app.infrastructure.models import CalendarChannel
+from app.infrastructure.repositories.calendar_repository import calendar_repository
+from app.infrastructure.repositories.channel_repository import channel_repository
+from app.infrastructure.repositories.user_repository import user_repository
+from app.service.credential_service import credential_manager
+
+
+class CalendarSyncService:
+    """GoogleカレンダーとDBの同期（フル同期・プッシュ通知による差分同期）"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        # 定期の差分同期を予約する関数（ユーザーID, 遅延秒数）。未設定ならその場で同期する
+        self.schedule_sync: Optional[Callable[[int, float], bool]] = None
+
+    def _sync_window(self) -> tuple[datetime, datetime]:
+        """同期対象の期間（UTC、過去N日〜未来M日のスライディングウィンドウ）"""
+        now = datetime.utcnow()
+        return (
+            now - timedelta(days=settings.CALENDAR_SYNC_PAST_DAYS),
+            now + timedelta(days=settings.CALENDAR_SYNC_FUTURE_DAYS)
+        )
+
+    def _fetched_until(self, synced_at: datetime) -> datetime:
+        """その時刻に同期した時点で、更新のないイベントも取得済みの未来側の終わり（UTCの日の始まりに切り捨て）"""
+        edge = synced_at + timedelta(days=settings.CALENDAR_SYNC_FUTURE_DAYS)
+        return edge.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _recurrence_as_rules(self) -> bool:
+        """繰り返しイベントをルールのまま保存するモードか"""
+        return settings.CALENDAR_RECURRENCE_MODE == 'rules'
+
+    def _list_params(self, incremental: bool = False) -> Dict:
+        """events.list の取得パラメータ（ルール保存モードでは繰り返しを展開せずに取得）"""
+        if self._recurrence_as_rules():
+            # singleEvents=False では startTime 順の並び替えは指定できない
+            return {'fields': settings.GOOGLE_EVENTS_RULES_FIELDS, 'singleEvents': False, 'orderBy': None}
+        if incremental:
+            return {'fields': settings.GOOGLE_EVENTS_SYNC_FIELDS}
+        return {}
+
+    def _to_db_format(self, events: List[Dict]) -> Tuple[List[Dict], Optional[List[Dict]], Dict[str, List[int]]]:
+        """
+        取得したイベントをDB保存形式に変換
+
+        Returns:
+            (通常のイベント, 繰り返しのマスター, マスターIDごとの除外する回)
+            展開モードでは繰り返しのマスターは空リスト（以前のモードで保存したものを消すため）
+        """
+        if not self._recurrence_as_rules():
+            active_events = [event for event in events if event.get('status') != 'cancelled']
+            return events_to_db_format(parse_google_events(active_events)), [], {}
+
+        single_events, masters, exceptions = split_recurring_events(events)
+        active_events = [event for event in single_events if event.get('status') != 'cancelled']
+        series_data = series_to_db_format(parse_recurring_masters(masters), exceptions)
+        return events_to_db_format(parse_google_events(active_events)), series_data, exceptions
+
+    def _calendar_ids(self, credentials: Credentials) -> List[str]:
+        """同期対象のカレンダーID（取得できない場合はプライマリのみ）"""
+        if not settings.CALENDAR_SYNC_ALL_CALENDARS:
+            return ['primary']
+        try:
+            return google_calendar_api.list_calendar_ids(google_service_factory.calendar(credentials))
+        except Exception as e:
+            print(f"⚠️ カレンダーリストを取得できないためプライマリのみ同期します: {e}")
+            return ['primary']
+
+    def full_sync(self, db: Session, user_id: int, credentials: Credentials) -> bool:
+        """ユーザーのカレンダーデータを全件同期"""
+        try:
+            print(f"🔄 ユーザー {user_id} のカレンダー同期を開始...")
+
+            # 同期開始時刻を次回の差分同期の起点とする
+            started_at = datetime.utcnow()
+            start_date, end_date = self._sync_window()
+
+            # 選択されている全カレンダーのイベントを (カレンダー, 期間シャード) ごとにまとめて取得
+            events_by_calendar = google_calendar_api.list_events_multi(
+                lambda: google_service_factory.calendar(credentials),
+                self._calendar_ids(credentials),
+                start_date,
+                end_date,
+                **self._list_params()
+            )
+
+            print(f"📊 取得したイベント数: {sum(len(events) for events in events_by_calendar.values())}件 ({len(events_by_calendar)}カレンダー)")
+
+            # データベース用にイベントデータを一括変換（取得元のカレンダーを記録）
+            events_data, series_data = [], []
+            for calendar_id, calendar_events in events_by_calendar.items():
+                calendar_events_data, calendar_series_data, _ = self._to_db_format(calendar_events)
+                events_data += [{**event, 'calendar_id': calendar_id} for event in calendar_events_data]
+                series_data += [{**series, 'calendar_id': calendar_id} for series in calendar_series_data]
+
+            # データベースに同期（保存に失敗した場合は例外となり、差分同期の起点は進めない）
+            synced_count = calendar_repository.sync_user_calendar_events(db, user_id, events_data, series_data)
+            channel_repository.update_synced_at(db, user_id, started_at)
+            print(f"✅ カレンダー同期完了: {synced_count}件のイベントを保存")
+
+            return True
+
+        except Exception as e:
+            print(f"❌ カレンダー同期エラー (ユーザー {user_id}): {e}")
+            return False
+
+    def incremental_sync(self, db: Session, user_id: int, credentials: Credentials) -> bool:
+        """前回の同期以降に更新されたイベントのみを取得して反映"""
+        channel = channel_repository.get_by_user_id(db, user_id)
+        if not channel or not channel.synced_at:
+            return self.full_sync(db, user_id, credentials)
+
+        try:
+            print(f"🔄 ユーザー {user_id} の差分同期を開始 (起点: {channel.synced_at})")
+
+            started_at = datetime.utcnow()
+            start_date, end_date = self._sync_window()
+            service_builder = lambda: google_service_factory.calendar(credentials)
+            calendar_ids = self._calendar_ids(credentials)
+
+            try:
+                changes_by_calendar = google_calendar_api.list_events_multi(
+                    service_builder,
+                    calendar_ids,
+                    start_date,
+                    end_date,
+                    shards=1,
+                    **self._list_params(incremental=True),
+                    updatedMin=to_rfc3339(channel.synced_at),
+                    showDeleted=True  # 削除されたイベントも取得してDBから取り除く
+                )
+            except HttpError as e:
+                # updatedMinが古すぎる場合はフル同期が必要
+                if e.resp.status == 410:
+                    print(f"⚠️ 差分同期の起点が無効になったためフル同期を実行します")
+                    return self.full_sync(db, user_id, credentials)
+                raise
+
+            # 前回の同期以降に同期期間に入った未来側の範囲（日単位）は、更新されていないイベントも取得する
+            previous_edge, current_edge = self._fetched_until(channel.synced_at), self._fetched_until(started_at)
+            if previous_edge < current_edge:
+                exposed_by_calendar = google_calendar_api.list_events_multi(
+                    service_builder,
+                    calendar_ids,
+                    previous_edge,
+                    current_edge,
+                    shards=1,
+                    **self._list_params(incremental=True)
+                )
+                for calendar_id, exposed_events in exposed_by_calendar.items():
+                    # 両方に含まれるイベントは差分（削除を含む）を優先
+                    changes_by_calendar[calendar_id] = google_calendar_api.merge_events([
+                        changes_by_calendar.get(calendar_id, []), exposed_events
+                    ])
+
+            # 変更のあったカレンダーごとに反映
+            applied = False
+            for calendar_id, changed_events in changes_by_calendar.items():
+                if not changed_events:
+                    continue
+                applied = True
+                deleted_event_ids = [event['id'] for event in changed_events if event.get('status') == 'cancelled']
+                events_data, series_data, series_exdates = self._to_db_format(changed_events)
+
+                calendar_repository.apply_calendar_event_changes(
+                    db, user_id, events_data, deleted_event_ids, series_data, series_exdates, calendar_id=calendar_id
+                )
+            if not applied:
+                # 変更がなくても最終同期時刻を進める（定期の差分同期の対象から外す）
+                user_repository.update_user_calendar_sync(db, user_id)
+            channel_repository.update_synced_at(db, user_id, started_at)
+
+            return True
+
+        except Exception as e:
+            print(f"❌ 差分同期エラー (ユーザー {user_id}): {e}")
+            return False
+
+    def sync_user(self, user_id: int) -> bool:
+        """スケジューラから呼び出される差分同期（キャッシュ済みの認証情報を使用）"""
+        credentials = credential_manager.get_cached_credentials(user_id)
+        if credentials is None:
+            print(f"⚠️ ユーザー {user_id} の認証情報がないため差分同期をスキップします（次回ログイン時にフル同期）")
+            return False
+
+        db = self.session_factory()
+        try:
+            return self.incremental_sync(db, user_id, credentials)
+        finally:
+            db.close()
+
+    def sync_user_on_login(self, user_id: int, credentials: Credentials) -> bool:
+        """ログイン時の通知チャンネル登録とフル同期（自前のセッションを使うのでI/O用のプールから呼び出せる）"""
+        db = self.session_factory()
+        try:
+            # 以降の変更はプッシュ通知で受け取る（フル同期の開始時刻が差分同期の起点になる）
+            self.ensure_channel(db, user_id, credentials)
+            return self.full_sync(db, user_id, credentials)
+        finally:
+            db.close()
+
+    def ensure_channel(self, db: Session, user_id: int, credentials: Credentials, force: bool = False) -> Optional[CalendarChannel]:
+        """
+        ユーザーのプッシュ通知チャンネルを登録（期限が近い場合は更新）
+
+        通知はプライマリカレンダーのみ。他のカレンダーは定期処理の差分同期で取り込む。
+
+        Args:
+            db: データベースセッション
+            user_id: ユーザーID
+            credentials: ユーザーのGoogle認証情報
+            force: 期限に関わらず再登録する
+
+        Returns:
+            有効なチャンネル（通知の受信先が未設定の場合はNone）
+        """
+        if not settings.GOOGLE_WEBHOOK_URL:
+            return None
+
+        existing = channel_repository.get_by_user_id(db, user_id)
+        renew_before = datetime.utcnow() + timedelta(seconds=settings.CALENDAR_CHANNEL_RENEW_MARGIN)
+        if existing and not force and existing.expiration > renew_before:
+            return existing
+
+        channel_id = str(uuid.uuid4())
+        token = secrets.token_urlsafe(32)
+
+        try:
+            service = google_service_factory.calendar(credentials)
+            response = service.events().watch(
+                calendarId='primary',
+                body={
+                    'id': channel_id,
+                    'type': 'web_hook',
+                    'address': settings.GOOGLE_WEBHOOK_URL,
+                    'token': token,
+                    'params': {'ttl': str(settings.CALENDAR_CHANNEL_TTL)}
+                }
+            ).execute()
+        except Exception as e:
+            print(f"❌ 通知チャンネル登録エラー (ユーザー {user_id}): {e}")
+            return existing
+
+        if response.get('expiration'):
+            expiration = datetime.utcfromtimestamp(int(response['expiration']) / 1000)
+        else:
+            expiration = datetime.utcnow() + timedelta(seconds=settings.CALENDAR_CHANNEL_TTL)
+
+        # 差分同期の起点は既存チャンネルから引き継ぐ（新規の場合は次のフル同期で設定）
+        synced_at = existing.synced_at if existing else None
+        old_channel = (existing.channel_id, existing.resource_id) if existing else None
+
+        channel = channel_repository.save_channel(
+            db,
+            user_id,
+            channel_id,
+            response['resourceId'],
+            token,
+            expiration,
+            synced_at
+        )
+
+        if old_channel:
+            self._stop_channel(credentials, *old_channel)
+
+        return channel
+
+    def _stop_channel(self, credentials: Credentials, channel_id: str, resource_id: str):
+        """古い通知チャンネルを停止（失敗しても期限切れで自然に無効になる）"""
+        try:
+            google_service_factory.calendar(credentials).channels().stop(
+                body={'id': channel_id, 'resourceId': resource_id}
+            ).execute()
+        except Exception as e:
+            print(f"⚠️ 通知チャンネル停止エラー: {e}")
+
+    def renew_expiring_channels(self) -> int:
+        """期限が近い通知チャンネルを更新"""
+        db = self.session_factory()
+        try:
+            renew_before = datetime.utcnow() + timedelta(seconds=settings.CALENDAR_CHANNEL_RENEW_MARGIN)
+            renewed = 0
+
+            for channel in channel_repository.get_expiring_channels(db, renew_before):
+                try:
+                    credentials = credential_manager.get_cached_credentials(channel.user_id)
+                except Exception as e:
+                    print(f"⚠️ ユーザー {channel.user_id} のトークン更新に失敗したためチャンネルを更新できません: {e}")
+                    continue
+                if credentials is None:
+                    continue
+                if self.ensure_channel(db, channel.user_id, credentials, force=True) is not channel:
+                    renewed += 1
+
+            if renewed:
+                print(f"🔄 通知チャンネルを更新しました: {renewed}件")
+            return renewed
+        finally:
+            db.close()
+
+    def prune_expired_events(self) -> int:
+        """保持期間を過ぎたイベントをバッチ単位で削除（パーティション分割している場合は月ごと削除）"""
+        db = self.session_factory()
+        try:
+            # パーティション分割している場合は、先に未来の月のパーティションを作っておく
+            created = calendar_repository.ensure_calendar_event_partitions(db)
+            if created:
+                print(f"🗂️ パーティションを作成しました: {', '.join(created)}")
+
+            cutoff = datetime.utcnow() - timedelta(days=settings.CALENDAR_RETENTION_DAYS)
+            deleted = calendar_repository.prune_calendar_events_before(db, cutoff, settings.CALENDAR_PRUNE_BATCH_SIZE)
+            if deleted:
+                print(f"🧹 保持期間を過ぎたイベントを削除しました: {deleted}件 ({cutoff} 以前)")
+            return deleted
+        finally:
+            db.close()
+
+    def _periodic_sync_interval(self) -> int:
+        """
+        定期処理で差分同期するまでの間隔（秒）
+
+        通知はプライマリカレンダーにのみ登録するため、全カレンダーを同期する場合や通知の受信先が
+        未設定の場合は、通知のないカレンダーの変更をポーリングで取り込む。それ以外も同期期間を進めるために同期する。
+        """
+        if settings.CALENDAR_SYNC_ALL_CALENDARS or not settings.GOOGLE_WEBHOOK_URL:
+            return min(settings.CALENDAR_POLL_INTERVAL, settings.CALENDAR_WINDOW_ADVANCE_INTERVAL)
+        return settings.CALENDAR_WINDOW_ADVANCE_INTERVAL
+
+    def sync_stale_users(self) -> int:
+        """
+        カレンダーの同期が一定期間行われていないユーザーを差分同期（通知のないカレンダーの変更と同期期間の移動）
+
+        認証情報がキャッシュにあるユーザーのみ対象。schedule_sync が設定されていれば定期処理の間隔に
+        分散して予約し（通知による同期がポーリングの後ろで待たないように）、なければその場で同期する。
+
+        Returns:
+            予約（または同期）したユーザー数
+        """
+        db = self.session_factory()
+        try:
+            before = datetime.now() - timedelta(seconds=self._periodic_sync_interval())
+            user_ids = [
+                user_id for user_id in user_repository.get_user_ids_synced_before(db, before)
+                if credential_manager.has_cached_credentials(user_id)
+            ]
+        finally:
+            db.close()
+
+        if self.schedule_sync is not None:
+            spacing = settings.CALENDAR_MAINTENANCE_INTERVAL / max(len(user_ids), 1)
+            scheduled = sum(1 for index, user_id in enumerate(user_ids) if self.schedule_sync(user_id, index * spacing))
+            if scheduled:
+                print(f"🔄 定期の差分同期を予約しました: {scheduled}件")
+            return scheduled
+
+        synced = sum(1 for user_id in user_ids if self.sync_user(user_id))
+        if synced:
+            print(f"🔄 定期の差分同期を実行しました: {synced}件")
+        return synced
+
+    def run_maintenance(self):
+        """定期処理（通知チャンネルの更新、定期の差分同期、古いイベントの削除）"""
+        if settings.GOOGLE_WEBHOOK_URL:
+            self.renew_expiring_channels()
+        self.sync_stale_users()
+        self.prune_expired_events()
+
+    def verify_notification(self, db: Session, channel_id: str, token: Optional[str], resource_id: Optional[str]) -> CalendarChannel:
+        """プッシュ通知の送信元チャンネルを検証"""
+        channel = channel_repository.get_by_channel_id(db, channel_id)
+        if not channel:
+            raise HTTPException(status_code=404, detail="通知チャンネルが見つかりません")
+
+        if not hmac.compare_digest(channel.token, token or '') or channel.resource_id != resource_id:
+            raise HTTPException(status_code=403, detail="通知の検証に失敗しました")
+
+        return channel
+
+
+class SyncScheduler:
+    """
+    ユーザー単位でプッシュ通知をまとめて差分同期を実行するスケジューラ
+
+    Googleは1回の変更に対して複数の通知を短時間に送ることがあるため、
+    通知を受けたユーザーを一定時間待たせてから1回だけ同期する。待機中・
+    同期中に届いた通知は同じユーザーの次回の同期にまとめられる。
+    """
+
+    def __init__(
+        self,
+        sync_func: Callable[[int], bool],
+        maintenance_func: Optional[Callable[[], None]] = None,
+        debounce_seconds: Optional[float] = None,
+        maintenance_interval_seconds: Optional[float] = None
+    ):
+        self.sync_func = sync_func
+        self.maintenance_func = maintenance_func
+        self.debounce_seconds = settings.CALENDAR_SYNC_DEBOUNCE if debounce_seconds is None else debounce_seconds
+        self.maintenance_interval_seconds = settings.CALENDAR_MAINTENANCE_INTERVAL if maintenance_interval_seconds is None else maintenance_interval_seconds
+        self._pending: Dict[int, float] = {}
+        self._running: Set[int] = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._next_maintenance = time.monotonic() + self.maintenance_interval_seconds
+
+    def notify(self, user_id: int, delay: Optional[float] = None) -> bool:
+        """ユーザーの同期を予約（delay 省略時は通知をまとめる待ち時間後、既に予約済みならまとめてFalseを返す）"""
+        with self._cond:
+            if user_id in self._pending:
+                return False
+            self._pending[user_id] = time.monotonic() + (self.debounce_seconds if delay is None else delay)
+            self._cond.notify()
+            return True
+
+    def pending_users(self) -> List[int]:
+        """同期待ちのユーザーID"""
+        with self._cond:
+            return list(self._pending)
+
+    def _take_due_users(self, now: float) -> List[int]:
+        """実行時刻に達したユーザーを取り出す（同期中のユーザーは次回に回す）"""
+        due_users = [
+            user_id for user_id, due_at in self._pending.items()
+            if due_at <= now and user_id not in self._running
+        ]
+        for user_id in due_users:
+            del self._pending[user_id]
+            self._running.add(user_id)
+        return due_users
+
+    def run_pending(self, force: bool = False) -> int:
+        """実行時刻に達した同期を実行（force=Trueなら待機中のものも全て実行）"""
+        with self._cond:
+            due_users = self._take_due_users(math.inf if force else time.monotonic())
+
+        for user_id in due_users:
+            try:
+                self.sync_func(user_id)
+            except Exception as e:
+                print(f"❌ 同期ジョブエラー (ユーザー {user_id}): {e}")
+            finally:
+                with self._cond:
+                    self._running.discard(user_id)
+                    self._cond.notify()
+
+        return len(due_users)
+
+    def _run_maintenance(self):
+        """一定間隔で定期処理（チャンネル更新・古いイベントの削除）を実行"""
+        if self.maintenance_func is None or time.monotonic() < self._next_maintenance:
+            return
+        self._next_maintenance = time.monotonic() + self.maintenance_interval_seconds
+        try:
+            self.maintenance_func()
+        except Exception as e:
+            print(f"❌ 定期処理エラー: {e}")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                waiting = [due_at for user_id, due_at in self._pending.items() if user_id not in self._running]
+                next_wakeup = min(waiting + [self._next_maintenance])
+                timeout = next_wakeup - time.monotonic()
+                if timeout > 0:
+                    self._cond.wait(timeout)
+                    continue
+
+            self._run_maintenance()
+            self.run_pending()
+
+    def start(self):
+        """バックグラウンドスレッドを開始"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._loop, name='calendar-sync-scheduler', daemon=True)
+            self._thread.start()
+        print("✅ カレンダー同期スケジューラを開始しました")
+
+    def shutdown(self):
+        """バックグラウンドスレッドを停止"""
+        with self._cond:
+            thread = self._thread
+            self._stopped = True
+            self._thread = None
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout=5)
+
+# グローバルインスタンス
+calendar_sync_service = CalendarSyncService()
+calendar_sync_scheduler = SyncScheduler(
+    calendar_sync_service.sync_user,
+    maintenance_func=calendar_sync_service.run_maintenance
+)
+# 定期の差分同期はスケジューラに分散して予約する
+calendar_sync_service.schedule_sync = calendar_sync_scheduler.notify
@@ -0,0 +1,155 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Union
+
+import google_auth_httplib2
+from google.oauth2.credentials import Credentials
+
+from app.core.config import settings
+from app.core.google_api import google_service_factory
+from app.infrastructure.cache import TTLCache
+
+CacheKey = Union[int, str]
+
+
+class CredentialManager:
+    """
+    ユーザーごとのGoogle認証情報をメモリ上で管理
+
+    セッションCookieの認証情報からリクエストのたびにCredentialsを作り直すと、
+    期限切れのトークンが各リクエスト内で個別に更新され、同一ユーザーの
+    同時リクエストが並行してトークン更新を行ってしまう。ユーザーごとに
+    Credentialsを1つだけ保持し、期限が近づいたら先行して更新する。
+    更新はユーザー単位のロックで1回にまとめ、待機していたリクエストは
+    更新後のトークンをそのまま使う。
+    保持するユーザー数と期間には上限があり、破棄したユーザーの更新用ロックも合わせて破棄する。
+    """
+
+    def __init__(
+        self,
+        refresh_margin_seconds: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        maxsize: Optional[int] = None
+    ):
+        if refresh_margin_seconds is None:
+            refresh_margin_seconds = settings.GOOGLE_TOKEN_REFRESH_MARGIN
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._credentials = TTLCache(
+            ttl_seconds=settings.GOOGLE_CREDENTIAL_CACHE_TTL if ttl_seconds is None else ttl_seconds,
+            maxsize=settings.GOOGLE_CREDENTIAL_CACHE_MAXSIZE if maxsize is None else maxsize,
+            on_evict=lambda key, creds: self._drop_refresh_lock(key)
+        )
+        self._refresh_locks: Dict[CacheKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, credentials: Dict, user_id: Optional[int] = None) -> CacheKey:
+        """キャッシュキーを決定（ユーザーIDがなければリフレッシュトークンで識別）"""
+        if user_id is None:
+            user_id = credentials.get('user_id')
+        if user_id is not None:
+            return user_id
+        return credentials.get('refresh_token') or credentials['token']
+
+    def _from_dict(self, credentials: Dict) -> Credentials:
+        """セッションの認証情報からCredentialsオブジェクトを作成"""
+        expiry = credentials.get('expiry')
+        return Credentials(
+            token=credentials['token'],
+            refresh_token=credentials.get('refresh_token'),
+            token_uri=credentials.get('token_uri', settings.GOOGLE_OAUTH_TOKEN_URI),
+            client_id=credentials.get('client_id'),
+            client_secret=credentials.get('client_secret'),
+            scopes=credentials.get('scopes'),
+            # google-authはexpiryをnaiveなUTCとして扱う
+            expiry=datetime.fromisoformat(expiry) if expiry else None
+        )
+
+    def _get_refresh_lock(self, key: CacheKey) -> threading.Lock:
+        """ユーザー単位の更新用ロックを取得"""
+        with self._lock:
+            return self._refresh_locks.setdefault(key, threading.Lock())
+
+    def _drop_refresh_lock(self, key: CacheKey):
+        """ユーザーの更新用ロックを破棄（キャッシュの操作中に呼ばれるため self._lock は取らない）"""
+        self._refresh_locks.pop(key, None)
+
+    def needs_refresh(self, creds: Credentials) -> bool:
+        """トークンの更新が必要か判定（期限の一定時間前から更新対象）"""
+        if not creds.token:
+            return True
+        if creds.expiry is None:
+            return False
+        return datetime.utcnow() >= creds.expiry - self.refresh_margin
+
+    def store(self, user_id: int, creds: Credentials):
+        """ログイン時に取得したCredentialsを登録（既存のものは置き換える）"""
+        with self._lock:
+            self._credentials.set(user_id, creds)
+
+    def get_credentials(self, credentials: Dict, user_id: Optional[int] = None) -> Credentials:
+        """
+        ユーザーの有効なCredentialsを取得
+
+        Args:
+            credentials: セッションの認証情報（キャッシュがない場合のみ使用）
+            user_id: ユーザーID（省略時は認証情報の user_id を使用）
+
+        Returns:
+            必要に応じて更新済みのCredentials
+        """
+        key = self.cache_key(credentials, user_id)
+
+        with self._lock:
+            creds = self._credentials.get(key)
+            if creds is None:
+                creds = self._from_dict(credentials)
+            # リクエストで使われるたびに保持期間を延ばす
+            self._credentials.set(key, creds)
+
+        if self.needs_refresh(creds):
+            self._refresh(key, creds)
+
+        return creds
+
+    def has_cached_credentials(self, user_id: int) -> bool:
+        """ユーザーのCredentialsがキャッシュにあるか（トークンの更新はしない）"""
+        return self._credentials.get(user_id) is not None
+
+    def get_cached_credentials(self, user_id: int) -> Optional[Credentials]:
+        """キャッシュ済みのCredentialsを取得（リクエスト外の処理用、未登録ならNone）"""
+        creds = self._credentials.get(user_id)
+        if creds is None:
+            return None
+
+        if self.needs_refresh(creds):
+            self._refresh(user_id, creds)
+
+        return creds
+
+    def _refresh(self, key: CacheKey, creds: Credentials):
+        """同一ユーザーの同時更新を1回にまとめてトークンを更新"""
+        with self._get_refresh_lock(key):
+            # 待機中に他のリクエストが更新済みであればそのまま使う
+            if not self.needs_refresh(creds):
+                return
+            if not creds.refresh_token:
+                print(f"⚠️ リフレッシュトークンがないためトークンを更新できません")
+                return
+
+            try:
+                # トークン更新もGoogle APIと同じコネクションプールを使う
+                creds.refresh(google_auth_httplib2.Request(google_service_factory.transport))
+                print(f"🔄 アクセストークンを更新しました (有効期限: {creds.expiry})")
+            except Exception as e:
+                print(f"❌ トークン更新エラー: {e}")
+                # 失効した認証情報を使い続けないよう破棄する
+                self.invalidate(key)
+                raise
+
+    def invalidate(self, key: CacheKey):
+        """キャッシュした認証情報を破棄（ログアウト時など）"""
+        self._credentials.pop(key)
+        self._drop_refresh_lock(key)
+
+# グローバルインスタンス
+credential_manager = CredentialManager()
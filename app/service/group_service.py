@@ -1,17 +1,59 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.entities import Group, GroupMember, User, GroupRole
-from app.infrastructure.repositories.group_repository import group_repository
+from app.infrastructure.repositories.group_repository import async_group_repository, group_repository
 from app.core.config import settings
 
+# Session.info に置くグループ・メンバーシップ検索のキャッシュのキー
+# （セッションはリクエストごとに作られるので、キャッシュもリクエスト単位になる。
+#   書き込むメソッドは影響するキーだけを破棄する）
+GROUP_LOOKUP_CACHE_KEY = 'group_lookups'
+
+def _to_group(db_group) -> Group:
+    """DBのグループをエンティティに変換"""
+    return Group(
+        id=db_group.id,
+        name=db_group.name,
+        description=db_group.description,
+        invite_code=db_group.invite_code,
+        created_by=db_group.created_by,
+        created_at=db_group.created_at,
+        is_active=db_group.is_active
+    )
+
+def _to_membership(db_membership) -> GroupMember:
+    """DBのメンバーシップをエンティティに変換（role 文字列を GroupRole enum に変換）"""
+    role = GroupRole.ADMIN if db_membership.role == "admin" else GroupRole.MEMBER
+    
+    return GroupMember(
+        id=db_membership.id,
+        group_id=db_membership.group_id,
+        user_id=db_membership.user_id,
+        role=role,
+        joined_at=db_membership.joined_at
+    )
+
 class GroupService:
+    def _lookup_cache(self, db: Session) -> Dict:
+        """リクエスト単位のグループ・メンバーシップ検索のキャッシュ"""
+        return db.info.setdefault(GROUP_LOOKUP_CACHE_KEY, {})
+    
+    def _invalidate_lookups(self, db: Session, *keys: Tuple):
+        """書き込みで変わるグループ・メンバーシップの検索結果をキャッシュから破棄"""
+        cache = self._lookup_cache(db)
+        for key in keys:
+            cache.pop(key, None)
+    
     def create_group(self, db: Session, name: str, description: str, created_by: int) -> Group:
         """グループを作成"""
         try:
             # データベースでグループを作成
             db_group = group_repository.create_group(db, name, description, created_by)
+            # 同じIDを存在しないグループとして検索済みの場合に備えて破棄
+            self._invalidate_lookups(db, ('group', db_group.id), ('membership', db_group.id, created_by))
             
             # エンティティに変換
             return Group(
@@ -28,21 +70,27 @@ class GroupService:
             raise HTTPException(status_code=500, detail="グループの作成に失敗しました")
     
     def get_group_by_id(self, db: Session, group_id: int) -> Optional[Group]:
-        """IDでグループを取得"""
-        db_group = group_repository.get_group_by_id(db, group_id)
+        """IDでグループを取得（同じリクエスト内ではキャッシュを使う）"""
+        cache = self._lookup_cache(db)
+        key = ('group', group_id)
+        if key not in cache:
+            db_group = group_repository.get_group_by_id(db, group_id)
+            cache[key] = _to_group(db_group) if db_group else None
         
-        if not db_group:
-            return None
+        return cache[key]
+    
+    def get_group_with_membership(self, db: Session, group_id: int, user_id: int) -> Tuple[Optional[Group], Optional[GroupMember]]:
+        """グループとユーザーのメンバーシップを1回のクエリで取得（同じリクエスト内ではキャッシュを使う）"""
+        cache = self._lookup_cache(db)
+        group_key = ('group', group_id)
+        membership_key = ('membership', group_id, user_id)
+        if group_key not in cache or membership_key not in cache:
+            row = group_repository.get_group_with_membership(db, group_id, user_id)
+            db_group, db_membership = row if row else (None, None)
+            cache[group_key] = _to_group(db_group) if db_group else None
+            cache[membership_key] = _to_membership(db_membership) if db_membership else None
         
-        return Group(
-            id=db_group.id,
-            name=db_group.name,
-            description=db_group.description,
-            invite_code=db_group.invite_code,
-            created_by=db_group.created_by,
-            created_at=db_group.created_at,
-            is_active=db_group.is_active
-        )
+        return cache[group_key], cache[membership_key]
     
     def get_group_by_invite_code(self, db: Session, invite_code: str) -> Optional[Group]:
         """招待コードでグループを取得"""
@@ -51,15 +99,7 @@ class GroupService:
         if not db_group:
             return None
         
-        return Group(
-            id=db_group.id,
-            name=db_group.name,
-            description=db_group.description,
-            invite_code=db_group.invite_code,
-            created_by=db_group.created_by,
-            created_at=db_group.created_at,
-            is_active=db_group.is_active
-        )
+        return _to_group(db_group)
     
     def get_user_groups(self, db: Session, user_id: int) -> List[Dict]:
         """ユーザーが所属するグループを取得"""
@@ -84,27 +124,23 @@ class GroupService:
             return []
     
     def get_user_membership(self, db: Session, group_id: int, user_id: int) -> Optional[GroupMember]:
-        """ユーザーのグループメンバーシップを取得"""
-        db_membership = group_repository.get_user_membership(db, group_id, user_id)
+        """ユーザーのグループメンバーシップを取得（同じリクエスト内ではキャッシュを使う）"""
+        cache = self._lookup_cache(db)
+        key = ('membership', group_id, user_id)
+        if key not in cache:
+            db_membership = group_repository.get_user_membership(db, group_id, user_id)
+            cache[key] = _to_membership(db_membership) if db_membership else None
         
-        if not db_membership:
-            return None
-        
-        # SQLAlchemyの role 文字列を GroupRole enum に変換
-        role = GroupRole.ADMIN if db_membership.role == "admin" else GroupRole.MEMBER
-        
-        return GroupMember(
-            id=db_membership.id,
-            group_id=db_membership.group_id,
-            user_id=db_membership.user_id,
-            role=role,
-            joined_at=db_membership.joined_at
-        )
+        return cache[key]
     
     def join_group(self, db: Session, group_id: int, user_id: int, role: str = "member") -> bool:
         """ユーザーをグループに追加"""
         try:
-            success = group_repository.add_user_to_group(db, group_id, user_id, role)
+            try:
+                success = group_repository.add_user_to_group(db, group_id, user_id, role)
+            finally:
+                # 失敗してロールバックした場合も含め、このメンバーシップは検索し直す
+                self._invalidate_lookups(db, ('membership', group_id, user_id))
             
             if success:
                 print(f"✅ ユーザー {user_id} がグループ {group_id} に参加しました")
@@ -151,17 +187,30 @@ class GroupService:
         return membership is not None and membership.is_admin()
     
     def get_group_with_access_check(self, db: Session, group_id: int, user_id: int) -> Group:
-        """アクセス権限をチェックしてグループを取得"""
-        group = self.get_group_by_id(db, group_id)
+        """アクセス権限をチェックしてグループを取得（グループとメンバーシップは1回のクエリで取得）"""
+        group, membership = self.get_group_with_membership(db, group_id, user_id)
         
         if not group:
             raise HTTPException(status_code=404, detail="グループが見つかりません")
         
-        if not self.check_user_access(db, group_id, user_id):
+        if membership is None:
             raise HTTPException(status_code=403, detail="このグループのメンバーではありません")
         
         return group
     
+    async def get_group_with_access_check_async(self, db: AsyncSession, group_id: int, user_id: int) -> Group:
+        """get_group_with_access_check の非同期版（async def のエンドポイント用）"""
+        row = await async_group_repository.get_group_with_membership(db, group_id, user_id)
+        db_group, db_membership = row if row else (None, None)
+        
+        if not db_group:
+            raise HTTPException(status_code=404, detail="グループが見つかりません")
+        
+        if db_membership is None:
+            raise HTTPException(status_code=403, detail="このグループのメンバーではありません")
+        
+        return _to_group(db_group)
+    
     def get_group_detail_for_user(self, db: Session, group_id: int, user_id: int) -> Dict:
         """ユーザー向けのグループ詳細情報を取得"""
         try:
@@ -171,7 +220,7 @@ class GroupService:
             # メンバー情報を取得
             members = self.get_group_members(db, group_id)
             
-            # ユーザーのメンバーシップ情報を取得
+            # ユーザーのメンバーシップ情報を取得（アクセス権限チェックで取得済みのキャッシュを使う）
             membership = self.get_user_membership(db, group_id, user_id)
             
             # 招待URL生成（configから取得）
@@ -1,17 +1,24 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, time
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
 import pytz
 
+from app.core.config import settings
 from app.core.entities import MeetingSlot
-from app.infrastructure.repositories.calendar_repository import calendar_repository
+from app.core.event_parsing import epoch_to_datetime, parse_rfc3339
+from app.core.google_api import google_calendar_api, google_service_factory
+from app.service.credential_service import credential_manager
+from app.infrastructure.cache import TTLCache
+from app.infrastructure.executors import google_io_executor, slot_search_executor
+from app.infrastructure.repositories.calendar_repository import async_calendar_repository, merge_intervals
 
 class MeetingService:
     def __init__(self):
         self.timezone = pytz.timezone('Asia/Tokyo')
+        # ログインユーザーの予定あり時間帯（FreeBusy API）とその対象カレンダーの短期キャッシュ
+        self._freebusy_cache = TTLCache(ttl_seconds=settings.GOOGLE_FREEBUSY_CACHE_TTL)
+        self._calendar_ids_cache = TTLCache(ttl_seconds=settings.GOOGLE_CALENDAR_LIST_CACHE_TTL)
     
     def create_meeting_event(
         self,
@@ -61,18 +68,11 @@ class MeetingService:
                 print(f"❌ {error_msg}")
                 raise HTTPException(status_code=401, detail=error_msg)
             
-            # 認証情報からCredentialsオブジェクトを作成
-            creds = Credentials(
-                token=credentials['token'],
-                refresh_token=credentials.get('refresh_token'),
-                token_uri=credentials.get('token_uri', 'https://oauth2.googleapis.com/token'),
-                client_id=credentials.get('client_id'),
-                client_secret=credentials.get('client_secret'),
-                scopes=credentials.get('scopes')
-            )
+            # ユーザーごとにキャッシュされたCredentialsを取得（期限が近ければ更新済み）
+            creds = credential_manager.get_credentials(credentials)
             
             # Google Calendar APIサービスを構築
-            service = build('calendar', 'v3', credentials=creds)
+            service = google_service_factory.calendar(creds)
             
             # イベント作成用のボディを準備
             event_body = {
@@ -101,9 +101,14 @@ class MeetingService:
             event = service.events().insert(
                 calendarId='primary',
                 body=event_body,
-                sendNotifications=True
+                sendNotifications=True,
+                fields=settings.GOOGLE_EVENT_INSERT_FIELDS
             ).execute()
             
+            # 作成した予定が次の検索に反映されるようキャッシュを破棄
+            user_key = credential_manager.cache_key(credentials)
+            self._freebusy_cache.pop_matching(lambda key: key[0] == user_key)
+            
             print(f"✅ ミーティングイベント作成成功:")
             print(f"   イベントID: {event['id']}")
             print(f"   HTMLリンク: {event.get('htmlLink', 'N/A')}")
@@ -122,9 +127,9 @@ class MeetingService:
             print(f"❌ ミーティングイベント作成エラー: {e}")
             raise HTTPException(status_code=500, detail=f"ミーティングの作成に失敗しました: {str(e)}")
     
-    def find_available_times(
+    async def search_available_times(
         self,
-        db: Session,
+        db: AsyncSession,
         member_emails: List[str],
         start_date: str,
         end_date: str,
@@ -135,41 +140,38 @@ class MeetingService:
         current_user_email: str = None
     ) -> Dict:
         """
-        指定されたメンバーの空き時間を検索
+        指定されたメンバーの空き時間を検索（async def のエンドポイント用）
         
         Args:
-            db: データベースセッション
+            db: 非同期データベースセッション
             member_emails: 参加者のメールアドレスリスト
-            member_credentials: メンバーのGoogle認証情報
             start_date: 検索開始日 (YYYY-MM-DD)
             end_date: 検索終了日 (YYYY-MM-DD)
             start_time: 希望開始時間 (HH:MM)
             end_time: 希望終了時間 (HH:MM)
             duration_minutes: ミーティング時間（分）
+            member_credentials: ログインユーザーのGoogle認証情報
+            current_user_email: ログインユーザーのメールアドレス
         
         Returns:
             空き時間スロットと各メンバーの予定情報を含む辞書
-        """
-        
-        print(f"🔍 空き時間検索開始:")
-        print(f"   参加者: {len(member_emails)}名")
-        print(f"   期間: {start_date} 〜 {end_date}")
-        print(f"   時間帯: {start_time} 〜 {end_time}")
-        print(f"   時間: {duration_minutes}分")
         
+        ログインユーザーの予定（Google API）はI/O用のプール、他のメンバーの予定はリクエストの
+        非同期セッションで取得し、空き時間の計算はCPU用のプールで実行する。
+        プールにはDBセッションを渡さない（タイムアウト後もワーカーがセッションを使い続けないようにする）。
+        """
         try:
-            # メンバーの予定を取得（データベース + Google Calendar API）
-            all_busy_times = self._get_member_busy_times_enhanced(
+            all_busy_times = await self._get_member_busy_times_async(
+                db,
                 member_emails,
                 start_date,
                 end_date,
-                db,
                 member_credentials,
                 current_user_email
             )
             
-            # 空き時間を計算
-            available_slots = self._calculate_available_slots(
+            available_slots = await slot_search_executor.run(
+                calculate_available_slots,
                 all_busy_times,
                 start_date,
                 end_date,
@@ -178,202 +180,117 @@ class MeetingService:
                 duration_minutes
             )
             
-            print(f"✅ 検索完了: {len(available_slots)}件の空き時間を発見")
-            
-            # メンバーの予定情報を整理（UTC統一）
-            member_schedules = {}
-            for email, busy_times in all_busy_times.items():
-                member_schedules[email] = [
-                    {
-                        'start_datetime': busy['start'].isoformat(),  # UTC
-                        'end_datetime': busy['end'].isoformat(),      # UTC
-                        'start_time': busy['start'].strftime('%H:%M'),  # UTC統一
-                        'end_time': busy['end'].strftime('%H:%M'),      # UTC統一
-                        'date': busy['start'].strftime('%Y-%m-%d'),
-                        'title': busy['title']
-                    }
-                    for busy in busy_times
-                ]
-            
-            return {
-                'available_slots': available_slots,
-                'member_schedules': member_schedules,
-                'search_period': {
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'start_time': start_time,
-                    'end_time': end_time
-                },
-                'total_slots_found': len(available_slots)
-            }
+            return self._search_result(all_busy_times, available_slots, start_date, end_date, start_time, end_time)
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"❌ 空き時間検索エラー: {e}")
             raise HTTPException(status_code=500, detail=f"ミーティング検索中にエラーが発生しました: {str(e)}")
     
-    def _get_member_busy_times_from_db(
+    async def _get_member_busy_times_async(
         self,
+        db: AsyncSession,
         member_emails: List[str],
         start_date: str,
         end_date: str,
-        db_session: Session
+        member_credentials: Dict = None,
+        current_user_email: str = None
     ) -> Dict[str, List[Dict]]:
         """
-        データベースから保存済みのメンバー予定を取得
+        メンバーの予定を取得（ログインユーザーはFreeBusy API、他のメンバーはDBのマージ済み予定時間帯）
+
+        Google APIの呼び出しのみI/O用のプールで実行する。
         """
+        start_datetime, end_datetime = self._utc_search_range(start_date, end_date)
+        all_busy_times = {}
+        
+        if member_credentials and member_credentials.get('token') and current_user_email in member_emails:
+            current_user_data = await google_io_executor.run(
+                self._get_current_user_busy_times_from_api,
+                start_datetime,
+                end_datetime,
+                member_credentials
+            )
+            if current_user_data:
+                all_busy_times[current_user_email] = current_user_data
+                print(f"✅ {current_user_email}: Google Calendar APIから {len(current_user_data)}件の予定を取得")
+        
+        other_emails = [email for email in member_emails if email not in all_busy_times]
         try:
-            # ユーザー入力の日付をJST（日本時間）として解釈
-            jst_start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            jst_end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            # JSTの日付範囲を設定（その日の00:00から翌日の00:00まで）
-            jst_start_datetime = self.timezone.localize(jst_start_date)
-            jst_end_datetime = self.timezone.localize(jst_end_date + timedelta(days=1))
-            
-            # JSTからUTCに変換してDB検索用の範囲を作成
-            start_datetime = jst_start_datetime.astimezone(pytz.UTC)
-            end_datetime = jst_end_datetime.astimezone(pytz.UTC)
-            
-            print(f"📊 DB検索期間（UTC基準）: {start_datetime} 〜 {end_datetime}")
-            print(f"📊 ユーザー指定期間（JST）: {jst_start_datetime} 〜 {jst_end_datetime}")
-            
-            # データベースから複数ユーザーの予定を一括取得
-            events_by_email = calendar_repository.get_multiple_users_calendar_events(
-                db_session, 
-                member_emails, 
-                start_datetime, 
+            blocks_by_email = await async_calendar_repository.get_multiple_users_busy_blocks(
+                db,
+                other_emails,
+                start_datetime,
                 end_datetime
-            )
-            
-            # MeetingService用の形式に変換
-            all_busy_times = {}
-            
-            for email in member_emails:
-                busy_times = []
-                db_events = events_by_email.get(email, [])
-                
-                for event in db_events:
-                    # 終日イベントは除外
-                    if not event.get('is_all_day', False):
-                        start_dt = event['start_datetime']
-                        end_dt = event['end_datetime']
-                        
-                        # DBのUTCデータを確実にUTCとして扱う
-                        if start_dt.tzinfo is None:
-                            start_dt = pytz.UTC.localize(start_dt)
-                        else:
-                            start_dt = start_dt.astimezone(pytz.UTC)
-                            
-                        if end_dt.tzinfo is None:
-                            end_dt = pytz.UTC.localize(end_dt)
-                        else:
-                            end_dt = end_dt.astimezone(pytz.UTC)
-                        
-                        busy_times.append({
-                            'start': start_dt,
-                            'end': end_dt,
-                            'title': event.get('title', '予定あり')
-                        })
-                
-                all_busy_times[email] = busy_times
-                print(f"   📅 {email}: {len(busy_times)}件の予定をDBから取得")
-            
-            return all_busy_times
-            
+            ) if other_emails else {}
         except Exception as e:
             print(f"❌ DB予定取得エラー: {e}")
             # エラーの場合は全員空きとして扱う
-            return {email: [] for email in member_emails}
+            blocks_by_email = {}
+        
+        for email in other_emails:
+            all_busy_times[email] = self._busy_blocks_to_busy_times(blocks_by_email.get(email, []))
+            print(f"   📅 {email}: {len(all_busy_times[email])}件の予定時間帯をDBから取得")
+        
+        return all_busy_times
     
-    def _get_member_busy_times_enhanced(
+    def _utc_search_range(self, start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+        """ユーザー入力の日付（JST）をUTCの検索範囲（開始日の00:00から終了日の翌日00:00まで）に変換"""
+        jst_start_datetime = self.timezone.localize(datetime.strptime(start_date, '%Y-%m-%d'))
+        jst_end_datetime = self.timezone.localize(datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+        
+        return jst_start_datetime.astimezone(pytz.UTC), jst_end_datetime.astimezone(pytz.UTC)
+    
+    def _search_result(
         self,
-        member_emails: List[str],
+        all_busy_times: Dict[str, List[Dict]],
+        available_slots: List[Dict],
         start_date: str,
         end_date: str,
-        db_session: Session,
-        member_credentials: Dict = None,
-        current_user_email: str = None
-    ) -> Dict[str, List[Dict]]:
-        """
-        メンバーの予定を取得（Google Calendar API + データベース）
-        現在ログインユーザーはGoogle Calendar APIから、他はデータベースから取得
-        """
-        try:
-            # ユーザー入力の日付をJST（日本時間）として解釈
-            jst_start_date = datetime.strptime(start_date, '%Y-%m-%d')
-            jst_end_date = datetime.strptime(end_date, '%Y-%m-%d')
-            
-            # JSTの日付範囲を設定（その日の00:00から翌日の00:00まで）
-            jst_start_datetime = self.timezone.localize(jst_start_date)
-            jst_end_datetime = self.timezone.localize(jst_end_date + timedelta(days=1))
-            
-            # JSTからUTCに変換
-            start_datetime = jst_start_datetime.astimezone(pytz.UTC)
-            end_datetime = jst_end_datetime.astimezone(pytz.UTC)
-            
-            print(f"🔍 Enhanced予定取得開始（UTC基準）: {start_datetime} 〜 {end_datetime}")
-            print(f"🔍 ユーザー指定期間（JST）: {jst_start_datetime} 〜 {jst_end_datetime}")
-            print(f"🔍 対象メンバー: {member_emails}")
-            print(f"🔍 認証情報: {'あり' if member_credentials else 'なし'}")
-            
-            all_busy_times = {}
-            
-            # 現在ログインユーザーの認証情報がある場合、Google Calendar APIから直接取得
-            if member_credentials and member_credentials.get('token') and current_user_email:
-                current_user_data = self._get_current_user_busy_times_from_api(
-                    start_datetime, end_datetime, member_credentials
-                )
-                if current_user_data and current_user_email in member_emails:
-                    # 現在ログインユーザーのメールアドレスが対象メンバーに含まれている場合のみ適用
-                    all_busy_times[current_user_email] = current_user_data
-                    print(f"✅ {current_user_email}: Google Calendar APIから {len(current_user_data)}件の予定を取得")
-            
-            # データベースから他のメンバーの予定を取得
-            db_events_by_email = calendar_repository.get_multiple_users_calendar_events(
-                db_session, 
-                member_emails, 
-                start_datetime, 
-                end_datetime
-            )
-            
-            # データベースの結果をマージ
-            for email in member_emails:
-                if email not in all_busy_times:  # Google Calendar APIで取得済みでない場合
-                    busy_times = []
-                    db_events = db_events_by_email.get(email, [])
-                    
-                    for event in db_events:
-                        # 終日イベントは除外
-                        if not event.get('is_all_day', False):
-                            start_dt = event['start_datetime']
-                            end_dt = event['end_datetime']
-                            
-                            # DBのUTCデータを確実にUTCとして扱う
-                            if start_dt.tzinfo is None:
-                                start_dt = pytz.UTC.localize(start_dt)
-                            else:
-                                start_dt = start_dt.astimezone(pytz.UTC)
-                                
-                            if end_dt.tzinfo is None:
-                                end_dt = pytz.UTC.localize(end_dt)
-                            else:
-                                end_dt = end_dt.astimezone(pytz.UTC)
-                            
-                            busy_times.append({
-                                'start': start_dt,
-                                'end': end_dt,
-                                'title': event.get('title', '予定あり')
-                            })
-                    
-                    all_busy_times[email] = busy_times
-                    print(f"   📅 {email}: {len(busy_times)}件の予定をDBから取得")
-            
-            return all_busy_times
-            
-        except Exception as e:
-            print(f"❌ Enhanced予定取得エラー: {e}")
-            # エラーの場合は従来の方法にフォールバック
-            return self._get_member_busy_times_from_db(member_emails, start_date, end_date, db_session)
+        start_time: str,
+        end_time: str
+    ) -> Dict:
+        """検索結果（空き時間スロットと各メンバーの予定）を組み立てる"""
+        print(f"✅ 検索完了: {len(available_slots)}件の空き時間を発見")
+        
+        # メンバーの予定情報を整理（UTC統一）
+        member_schedules = {}
+        for email, busy_times in all_busy_times.items():
+            member_schedules[email] = [
+                {
+                    'start_datetime': busy['start'].isoformat(),  # UTC
+                    'end_datetime': busy['end'].isoformat(),      # UTC
+                    'start_time': busy['start'].strftime('%H:%M'),  # UTC統一
+                    'end_time': busy['end'].strftime('%H:%M'),      # UTC統一
+                    'date': busy['start'].strftime('%Y-%m-%d'),
+                    'title': busy['title']
+                }
+                for busy in busy_times
+            ]
+        
+        return {
+            'available_slots': available_slots,
+            'member_schedules': member_schedules,
+            'search_period': {
+                'start_date': start_date,
+                'end_date': end_date,
+                'start_time': start_time,
+                'end_time': end_time
+            },
+            'total_slots_found': len(available_slots)
+        }
+    
+    def _busy_blocks_to_busy_times(self, blocks: List[Dict]) -> List[Dict]:
+        """マージ済み予定時間帯をMeetingService用の形式に変換（UTC統一）"""
+        return [
+            {
+                'start': block['start_datetime'],
+                'end': block['end_datetime'],
+                'title': '予定あり'
+            }
+            for block in blocks
+        ]
     
     def _get_current_user_busy_times_from_api(
         self,
@@ -382,80 +299,70 @@ class MeetingService:
         credentials: Dict
     ) -> List[Dict]:
         """
-        現在ログインユーザーのGoogle Calendar APIから予定を直接取得
+        現在ログインユーザーの予定あり時間帯をFreeBusy APIから直接取得
+
+        イベント本体は取得せず、選択中の全カレンダーの予定あり時間帯を1回のクエリで取得する。
+        FreeBusyは「空き時間」の予定を除き終日イベントを含む（他のメンバーの予定時間帯も同じ扱い）。
+        同じ期間の検索は短時間キャッシュした結果を返す。
         """
         try:
-            from google.oauth2.credentials import Credentials
-            from googleapiclient.discovery import build
-            
-            print(f"🔄 Google Calendar APIから予定取得開始...")
-            
-            # 認証情報からCredentialsオブジェクトを作成
-            creds = Credentials(
-                token=credentials['token'],
-                refresh_token=credentials.get('refresh_token'),
-                token_uri=credentials.get('token_uri', 'https://oauth2.googleapis.com/token'),
-                client_id=credentials.get('client_id'),
-                client_secret=credentials.get('client_secret'),
-                scopes=credentials.get('scopes')
-            )
+            user_key = credential_manager.cache_key(credentials)
+            cache_key = (user_key, start_datetime.timestamp(), end_datetime.timestamp())
+            cached = self._freebusy_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ キャッシュ済みの予定あり時間帯を使用: {len(cached)}件")
+                return list(cached)
             
-            # Google Calendar APIサービスを構築
-            service = build('calendar', 'v3', credentials=creds)
+            print(f"🔄 Google Calendar FreeBusy APIから予定取得開始...")
             
-            # イベントを取得（UTC時刻で検索）
-            events_result = service.events().list(
-                calendarId='primary',
-                timeMin=start_datetime.isoformat(),
-                timeMax=end_datetime.isoformat(),
-                maxResults=250,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+            # ユーザーごとにキャッシュされたCredentialsを取得（期限が近ければ更新済み）
+            creds = credential_manager.get_credentials(credentials)
             
-            events = events_result.get('items', [])
-            print(f"✅ Google Calendar APIから {len(events)}件のイベントを取得")
+            # Google Calendar APIサービスを構築
+            service = google_service_factory.calendar(creds)
             
-            # MeetingService形式に変換（UTC統一）
-            busy_times = []
-            for event in events:
-                try:
-                    start = event['start'].get('dateTime', event['start'].get('date'))
-                    end = event['end'].get('dateTime', event['end'].get('date'))
-                    
-                    # 終日イベントは除外
-                    if 'dateTime' not in event['start']:
-                        continue
-                    
-                    # 日時をパース
-                    if start.endswith('Z'):
-                        start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                        end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
-                    else:
-                        start_dt = datetime.fromisoformat(start)
-                        end_dt = datetime.fromisoformat(end)
-                    
-                    # UTC統一で保持（JST変換はしない）
-                    start_dt = start_dt.astimezone(pytz.UTC)
-                    end_dt = end_dt.astimezone(pytz.UTC)
-                    
-                    busy_times.append({
-                        'start': start_dt,
-                        'end': end_dt,
-                        'title': event.get('summary', '予定あり')
-                    })
-                    
-                except Exception as e:
-                    print(f"⚠️ イベント解析エラー: {e}")
-                    continue
+            # 選択中の全カレンダーの予定あり時間帯を取得（UTC時刻で検索）
+            busy_by_calendar = google_calendar_api.query_freebusy(
+                service,
+                self._get_busy_calendar_ids(user_key, service),
+                start_datetime,
+                end_datetime
+            )
             
-            print(f"✅ {len(busy_times)}件の有効な予定を変換完了（UTC統一）")
-            return busy_times
+            # カレンダーをまたいで重なる時間帯をマージしてMeetingService形式に変換（UTC統一）
+            intervals = merge_intervals([
+                (epoch_to_datetime(parse_rfc3339(busy['start'])), epoch_to_datetime(parse_rfc3339(busy['end'])))
+                for calendar_busy in busy_by_calendar.values()
+                for busy in calendar_busy
+            ])
+            busy_times = [
+                {'start': start, 'end': end, 'title': '予定あり'}
+                for start, end in intervals
+            ]
+            
+            self._freebusy_cache.set(cache_key, busy_times)
+            print(f"✅ {len(busy_by_calendar)}カレンダーから {len(busy_times)}件の予定あり時間帯を取得（UTC統一）")
+            return list(busy_times)
             
         except Exception as e:
             print(f"❌ Google Calendar API取得エラー: {e}")
             return []
     
+    def _get_busy_calendar_ids(self, user_key, service) -> List[str]:
+        """FreeBusyの対象カレンダー（同期対象と同じく選択中のカレンダー、ユーザーごとにキャッシュ）"""
+        if not settings.CALENDAR_SYNC_ALL_CALENDARS:
+            return ['primary']
+        
+        calendar_ids = self._calendar_ids_cache.get(user_key)
+        if calendar_ids is None:
+            try:
+                calendar_ids = google_calendar_api.list_calendar_ids(service)
+                self._calendar_ids_cache.set(user_key, calendar_ids)
+            except Exception as e:
+                print(f"⚠️ カレンダーリストを取得できないためプライマリのみ対象にします: {e}")
+                return ['primary']
+        return calendar_ids
+    
     def _calculate_available_slots(
         self,
         all_busy_times: Dict[str, List[Dict]],
@@ -770,5 +677,18 @@ class MeetingService:
         
         return meeting_slots
 
+def calculate_available_slots(
+    all_busy_times: Dict[str, List[Dict]],
+    start_date: str,
+    end_date: str,
+    start_time: str,
+    end_time: str,
+    duration_minutes: int
+) -> List[Dict]:
+    """空き時間の計算（プロセスプールに渡せるようにモジュールレベルの関数にする）"""
+    return meeting_service._calculate_available_slots(
+        all_busy_times, start_date, end_date, start_time, end_time, duration_minutes
+    )
+
 # グローバルインスタンス
 meeting_service = MeetingService()
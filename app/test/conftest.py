@@ -5,16 +5,21 @@ from datetime import datetime, timedelta
 from typing import Generator
 
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 
 from app.main import app
 from app.infrastructure.models import Base, User, Group, GroupMember, CalendarEvent
 from app.infrastructure.database import get_db
-from app.api.dependencies import get_database_session
+from app.api.dependencies import get_async_database_session, get_database_session
+from app.service.auth_service import auth_service
 
-# テスト用インメモリデータベース設定
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# テスト用データベース設定（同期・非同期のエンジンで同じデータを参照するため一時ファイルを使う）
+TEST_DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}"
 
 @pytest.fixture(scope="session")
 def test_engine():
@@ -27,6 +32,11 @@ def test_engine():
     Base.metadata.create_all(bind=engine)
     return engine
 
+@pytest.fixture(scope="session")
+def test_async_engine(test_engine):
+    """テスト用の非同期SQLiteエンジン（TestClientごとにイベントループが変わるためプールしない）"""
+    return create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
 @pytest.fixture(scope="function")
 def test_db_session(test_engine) -> Generator[Session, None, None]:
     """テスト用データベースセッション（各テスト関数ごとに新しいセッション）"""
@@ -41,9 +51,11 @@ def test_db_session(test_engine) -> Generator[Session, None, None]:
             session.execute(table.delete())
         session.commit()
         session.close()
+        # 一括削除ではマッパーのイベントが発生しないため、ユーザーIDの再利用に備えてキャッシュも破棄
+        auth_service._user_cache.clear()
 
 @pytest.fixture(scope="function")
-def test_client(test_db_session: Session):
+def test_client(test_db_session: Session, test_async_engine):
     """テスト用FastAPIクライアント"""
     def override_get_db():
         try:
@@ -51,7 +63,14 @@ def test_client(test_db_session: Session):
         finally:
             pass
     
+    TestAsyncSessionLocal = async_sessionmaker(bind=test_async_engine, expire_on_commit=False)
+    
+    async def override_get_async_db():
+        async with TestAsyncSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_database_session] = override_get_db
+    app.dependency_overrides[get_async_database_session] = override_get_async_db
     
     with TestClient(app) as client:
         yield client
@@ -217,6 +236,20 @@ def test_calendar_event(test_db_session: Session, test_user, sample_calendar_eve
     test_db_session.refresh(event)
     return event
 
+@pytest.fixture
+def executed_statements(test_engine) -> Generator[list, None, None]:
+    """テスト用エンジンで実行したSQL文を記録（クエリ数のテスト用）"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(test_engine, "before_cursor_execute", record)
+
 # 認証モック用フィクスチャ
 
 @pytest.fixture
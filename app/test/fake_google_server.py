@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+ローカルで動作するGoogle Calendar / OAuth APIのフェイクサーバー
+
+本物のGoogleに接続せずに、同期・空き時間検索・ミーティング作成を
+エンドツーエンドで動かすためのテスト・ベンチマーク用サーバー。
+アプリは GOOGLE_API_BASE_URL と GOOGLE_OAUTH_TOKEN_URI をこのサーバーに
+向けることで、実際のHTTP通信（コネクションプール・バッチリクエストを含む）を行う。
+
+対応エンドポイント:
+    GET  /calendar/v3/users/me/calendarList
+    GET  /calendar/v3/calendars/{calendarId}/events      （ページング・syncToken・updatedMin）
+    POST /calendar/v3/calendars/{calendarId}/events      （events.insert）
+    POST /calendar/v3/calendars/{calendarId}/events/watch
+    POST /calendar/v3/channels/stop
+    POST /calendar/v3/freeBusy
+    POST /batch/calendar/v3                              （バッチHTTPリクエスト）
+    GET  /oauth2/v2/userinfo
+    POST /token
+
+実行方法:
+    python -m app.test.fake_google_server [--port 8089] [--events 2000] [--calendars 2] [--latency 0.05]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import FeedParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+PRIMARY_CALENDAR_ID = 'user@example.com'
+
+
+def _to_rfc3339(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _from_rfc3339(value: str) -> float:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def generate_events(
+    count: int,
+    start: Optional[datetime] = None,
+    days: int = 97,
+    seed: int = 0,
+    all_day_ratio: float = 0.05,
+    prefix: str = 'event'
+) -> List[Dict]:
+    """
+    カレンダーのイベントを生成（営業時間内に15分単位で配置）
+
+    Args:
+        count: イベント数
+        start: 期間の開始（省略時は7日前の0時UTC）
+        days: 期間の日数
+        seed: 乱数シード（同じ値なら同じイベントを生成）
+        all_day_ratio: 終日イベントの割合
+        prefix: イベントIDの接頭辞
+    """
+    rng = random.Random(seed)
+    if start is None:
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
+
+    events = []
+    for i in range(count):
+        day = start + timedelta(days=rng.randrange(days))
+        if rng.random() < all_day_ratio:
+            events.append({
+                'id': f'{prefix}{i}',
+                'summary': f'All day {i}',
+                'start': {'date': day.strftime('%Y-%m-%d')},
+                'end': {'date': (day + timedelta(days=1)).strftime('%Y-%m-%d')}
+            })
+            continue
+
+        event_start = day + timedelta(hours=rng.randrange(0, 10), minutes=15 * rng.randrange(4))
+        event_end = event_start + timedelta(minutes=15 * rng.randrange(1, 9))
+        events.append({
+            'id': f'{prefix}{i}',
+            'summary': f'Meeting {i}',
+            'start': {'dateTime': event_start.strftime('%Y-%m-%dT%H:%M:%SZ')},
+            'end': {'dateTime': event_end.strftime('%Y-%m-%dT%H:%M:%SZ')}
+        })
+    return events
+
+
+class FakeGoogleState:
+    """フェイクサーバーが保持するカレンダー・ユーザーの状態（スレッドセーフ）"""
+
+    def __init__(self, user_email: str = PRIMARY_CALENDAR_ID, user_name: str = 'Fake User'):
+        self.user = {'id': 'fake-google-user', 'email': user_email, 'name': user_name}
+        self.calendars: Dict[str, Dict[str, Dict]] = {user_email: {}}
+        self.calendar_list: List[Dict] = [{'id': user_email, 'primary': True, 'selected': True}]
+        self.version = 0
+        self.requests: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def _calendar_id(self, calendar_id: str) -> str:
+        return self.user['email'] if calendar_id == 'primary' else calendar_id
+
+    def add_calendar(self, calendar_id: str, events: List[Dict] = (), selected: bool = True):
+        """カレンダーを追加"""
+        with self._lock:
+            self.calendars.setdefault(calendar_id, {})
+            self.calendar_list.append({'id': calendar_id, 'selected': selected})
+        for event in events:
+            self.put_event(calendar_id, event)
+
+    def put_event(self, calendar_id: str, event: Dict) -> Dict:
+        """イベントを追加・更新（更新日時と変更番号を記録）"""
+        with self._lock:
+            self.version += 1
+            stored = {
+                'kind': 'calendar#event',
+                'status': 'confirmed',
+                **event,
+                'updated': _to_rfc3339(time.time()),
+                '_version': self.version
+            }
+            self.calendars[self._calendar_id(calendar_id)][event['id']] = stored
+            return stored
+
+    def delete_event(self, calendar_id: str, event_id: str):
+        """イベントを削除（差分取得のためキャンセル済みとして残す）"""
+        with self._lock:
+            self.version += 1
+            event = self.calendars[self._calendar_id(calendar_id)][event_id]
+            event.update({'status': 'cancelled', 'updated': _to_rfc3339(time.time()), '_version': self.version})
+
+    def events(self, calendar_id: str) -> List[Dict]:
+        with self._lock:
+            return list(self.calendars.get(self._calendar_id(calendar_id), {}).values())
+
+
+def _event_range(event: Dict) -> Tuple[float, float]:
+    start, end = event['start'], event['end']
+    if 'dateTime' in start:
+        return _from_rfc3339(start['dateTime']), _from_rfc3339(end['dateTime'])
+    return _from_rfc3339(start['date'] + 'T00:00:00Z'), _from_rfc3339(end['date'] + 'T00:00:00Z')
+
+
+def _public(event: Dict) -> Dict:
+    return {key: value for key, value in event.items() if not key.startswith('_')}
+
+
+class FakeGoogleAPI:
+    """リクエストをフェイクの状態に対して処理するルーター"""
+
+    def __init__(self, state: FakeGoogleState):
+        self.state = state
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Optional[Dict]) -> Tuple[int, Optional[Dict]]:
+        self.state.requests.append((method, path))
+        parts = [urllib.parse.unquote(part) for part in path.strip('/').split('/')]
+
+        if parts[:2] == ['calendar', 'v3']:
+            parts = parts[2:]
+            if parts == ['users', 'me', 'calendarList'] and method == 'GET':
+                return 200, {'items': list(self.state.calendar_list)}
+            if parts == ['freeBusy'] and method == 'POST':
+                return 200, self.freebusy(body)
+            if parts == ['channels', 'stop'] and method == 'POST':
+                return 204, None
+            if len(parts) >= 3 and parts[0] == 'calendars' and parts[2] == 'events':
+                calendar_id = parts[1]
+                if self.state._calendar_id(calendar_id) not in self.state.calendars:
+                    return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+                if len(parts) == 3 and method == 'GET':
+                    return self.list_events(calendar_id, query)
+                if len(parts) == 3 and method == 'POST':
+                    return 200, self.insert_event(calendar_id, body)
+                if parts[3:] == ['watch'] and method == 'POST':
+                    return 200, self.watch(body)
+
+        if parts == ['oauth2', 'v2', 'userinfo'] and method == 'GET':
+            return 200, dict(self.state.user)
+        if parts == ['token'] and method == 'POST':
+            return 200, {'access_token': f'fake-token-{uuid.uuid4().hex}', 'expires_in': 3600, 'token_type': 'Bearer'}
+
+        return 404, {'error': {'code': 404, 'message': f'Not Found: {method} {path}'}}
+
+    def list_events(self, calendar_id: str, query: Dict[str, str]) -> Tuple[int, Dict]:
+        events = self.state.events(calendar_id)
+        sync_token = query.get('syncToken')
+
+        if sync_token:
+            # syncToken指定時は前回以降に変更されたイベント（削除を含む）のみ
+            try:
+                since = int(sync_token.lstrip('v'))
+            except ValueError:
+                return 410, {'error': {'code': 410, 'message': 'Sync token is no longer valid'}}
+            events = [event for event in events if event['_version'] > since]
+        else:
+            if query.get('showDeleted') != 'true':
+                events = [event for event in events if event['status'] != 'cancelled']
+            if 'updatedMin' in query:
+                updated_min = _from_rfc3339(query['updatedMin'])
+                events = [event for event in events if _from_rfc3339(event['updated']) >= updated_min]
+            time_min = _from_rfc3339(query['timeMin']) if 'timeMin' in query else None
+            time_max = _from_rfc3339(query['timeMax']) if 'timeMax' in query else None
+            if time_min is not None or time_max is not None:
+                def overlaps(event):
+                    if event['status'] == 'cancelled':
+                        return True
+                    start, end = _event_range(event)
+                    return (time_max is None or start < time_max) and (time_min is None or end > time_min)
+                events = [event for event in events if overlaps(event)]
+            if query.get('orderBy') == 'startTime':
+                events.sort(key=lambda event: _event_range(event)[0] if event['status'] != 'cancelled' else 0)
+
+        offset = int(query.get('pageToken') or 0)
+        page_size = min(int(query.get('maxResults') or 250), 2500)
+        result = {'kind': 'calendar#events', 'items': [_public(event) for event in events[offset:offset + page_size]]}
+        if offset + page_size < len(events):
+            result['nextPageToken'] = str(offset + page_size)
+        else:
+            result['nextSyncToken'] = f'v{self.state.version}'
+        return 200, result
+
+    def insert_event(self, calendar_id: str, body: Dict) -> Dict:
+        event_id = uuid.uuid4().hex
+        stored = self.state.put_event(calendar_id, {
+            'id': event_id,
+            'summary': body.get('summary', ''),
+            'start': {'dateTime': body['start']['dateTime']},
+            'end': {'dateTime': body['end']['dateTime']},
+            'attendees': body.get('attendees', []),
+            'htmlLink': f'https://calendar.google.com/event?eid={event_id}'
+        })
+        return _public(stored)
+
+    def watch(self, body: Dict) -> Dict:
+        expiration = int((time.time() + int(body.get('params', {}).get('ttl', 604800))) * 1000)
+        return {'kind': 'api#channel', 'id': body['id'], 'resourceId': uuid.uuid4().hex, 'expiration': str(expiration)}
+
+    def freebusy(self, body: Dict) -> Dict:
+        time_min = _from_rfc3339(body['timeMin'])
+        time_max = _from_rfc3339(body['timeMax'])
+        calendars = {}
+
+        for item in body.get('items', []):
+            calendar_id = item['id']
+            if self.state._calendar_id(calendar_id) not in self.state.calendars:
+                calendars[calendar_id] = {'errors': [{'domain': 'global', 'reason': 'notFound'}], 'busy': []}
+                continue
+
+            intervals = []
+            for event in self.state.events(calendar_id):
+                if event['status'] == 'cancelled' or 'dateTime' not in event['start']:
+                    continue
+                start, end = _event_range(event)
+                if start < time_max and end > time_min:
+                    intervals.append((max(start, time_min), min(end, time_max)))
+
+            merged = []
+            for start, end in sorted(intervals):
+                if merged and start <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+                else:
+                    merged.append((start, end))
+            calendars[calendar_id] = {'busy': [{'start': _to_rfc3339(s), 'end': _to_rfc3339(e)} for s, e in merged]}
+
+        return {'kind': 'calendar#freeBusy', 'timeMin': body['timeMin'], 'timeMax': body['timeMax'], 'calendars': calendars}
+
+    def batch(self, content_type: str, body: bytes) -> Tuple[str, bytes]:
+        """multipart/mixed のバッチリクエストを個別に処理して1つのレスポンスにまとめる"""
+        parser = FeedParser()
+        parser.feed(f'Content-Type: {content_type}\r\n\r\n')
+        parser.feed(body.decode('utf-8'))
+        message = parser.close()
+
+        boundary = f'batch_{uuid.uuid4().hex}'
+        chunks = []
+        for part in message.get_payload():
+            request_text = part.get_payload()
+            request_line, rest = request_text.split('\n', 1)
+            method, target, _ = request_line.strip().split(' ', 2)
+            inner_body = rest.split('\n\n', 1)[1].strip() if '\n\n' in rest else ''
+            parsed = urllib.parse.urlsplit(target)
+            query = dict(urllib.parse.parse_qsl(parsed.query))
+
+            status, payload = self.handle(method, parsed.path, query, json.loads(inner_body) if inner_body else None)
+            response_body = json.dumps(payload) if payload is not None else ''
+            chunks.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{part["Content-ID"][1:-1]}>\r\n\r\n'
+                f'HTTP/1.1 {status} OK\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n\r\n'
+                f'{response_body}\r\n'
+            )
+        chunks.append(f'--{boundary}--\r\n')
+        return f'multipart/mixed; boundary={boundary}', ''.join(chunks).encode('utf-8')
+
+
+class FakeGoogleServer:
+    """
+    フェイクのGoogle APIをローカルのHTTPサーバーとして起動
+
+    Args:
+        state: サーバーが保持する状態（省略時は空のカレンダー）
+        latency: 1リクエストあたりの応答遅延（秒、実際のGoogleとの往復時間の模擬）
+        host: 待ち受けアドレス
+        port: 待ち受けポート（0なら空いているポート）
+    """
+
+    def __init__(self, state: Optional[FakeGoogleState] = None, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.state = state or FakeGoogleState()
+        self.latency = latency
+        self.api = FakeGoogleAPI(self.state)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """GOOGLE_API_BASE_URL に指定するURL"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def token_uri(self) -> str:
+        """GOOGLE_OAUTH_TOKEN_URI に指定するURL"""
+        return self.base_url + 'token'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _dispatch(self, method):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                length = int(self.headers.get('Content-Length') or 0)
+                raw_body = self.rfile.read(length) if length else b''
+                parsed = urllib.parse.urlsplit(self.path)
+
+                if parsed.path.startswith('/batch/'):
+                    server.state.requests.append((method, parsed.path))
+                    content_type, content = server.api.batch(self.headers['Content-Type'], raw_body)
+                    status = 200
+                elif parsed.path == '/token':
+                    status, payload = server.api.handle(method, parsed.path, {}, None)
+                    content_type, content = 'application/json', json.dumps(payload).encode('utf-8')
+                else:
+                    query = dict(urllib.parse.parse_qsl(parsed.query))
+                    body = json.loads(raw_body) if raw_body else None
+                    status, payload = server.api.handle(method, parsed.path, query, body)
+                    content_type = 'application/json; charset=UTF-8'
+                    content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeGoogleServer':
+        """別スレッドでサーバーを起動"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """サーバーを停止"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeGoogleServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google Calendar / OAuth APIのフェイクサーバー")
+    parser.add_argument('--host', default='127.0.0.1', help="待ち受けアドレス")
+    parser.add_argument('--port', type=int, default=8089, help="待ち受けポート")
+    parser.add_argument('--events', type=int, default=2000, help="カレンダーあたりのイベント数")
+    parser.add_argument('--calendars', type=int, default=1, help="カレンダー数（プライマリを含む）")
+    parser.add_argument('--latency', type=float, default=0.0, help="1リクエストあたりの応答遅延（秒）")
+    args = parser.parse_args()
+
+    state = FakeGoogleState()
+    for event in generate_events(args.events):
+        state.put_event('primary', event)
+    for i in range(1, args.calendars):
+        state.add_calendar(f'calendar{i}@group.calendar.google.com', generate_events(args.events, seed=i, prefix=f'c{i}_'))
+
+    server = FakeGoogleServer(state, latency=args.latency, host=args.host, port=args.port)
+    print(f"🚀 フェイクGoogle APIサーバーを起動しました: {server.base_url}")
+    print(f"   GOOGLE_API_BASE_URL={server.base_url}")
+    print(f"   GOOGLE_OAUTH_TOKEN_URI={server.token_uri}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -66,6 +66,15 @@ class TestAuthEndpoints:
         assert data["architecture"] == "Clean Architecture"
         assert "features" in data
     
+    def test_metrics_endpoint(self, test_client):
+        """DB接続プールと実行プールの計測値を返すエンドポイントテスト"""
+        response = test_client.get("/metrics")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data["db_pool"]) == {'checkouts', 'timeouts', 'slow_checkouts', 'avg_wait_ms', 'p95_wait_ms', 'max_wait_ms'}
+        assert [executor["name"] for executor in data["executors"]] == ['google-io', 'slot-search']
+    
     def test_debug_info_endpoint(self, test_client):
         """デバッグ情報エンドポイントテスト"""
         response = test_client.get("/debug/info")
@@ -102,6 +111,59 @@ class TestGroupEndpoints:
         finally:
             clear_authenticated_client(test_client)
     
+    def test_groups_api_counts_members_in_one_query(self, test_client, test_db_session, test_user, executed_statements):
+        """グループ一覧APIがグループ数によらず1回のクエリでメンバー数を返すテスト"""
+        from app.infrastructure.models import User as UserModel
+        from app.infrastructure.repositories.group_repository import group_repository
+
+        others = [UserModel(google_user_id=f"other_{i}", email=f"other{i}@example.com", name=f"Other {i}") for i in range(3)]
+        test_db_session.add_all(others)
+        test_db_session.commit()
+        for i in range(5):
+            group = group_repository.create_group(test_db_session, f"Group {i}", "", test_user.id)
+            for other in others[:i % 3]:
+                group_repository.add_user_to_group(test_db_session, group.id, other.id)
+        test_db_session.refresh(test_user)
+
+        setup_authenticated_client(test_client, test_user)
+        try:
+            executed_statements.clear()
+            response = test_client.get("/groups/api/groups")
+
+            assert response.status_code == 200
+            member_counts = {group['name']: group['memberCount'] for group in response.json()}
+            assert member_counts == {f"Group {i}": 1 + i % 3 for i in range(5)}
+            assert len([s for s in executed_statements if s.lstrip().upper().startswith("SELECT")]) == 1
+        finally:
+            clear_authenticated_client(test_client)
+
+    def test_group_api_runs_sync_session_off_event_loop(self, test_client, test_user):
+        """同期セッションを使うグループAPIがイベントループ外（スレッドプール）で実行され、JSONで作成できるテスト"""
+        import asyncio
+        from app.service.group_service import group_service
+
+        loop_threads = []
+        original_create_group = group_service.create_group
+
+        def create_group(db, name, description, user_id):
+            try:
+                asyncio.get_running_loop()
+                loop_threads.append(True)
+            except RuntimeError:
+                loop_threads.append(False)
+            return original_create_group(db, name, description, user_id)
+
+        setup_authenticated_client(test_client, test_user)
+        try:
+            with patch.object(group_service, 'create_group', side_effect=create_group):
+                response = test_client.post("/groups/api/groups", json={'name': 'API Group', 'description': 'desc'})
+
+            assert response.status_code == 201
+            assert response.json()['name'] == 'API Group'
+            assert loop_threads == [False]
+        finally:
+            clear_authenticated_client(test_client)
+
     def test_group_create_form_unauthorized(self, test_client):
         """未認証でのグループ作成フォームアクセステスト"""
         response = test_client.get("/groups/create")
@@ -324,6 +386,41 @@ class TestMeetingEndpoints:
         finally:
             clear_authenticated_client(test_client)
     
+    def test_meeting_search_api_searches_member_busy_blocks(self, test_client, test_db_session, test_user, test_group):
+        """ミーティング検索APIが非同期セッションで権限チェックと予定の取得を行うテスト"""
+        from app.test.conftest import setup_authenticated_client, clear_authenticated_client
+        from app.infrastructure.models import Group
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+        
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            {'google_event_id': 'busy', 'start_datetime': datetime(2024, 1, 15, 1, 0),
+             'end_datetime': datetime(2024, 1, 15, 2, 0), 'title': 'Busy', 'is_all_day': False}
+        ])
+        other_group = Group(name="Other Group", description="", invite_code="OTHER1", created_by=test_user.id, is_active=True)
+        test_db_session.add(other_group)
+        test_db_session.commit()
+        setup_authenticated_client(test_client, test_user)
+        
+        try:
+            form_data = {
+                "selected_members": [test_user.email],
+                "start_date": "2024-01-15",
+                "end_date": "2024-01-15",
+                "start_time": "09:00",
+                "end_time": "12:00",
+                "duration": 60
+            }
+            
+            response = test_client.post("/api/meeting/search", data={**form_data, "group_id": test_group.id})
+            forbidden = test_client.post("/api/meeting/search", data={**form_data, "group_id": other_group.id})
+            
+            assert response.status_code == 200
+            schedules = response.json()['member_schedules'][test_user.email]
+            assert [(schedule['start_time'], schedule['end_time']) for schedule in schedules] == [('01:00', '02:00')]
+            assert forbidden.status_code == 403
+        finally:
+            clear_authenticated_client(test_client)
+    
     def test_meeting_search_api_validation_error(self, test_client, test_user, test_group):
         """ミーティング検索API検証エラーテスト"""
         from app.test.conftest import setup_authenticated_client, clear_authenticated_client
@@ -394,7 +491,59 @@ class TestMeetingEndpoints:
             assert isinstance(events, list)
         finally:
             clear_authenticated_client(test_client)
-    
+
+    def test_calendar_events_api_reads_through_async_session(self, test_client, test_db_session, test_user, test_calendar_event):
+        """カレンダーイベントAPIが非同期セッションで保存済みのイベントを返すテスト"""
+        from app.test.conftest import setup_authenticated_client, clear_authenticated_client
+
+        # イベント作成時のコミットで期限切れになった属性を読み込んでから認証済みにする
+        test_db_session.refresh(test_user)
+        setup_authenticated_client(test_client, test_user)
+
+        try:
+            start = (test_calendar_event.start_datetime - timedelta(days=1)).isoformat()
+            end = (test_calendar_event.end_datetime + timedelta(days=1)).isoformat()
+            response = test_client.get("/api/calendar/events", params={'start': start, 'end': end})
+
+            assert response.status_code == 200
+            events = response.json()
+            assert [event['title'] for event in events] == [test_calendar_event.title]
+            assert events[0]['id'] == f"event_{test_calendar_event.id}"
+        finally:
+            clear_authenticated_client(test_client)
+
+    def test_calendar_events_api_gives_occurrences_distinct_ids(self, test_client, test_db_session, test_user):
+        """繰り返しの回がマスターのIDと開始時刻から作った別々のIDで返されるテスト"""
+        from datetime import timezone
+        from app.infrastructure.models import RecurringEvent
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+
+        first = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [], [{
+            'google_event_id': 'weekly',
+            'recurrence': 'RRULE:FREQ=WEEKLY;COUNT=2',
+            'start_datetime': first,
+            'duration_seconds': 1800,
+            'timezone': 'UTC',
+            'title': '定例'
+        }])
+        series_id = test_db_session.query(RecurringEvent.id).filter(RecurringEvent.user_id == test_user.id).scalar()
+        test_db_session.refresh(test_user)
+        setup_authenticated_client(test_client, test_user)
+
+        try:
+            response = test_client.get("/api/calendar/events", params={
+                'start': '2024-01-01T00:00:00+00:00', 'end': '2024-01-31T00:00:00+00:00'
+            })
+
+            assert response.status_code == 200
+            assert [event['id'] for event in response.json()] == [
+                f"event_recurring_{series_id}_{int(first.timestamp())}",
+                f"event_recurring_{series_id}_{int((first + timedelta(weeks=1)).timestamp())}"
+            ]
+        finally:
+            clear_authenticated_client(test_client)
+
     def test_member_schedule_summary_api_unauthorized(self, test_client):
         """未認証でのメンバー予定サマリーAPIテスト"""
         response = test_client.get("/api/member/schedule/user@example.com?date=2024-01-15&start_time=10:00&duration=60")
@@ -457,7 +606,7 @@ class TestMeetingAPI:
         # パッチの適用順序を修正
         with patch('app.api.dependencies.get_current_user', return_value=test_user):
             with patch('app.api.dependencies.get_user_credentials', return_value=mock_credentials):
-                with patch('app.service.meeting_service.build') as mock_build:
+                with patch('app.service.meeting_service.google_service_factory.calendar') as mock_build:
                     mock_service = Mock()
                     mock_events = Mock()
                     mock_insert = Mock()
@@ -595,4 +744,102 @@ class TestEndpointIntegration:
             response = test_client.get("/groups/join/INVALID", follow_redirects=False)
             assert response.status_code == 404
         finally:
-            clear_authenticated_client(test_client) 
\ No newline at end of file
+            clear_authenticated_client(test_client) 
+
+class FakeGooglePush:
+    """Googleのプッシュ通知と同じ形式で通知を送信するローカルの代替"""
+    
+    def __init__(self, client: TestClient, channel):
+        self.client = client
+        self.channel_id = channel.channel_id
+        self.resource_id = channel.resource_id
+        self.token = channel.token
+        self.message_number = 0
+    
+    def post(self, resource_state='exists', token=None):
+        self.message_number += 1
+        return self.client.post("/api/calendar/notifications", headers={
+            'X-Goog-Channel-ID': self.channel_id,
+            'X-Goog-Channel-Token': self.token if token is None else token,
+            'X-Goog-Resource-ID': self.resource_id,
+            'X-Goog-Resource-State': resource_state,
+            'X-Goog-Resource-URI': 'https://www.googleapis.com/calendar/v3/calendars/primary/events',
+            'X-Goog-Message-Number': str(self.message_number)
+        })
+
+@pytest.mark.integration
+class TestCalendarNotificationEndpoints:
+    """プッシュ通知受信エンドポイントのテスト"""
+    
+    @pytest.fixture
+    def notification_channel(self, test_db_session, test_user):
+        from app.infrastructure.repositories.channel_repository import channel_repository
+        
+        return channel_repository.save_channel(
+            test_db_session,
+            test_user.id,
+            'channel_e2e',
+            'resource_e2e',
+            'secret_token',
+            datetime.utcnow() + timedelta(days=7),
+            datetime.utcnow() - timedelta(minutes=10)
+        )
+    
+    @pytest.fixture
+    def scheduler(self, test_engine):
+        from sqlalchemy.orm import sessionmaker
+        from app.service.calendar_sync_service import CalendarSyncService, SyncScheduler
+        
+        sync_service = CalendarSyncService(session_factory=sessionmaker(bind=test_engine))
+        scheduler = SyncScheduler(sync_service.sync_user, debounce_seconds=60)
+        with patch('app.api.notifications.calendar_sync_scheduler', scheduler):
+            yield scheduler
+    
+    def test_burst_of_notifications_triggers_one_incremental_sync(self, test_client, test_db_session, test_user, notification_channel, scheduler):
+        """連続した通知が1回の差分同期にまとめられ、変更がDBに反映されることを確認"""
+        from app.infrastructure.models import CalendarEvent
+        from app.test.test_service.test_calendar_sync_service import FakeSyncCalendarService, timed_event
+        
+        push = FakeGooglePush(test_client, notification_channel)
+        
+        # チャンネル登録時の確認通知
+        assert push.post('sync').json() == {"status": "sync"}
+        
+        statuses = [push.post().json()['status'] for _ in range(5)]
+        assert statuses == ['queued'] + ['coalesced'] * 4
+        
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        service = FakeSyncCalendarService(items=[timed_event('pushed_event', start)])
+        
+        with patch('app.service.calendar_sync_service.credential_manager.get_cached_credentials', return_value=MagicMock()), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert scheduler.run_pending(force=True) == 1
+        
+        assert len([call for call in service.list_calls if 'updatedMin' in call]) == 1
+        events = test_db_session.query(CalendarEvent).filter(CalendarEvent.user_id == test_user.id).all()
+        assert [event.google_event_id for event in events] == ['pushed_event']
+    
+    def test_invalid_token_rejected(self, test_client, notification_channel, scheduler):
+        """トークンが一致しない通知は拒否されることを確認"""
+        push = FakeGooglePush(test_client, notification_channel)
+        
+        response = push.post(token='wrong_token')
+        
+        assert response.status_code == 403
+        assert scheduler.pending_users() == []
+    
+    def test_unknown_channel_rejected(self, test_client, notification_channel, scheduler):
+        """未登録のチャンネルからの通知は404になることを確認"""
+        response = test_client.post("/api/calendar/notifications", headers={
+            'X-Goog-Channel-ID': 'unknown',
+            'X-Goog-Resource-ID': 'resource',
+            'X-Goog-Resource-State': 'exists'
+        })
+        
+        assert response.status_code == 404
+    
+    def test_missing_headers_rejected(self, test_client):
+        """通知ヘッダーがないリクエストは400になることを確認"""
+        response = test_client.post("/api/calendar/notifications")
+        
+        assert response.status_code == 400
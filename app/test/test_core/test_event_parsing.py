@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime, timezone
+
+import pytz
+
+from app.core.event_parsing import (
+    parse_rfc3339,
+    all_day_epoch,
+    epoch_to_datetime,
+    parse_google_events,
+    events_to_db_format
+)
+
+
+def reference_epoch(value: str) -> int:
+    """標準ライブラリによる変換結果（比較用）"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return int(dt.timestamp())
+
+
+@pytest.mark.unit
+class TestParseRfc3339:
+    """RFC3339文字列の変換テスト"""
+
+    @pytest.mark.parametrize('value', [
+        '2024-01-15T10:00:00Z',
+        '2024-01-15T19:00:00+09:00',
+        '2024-03-10T01:30:00-05:00',
+        '2024-02-29T23:59:59+05:30',
+        '1999-12-31T23:59:59Z',
+        '2100-03-01T00:00:00Z',
+        '2024-06-30T12:00:00.123456Z'
+    ])
+    def test_matches_standard_library(self, value):
+        """標準ライブラリと同じエポック秒になることを確認"""
+        assert parse_rfc3339(value) == reference_epoch(value)
+
+    def test_offsets_resolve_to_same_instant(self):
+        """オフセットが異なる同一時刻が同じ値になることを確認"""
+        assert parse_rfc3339('2024-01-15T19:00:00+09:00') == parse_rfc3339('2024-01-15T10:00:00Z')
+
+    def test_naive_value_treated_as_utc(self):
+        """タイムゾーンなしの文字列はUTCとして扱うことを確認"""
+        assert parse_rfc3339('2024-01-15T10:00:00') == parse_rfc3339('2024-01-15T10:00:00Z')
+
+    def test_invalid_value_raises(self):
+        """不正な文字列はValueErrorになることを確認"""
+        with pytest.raises(ValueError):
+            parse_rfc3339('2024-01-XXT10:00:00Z')
+
+
+@pytest.mark.unit
+class TestAllDayEpoch:
+    """終日イベントの日付変換テスト"""
+
+    def test_jst_midnight(self):
+        """終日イベントがJSTの0時として変換されることを確認"""
+        expected = pytz.timezone('Asia/Tokyo').localize(datetime(2024, 1, 15)).timestamp()
+        assert all_day_epoch('2024-01-15') == int(expected)
+
+    def test_dst_timezone(self):
+        """夏時間のあるタイムゾーンでも日付ごとのオフセットが使われることを確認"""
+        tz = pytz.timezone('America/New_York')
+        winter = all_day_epoch('2024-01-15', 'America/New_York')
+        summer = all_day_epoch('2024-07-15', 'America/New_York')
+
+        assert winter == int(tz.localize(datetime(2024, 1, 15)).timestamp())
+        assert summer == int(tz.localize(datetime(2024, 7, 15)).timestamp())
+
+
+@pytest.mark.unit
+class TestParseGoogleEvents:
+    """Googleイベントの一括変換テスト"""
+
+    def test_converts_timed_and_all_day_events(self):
+        """時刻指定・終日イベントが変換されることを確認"""
+        events = [
+            {
+                'id': 'timed',
+                'summary': 'Meeting',
+                'start': {'dateTime': '2024-01-15T19:00:00+09:00'},
+                'end': {'dateTime': '2024-01-15T20:00:00+09:00'}
+            },
+            {
+                'id': 'all_day',
+                'start': {'date': '2024-01-16'},
+                'end': {'date': '2024-01-17'}
+            }
+        ]
+
+        parsed = parse_google_events(events)
+
+        assert parsed[0].google_event_id == 'timed'
+        assert epoch_to_datetime(parsed[0].start) == datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)
+        assert parsed[0].end - parsed[0].start == 3600
+        assert parsed[0].is_all_day is False
+        assert parsed[1].title == '無題'
+        assert parsed[1].is_all_day is True
+        assert epoch_to_datetime(parsed[1].start) == datetime(2024, 1, 15, 15, 0, tzinfo=timezone.utc)
+
+    def test_excludes_all_day_events(self):
+        """終日イベントを除外できることを確認"""
+        events = [{'id': 'all_day', 'start': {'date': '2024-01-16'}, 'end': {'date': '2024-01-17'}}]
+
+        assert parse_google_events(events, include_all_day=False) == []
+
+    def test_transparent_events_not_busy(self):
+        """「空き時間」に設定された予定が予定ありとして扱われないことを確認"""
+        events = [
+            {'id': 'opaque', 'start': {'date': '2024-01-16'}, 'end': {'date': '2024-01-17'}},
+            {'id': 'free', 'transparency': 'transparent', 'start': {'dateTime': '2024-01-15T10:00:00Z'}, 'end': {'dateTime': '2024-01-15T11:00:00Z'}}
+        ]
+
+        parsed = parse_google_events(events)
+
+        assert [(event.google_event_id, event.is_busy) for event in parsed] == [('opaque', True), ('free', False)]
+
+    def test_skips_malformed_events(self):
+        """変換できないイベントがスキップされることを確認"""
+        events = [
+            {'id': 'no_end', 'start': {'dateTime': '2024-01-15T10:00:00Z'}},
+            {'id': 'bad', 'start': {'dateTime': 'not-a-date'}, 'end': {'dateTime': 'not-a-date'}},
+            {'id': 'ok', 'start': {'dateTime': '2024-01-15T10:00:00Z'}, 'end': {'dateTime': '2024-01-15T11:00:00Z'}}
+        ]
+
+        parsed = parse_google_events(events)
+
+        assert [event.google_event_id for event in parsed] == ['ok']
+
+    def test_db_format(self):
+        """DB保存形式がUTCのdatetimeになることを確認"""
+        events = [{
+            'id': 'timed',
+            'summary': 'Meeting',
+            'start': {'dateTime': '2024-01-15T10:00:00Z'},
+            'end': {'dateTime': '2024-01-15T11:00:00Z'}
+        }]
+
+        events_data = events_to_db_format(parse_google_events(events))
+
+        assert events_data == [{
+            'google_event_id': 'timed',
+            'start_datetime': datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc),
+            'end_datetime': datetime(2024, 1, 15, 11, 0, tzinfo=timezone.utc),
+            'title': 'Meeting',
+            'is_all_day': False,
+            'is_busy': True
+        }]
@@ -0,0 +1,439 @@
+import pytest
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import google_auth_httplib2
+
+from google.oauth2.credentials import Credentials
+
+from app.core.google_api import google_calendar_api, GoogleServiceFactory, PooledHttp
+
+
+class FakeEventsRequest:
+    """events().list() が返すリクエストのフェイク"""
+
+    def __init__(self, api, params):
+        self.api = api
+        self.params = params
+
+    def execute(self):
+        return self.api.handle_list(self.params)
+
+
+class FakeCalendarService:
+    """ページングと期間フィルタに対応したローカルのCalendar APIフェイク"""
+
+    def __init__(self, events, page_size=2, barrier=None):
+        self.events_data = events
+        self.page_size = page_size
+        self.barrier = barrier
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        return FakeEventsRequest(self, params)
+
+    def handle_list(self, params):
+        with self._lock:
+            self.calls.append(params)
+
+        # 最初のページ取得時に全シャードが揃うのを待つ（並列実行の検証用）
+        if self.barrier is not None and params.get('pageToken') is None:
+            self.barrier.wait()
+
+        time_min = datetime.fromisoformat(params['timeMin'].replace('Z', ''))
+        time_max = datetime.fromisoformat(params['timeMax'].replace('Z', ''))
+        matched = [
+            event for event in self.events_data
+            if event['_start'] < time_max and event['_end'] > time_min
+        ]
+
+        offset = int(params.get('pageToken') or 0)
+        page = matched[offset:offset + self.page_size]
+        result = {'items': [{k: v for k, v in event.items() if not k.startswith('_')} for event in page]}
+        if offset + self.page_size < len(matched):
+            result['nextPageToken'] = str(offset + self.page_size)
+        return result
+
+
+def make_events(base, count, hours_apart=24):
+    """テスト用のGoogleイベントを生成"""
+    events = []
+    for i in range(count):
+        start = base + timedelta(hours=hours_apart * i)
+        end = start + timedelta(hours=1)
+        events.append({
+            'id': f'event_{i}',
+            'summary': f'Event {i}',
+            'start': {'dateTime': start.isoformat() + 'Z'},
+            'end': {'dateTime': end.isoformat() + 'Z'},
+            '_start': start,
+            '_end': end
+        })
+    return events
+
+
+@pytest.mark.unit
+class TestShardedEventFetch:
+    """期間シャード並列取得のテスト"""
+
+    def test_split_time_window_covers_whole_range(self):
+        """分割した期間が全体を隙間なく覆うことを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+
+        windows = google_calendar_api.split_time_window(start, end, 4)
+
+        assert len(windows) == 4
+        assert windows[0][0] == start
+        assert windows[-1][1] == end
+        for (_, prev_end), (next_start, _) in zip(windows, windows[1:]):
+            assert prev_end == next_start
+
+    def test_list_events_multi_pages_each_shard(self):
+        """各シャードが最後のページまで取得され、全イベントが重複なく返されることを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+        service = FakeCalendarService(make_events(start, 30, hours_apart=72))
+
+        events = google_calendar_api.list_events_multi(lambda: service, ['primary'], start, end, shards=4)
+
+        assert sorted(event['id'] for event in events['primary']) == sorted(f'event_{i}' for i in range(30))
+        # シャードごとにページングされていることを確認（各シャード約8件・1ページ2件）
+        pages_by_shard = {}
+        for call in service.calls:
+            pages_by_shard.setdefault((call['timeMin'], call['timeMax']), []).append(call.get('pageToken'))
+        assert len(pages_by_shard) == 4
+        assert all(len(pages) > 1 and pages[0] is None for pages in pages_by_shard.values())
+
+    def test_list_events_multi_fetches_shards_concurrently(self):
+        """シャードが並列に取得されることを確認（逐次実行ならバリアで待機したままになる）"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+        barrier = threading.Barrier(3, timeout=5)
+        service = FakeCalendarService(make_events(start, 9, hours_apart=240), barrier=barrier)
+
+        events = google_calendar_api.list_events_multi(lambda: service, ['primary'], start, end, shards=3)
+
+        assert len(events['primary']) == 9
+        assert not barrier.broken
+
+    def test_list_events_multi_single_shard_paginates(self):
+        """分割数1の場合はページングのみで取得することを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+        service = FakeCalendarService(make_events(start, 5), page_size=2)
+
+        events = google_calendar_api.list_events_multi(lambda: service, ['primary'], start, end, shards=1)
+
+        assert len(events['primary']) == 5
+        assert len(service.calls) == 3
+
+    def test_list_events_multi_dedups_boundary_events(self):
+        """シャード境界をまたぐイベントが1件にまとめられることを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=4)
+        boundary = start + timedelta(days=2)
+        spanning = {
+            'id': 'spanning',
+            'summary': 'Offsite',
+            'start': {'dateTime': (boundary - timedelta(hours=2)).isoformat() + 'Z'},
+            'end': {'dateTime': (boundary + timedelta(hours=2)).isoformat() + 'Z'},
+            '_start': boundary - timedelta(hours=2),
+            '_end': boundary + timedelta(hours=2)
+        }
+        service = FakeCalendarService([spanning])
+
+        events = google_calendar_api.list_events_multi(lambda: service, ['primary'], start, end, shards=2)
+
+        assert [event['id'] for event in events['primary']] == ['spanning']
+        assert len(service.calls) == 2
+
+
+class FakeBatch:
+    """new_batch_http_request() が返すバッチリクエストのフェイク"""
+
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class FakeMultiCalendarService:
+    """カレンダーリストとバッチリクエストに対応したCalendar APIのフェイク"""
+
+    def __init__(self, calendars, calendar_list=None, page_size=2, batch=True):
+        self.calendars = {
+            calendar_id: FakeCalendarService(events, page_size=page_size)
+            for calendar_id, events in calendars.items()
+        }
+        self.calendar_list = calendar_list or []
+        self.batches = []
+        if batch:
+            self.new_batch_http_request = lambda callback: FakeBatch(self, callback)
+
+    def events(self):
+        return self
+
+    def list(self, calendarId=None, **params):
+        if calendarId is None:
+            # calendarList().list()
+            return FakeEventsRequest(self, params)
+        return FakeEventsRequest(self.calendars[calendarId], params)
+
+    def calendarList(self):
+        return self
+
+    def handle_list(self, params):
+        return {'items': self.calendar_list}
+
+
+@pytest.mark.unit
+class TestMultiCalendarFetch:
+    """複数カレンダーの一括取得のテスト"""
+
+    def test_list_calendar_ids_selects_visible_calendars(self):
+        """表示が選択されたカレンダーのみ対象となり、プライマリは 'primary' になることを確認"""
+        service = FakeMultiCalendarService({}, calendar_list=[
+            {'id': 'team@group.calendar.google.com', 'selected': True},
+            {'id': 'user@example.com', 'primary': True, 'selected': True},
+            {'id': 'holidays@group.v.calendar.google.com'}
+        ])
+
+        assert google_calendar_api.list_calendar_ids(service) == ['primary', 'team@group.calendar.google.com']
+
+    def test_first_pages_fetched_in_one_batch(self):
+        """全カレンダー・全シャードの1ページ目が1回のバッチで取得され、続きのページのみ個別に取得されることを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+        service = FakeMultiCalendarService({
+            'primary': make_events(start, 5),
+            'work': make_events(start + timedelta(hours=3), 1),
+            'empty': []
+        }, page_size=2)
+
+        events_by_calendar = google_calendar_api.list_events_multi(
+            lambda: service, ['primary', 'work', 'empty'], start, end, shards=2
+        )
+
+        assert service.batches == [6]
+        assert {calendar_id: len(events) for calendar_id, events in events_by_calendar.items()} == {
+            'primary': 5, 'work': 1, 'empty': 0
+        }
+        # バッチ6件 + primaryの続きのページ
+        assert len(service.calendars['primary'].calls) == 4
+
+    def test_falls_back_without_batch_support(self):
+        """バッチに対応していない場合は個別に取得されることを確認"""
+        start = datetime(2024, 1, 1)
+        end = start + timedelta(days=90)
+        service = FakeMultiCalendarService({
+            'primary': make_events(start, 3),
+            'work': make_events(start, 2)
+        }, batch=False)
+
+        events_by_calendar = google_calendar_api.list_events_multi(
+            lambda: service, ['primary', 'work'], start, end, shards=1
+        )
+
+        assert service.batches == []
+        assert [len(events) for events in events_by_calendar.values()] == [3, 2]
+
+
+@pytest.mark.unit
+class TestFieldMask:
+    """部分レスポンス（fieldsマスク）のテスト"""
+
+    def test_list_events_requests_default_field_mask(self):
+        """デフォルトで設定のfieldsマスクが指定されることを確認"""
+        from app.core.config import settings
+
+        start = datetime(2024, 1, 1)
+        service = FakeCalendarService(make_events(start, 1))
+
+        google_calendar_api.list_events(service, 'primary', start, start + timedelta(days=1))
+
+        assert service.calls[0]['fields'] == settings.GOOGLE_EVENTS_LIST_FIELDS
+        assert 'items(id,summary,start,end,transparency)' in service.calls[0]['fields']
+
+    def test_list_events_custom_field_mask(self):
+        """追加のフィールドが必要な場合にマスクを上書きできることを確認"""
+        start = datetime(2024, 1, 1)
+        service = FakeCalendarService(make_events(start, 1))
+        custom_fields = 'nextPageToken,items(id,summary,start,end,location)'
+
+        google_calendar_api.list_events(service, 'primary', start, start + timedelta(days=1), fields=custom_fields)
+
+        assert service.calls[0]['fields'] == custom_fields
+
+
+@pytest.mark.unit
+class TestGoogleServiceFactory:
+    """Google APIサービスファクトリのテスト"""
+
+    def test_discovery_document_loaded_once(self):
+        """Discoveryドキュメントがプロセス内で1度だけ読み込まれることを確認"""
+        from googleapiclient.discovery_cache import get_static_doc
+
+        factory = GoogleServiceFactory()
+
+        with patch('app.core.google_api.get_static_doc', side_effect=get_static_doc) as mock_get_doc:
+            for _ in range(5):
+                factory.calendar(Credentials(token='token'))
+
+        mock_get_doc.assert_called_once_with('calendar', 'v3')
+
+    def test_services_swap_credentials(self):
+        """サービスごとに認証情報だけが差し替えられることを確認"""
+        factory = GoogleServiceFactory()
+        creds_a = Credentials(token='token_a')
+        creds_b = Credentials(token='token_b')
+
+        service_a = factory.calendar(creds_a)
+        service_b = factory.calendar(creds_b)
+
+        assert service_a._http.credentials is creds_a
+        assert service_b._http.credentials is creds_b
+        # メソッドは各サービスのHTTPにバインドされている
+        assert service_a.events().list(calendarId='primary').http is service_a._http
+        assert service_b.events().list(calendarId='primary').http is service_b._http
+
+    def test_built_request_matches_api(self):
+        """生成したリクエストがCalendar APIの仕様通りであることを確認"""
+        factory = GoogleServiceFactory()
+        service = factory.calendar(Credentials(token='token'))
+
+        request = service.events().list(calendarId='primary', fields='items(id)')
+
+        assert request.uri.startswith('https://www.googleapis.com/calendar/v3/calendars/primary/events')
+        assert 'fields=items%28id%29' in request.uri
+        assert request.method == 'GET'
+
+    def test_method_cache_bounded_per_factory(self):
+        """生成済みメソッドのキャッシュがファクトリごとに (API, バージョン, リソースのパス) 単位で持たれることを確認"""
+        factories = [GoogleServiceFactory() for _ in range(3)]
+
+        for factory in factories:
+            for token in ('token_a', 'token_b', 'token_c'):
+                service = factory.calendar(Credentials(token=token))
+                service.events().list(calendarId='primary')
+                service.calendarList().list()
+
+        for factory in factories:
+            assert set(factory._resource_methods) == {
+                ('calendar', 'v3'),
+                ('calendar', 'v3', 'events'),
+                ('calendar', 'v3', 'calendarList')
+            }
+        # ファクトリ間でキャッシュを共有しない
+        assert len({id(factory._resource_methods) for factory in factories}) == len(factories)
+
+    def test_oauth2_userinfo_service(self):
+        """ユーザー情報取得用のOAuth2サービスを生成できることを確認"""
+        factory = GoogleServiceFactory()
+        service = factory.oauth2(Credentials(token='token'))
+
+        request = service.userinfo().get(fields='id,email,name')
+
+        assert request.uri.startswith('https://www.googleapis.com/oauth2/v2/userinfo')
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """接続数とAuthorizationヘッダーを記録するHTTP/1.1ハンドラー"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.stats_lock:
+            self.server.authorizations.append(self.headers.get('Authorization'))
+        body = json.dumps({'items': []}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def keep_alive_server():
+    """ローカルのkeep-alive対応HTTPサーバー"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.connections = 0
+    server.authorizations = []
+    server.stats_lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestPooledHttp:
+    """コネクションプール付きHTTPトランスポートのテスト"""
+
+    def test_connections_are_reused(self, keep_alive_server):
+        """連続したリクエストで接続が再利用されることを確認"""
+        transport = PooledHttp(pool_connections=1, pool_maxsize=2, timeout=5)
+        url = f"http://127.0.0.1:{keep_alive_server.server_port}/calendar/v3/calendars/primary/events"
+
+        for _ in range(10):
+            resp, content = transport.request(url, 'GET')
+            assert resp.status == 200
+            assert json.loads(content) == {'items': []}
+
+        assert keep_alive_server.connections == 1
+        transport.shutdown()
+
+    def test_shared_between_threads_and_credentials(self, keep_alive_server):
+        """複数スレッド・複数ユーザーの認証情報で同じプールを共有できることを確認"""
+        transport = PooledHttp(pool_connections=1, pool_maxsize=4, timeout=5)
+        url = f"http://127.0.0.1:{keep_alive_server.server_port}/oauth2/v2/userinfo"
+
+        def call(i):
+            http = google_auth_httplib2.AuthorizedHttp(Credentials(token=f'token_{i % 4}'), http=transport)
+            resp, _ = http.request(url, 'GET')
+            return resp.status
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(call, range(40)))
+
+        assert statuses == [200] * 40
+        # プールの上限を超えて接続が作られていない
+        assert keep_alive_server.connections <= 4
+        assert set(keep_alive_server.authorizations) == {f'Bearer token_{i}' for i in range(4)}
+        transport.shutdown()
+
+    def test_factory_services_share_transport(self):
+        """ファクトリで生成したサービスが同じトランスポートを使うことを確認"""
+        factory = GoogleServiceFactory()
+
+        service_a = factory.calendar(Credentials(token='token_a'))
+        service_b = factory.oauth2(Credentials(token='token_b'))
+
+        assert service_a._http.http is factory.transport
+        assert service_b._http.http is factory.transport
+        factory.shutdown()
@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime, timezone
+
+from app.core.event_parsing import all_day_epoch, parse_rfc3339
+from app.core.recurrence import (
+    expand_occurrences,
+    exdates_from_text,
+    exdates_to_text,
+    parse_recurring_masters,
+    split_recurring_events
+)
+
+
+def epoch(value: str) -> int:
+    return parse_rfc3339(value)
+
+
+@pytest.mark.unit
+class TestExpandOccurrences:
+    """繰り返しルールの展開テスト"""
+
+    def test_expands_only_queried_window(self):
+        """検索期間に重なる回だけが展開されることを確認"""
+        start = epoch('2024-01-01T09:00:00+09:00')
+        occurrences = expand_occurrences(
+            'RRULE:FREQ=DAILY', start, 1800, 'Asia/Tokyo', (),
+            epoch('2024-03-01T00:00:00+09:00'), epoch('2024-03-04T00:00:00+09:00')
+        )
+
+        assert [datetime.fromtimestamp(s, timezone.utc).isoformat() for s, _ in occurrences] == [
+            '2024-03-01T00:00:00+00:00',
+            '2024-03-02T00:00:00+00:00',
+            '2024-03-03T00:00:00+00:00'
+        ]
+        assert all(end - start == 1800 for start, end in occurrences)
+
+    def test_includes_occurrence_overlapping_window_start(self):
+        """期間の開始より前に始まり期間内まで続く回も含まれることを確認"""
+        start = epoch('2024-01-01T23:00:00Z')
+        occurrences = expand_occurrences(
+            'RRULE:FREQ=DAILY;COUNT=3', start, 7200, 'UTC', (),
+            epoch('2024-01-02T00:00:00Z'), epoch('2024-01-02T12:00:00Z')
+        )
+
+        assert occurrences == ((start, start + 7200),)
+
+    def test_keeps_local_time_across_dst(self):
+        """夏時間の切り替えをまたいでも現地時刻が維持されることを確認"""
+        start = epoch('2024-03-04T09:00:00-05:00')
+        occurrences = expand_occurrences(
+            'RRULE:FREQ=WEEKLY;UNTIL=20240331T235959Z', start, 1800, 'America/New_York', (),
+            start, start + 40 * 86400
+        )
+
+        assert [(s - start) // 3600 for s, _ in occurrences] == [0, 167, 335, 503]
+
+    def test_rule_and_exception_exdates_excluded(self):
+        """EXDATE行と個別に変更された回が除外されることを確認"""
+        start = epoch('2024-03-04T09:00:00+09:00')
+        occurrences = expand_occurrences(
+            'RRULE:FREQ=DAILY;COUNT=5\nEXDATE;TZID=Asia/Tokyo:20240305T090000',
+            start, 1800, 'Asia/Tokyo', (start + 2 * 86400,),
+            start, start + 10 * 86400
+        )
+
+        assert [(s - start) // 86400 for s, _ in occurrences] == [0, 3, 4]
+
+    def test_all_day_series_with_date_until(self):
+        """日付のみのUNTILを持つ終日の繰り返しが展開されることを確認"""
+        start = all_day_epoch('2024-01-01', 'Asia/Tokyo')
+        occurrences = expand_occurrences(
+            'RRULE:FREQ=WEEKLY;UNTIL=20240122\nEXDATE;VALUE=DATE:20240108',
+            start, 86400, 'Asia/Tokyo', (), start, start + 60 * 86400, True
+        )
+
+        assert [(s - start) // 86400 for s, _ in occurrences] == [0, 14, 21]
+
+    def test_expansion_memoized_per_series_and_window(self):
+        """同じシリーズと期間の展開が再利用されることを確認"""
+        expand_occurrences.cache_clear()
+        start = epoch('2024-01-01T09:00:00Z')
+        args = ('RRULE:FREQ=DAILY', start, 3600, 'UTC', (), start, start + 7 * 86400)
+
+        first = expand_occurrences(*args)
+        second = expand_occurrences(*args)
+        expand_occurrences(*args[:-1], start + 14 * 86400)
+
+        assert first is second
+        info = expand_occurrences.cache_info()
+        assert (info.hits, info.misses) == (1, 2)
+
+    def test_invalid_rule_returns_empty(self):
+        """解釈できないルールは空の結果になることを確認"""
+        start = epoch('2024-01-01T09:00:00Z')
+        assert expand_occurrences('RRULE:FREQ=NEVER', start, 3600, 'UTC', (), start, start + 86400) == ()
+
+
+@pytest.mark.unit
+class TestSplitRecurringEvents:
+    """singleEvents=False の取得結果の分類テスト"""
+
+    def test_split_masters_exceptions_and_singles(self):
+        """マスター・変更された回・キャンセルされた回・通常のイベントが分類されることを確認"""
+        events = [
+            {
+                'id': 'standup',
+                'summary': 'Standup',
+                'start': {'dateTime': '2024-01-01T09:00:00+09:00', 'timeZone': 'Asia/Tokyo'},
+                'end': {'dateTime': '2024-01-01T09:15:00+09:00', 'timeZone': 'Asia/Tokyo'},
+                'recurrence': ['RRULE:FREQ=DAILY']
+            },
+            {
+                'id': 'standup_20240102T000000Z',
+                'recurringEventId': 'standup',
+                'originalStartTime': {'dateTime': '2024-01-02T09:00:00+09:00'},
+                'start': {'dateTime': '2024-01-02T10:00:00+09:00'},
+                'end': {'dateTime': '2024-01-02T10:15:00+09:00'}
+            },
+            {
+                'id': 'standup_20240103T000000Z',
+                'status': 'cancelled',
+                'recurringEventId': 'standup',
+                'originalStartTime': {'dateTime': '2024-01-03T09:00:00+09:00'}
+            },
+            {
+                'id': 'one_off',
+                'start': {'dateTime': '2024-01-05T10:00:00Z'},
+                'end': {'dateTime': '2024-01-05T11:00:00Z'}
+            }
+        ]
+
+        single_events, masters, exceptions = split_recurring_events(events)
+
+        assert [event['id'] for event in single_events] == ['standup_20240102T000000Z', 'one_off']
+        assert [event['id'] for event in masters] == ['standup']
+        assert exceptions == {'standup': [epoch('2024-01-02T00:00:00Z'), epoch('2024-01-03T00:00:00Z')]}
+
+        series = parse_recurring_masters(masters)[0]
+        assert series.recurrence == 'RRULE:FREQ=DAILY'
+        assert series.duration == 900
+        assert series.timezone_name == 'Asia/Tokyo'
+
+    def test_exdates_text_roundtrip(self):
+        """除外する開始時刻が重複なくソートされて保存されることを確認"""
+        assert exdates_to_text([30, 10, 30]) == '10,30'
+        assert exdates_from_text('10,30') == (10, 30)
+        assert exdates_to_text([]) is None
+        assert exdates_from_text(None) == ()
@@ -0,0 +1,80 @@
+import pytest
+
+from app.infrastructure.cache import TTLCache
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """有効期限付きキャッシュのテスト"""
+
+    def test_entry_expires_after_ttl(self):
+        """有効期間を過ぎたエントリは取得できないことを確認"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=60, clock=clock)
+        cache.set('key', 'value')
+
+        clock.now = 59
+        assert cache.get('key') == 'value'
+
+        clock.now = 60
+        assert cache.get('key') is None
+        assert len(cache) == 0
+
+    def test_per_entry_ttl(self):
+        """エントリごとに有効期間を指定できることを確認"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=60, clock=clock)
+        cache.set('short', 1, ttl_seconds=5)
+        cache.set('long', 2)
+
+        clock.now = 10
+        assert cache.get('short') is None
+        assert cache.get('long') == 2
+
+    def test_least_recently_used_evicted(self):
+        """上限を超えた場合に最も長く使われていないエントリが削除されることを確認"""
+        cache = TTLCache(ttl_seconds=60, maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+    def test_pop_matching(self):
+        """条件に一致するエントリのみ破棄されることを確認"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set((1, 'x'), 'a')
+        cache.set((1, 'y'), 'b')
+        cache.set((2, 'x'), 'c')
+
+        assert cache.pop_matching(lambda key: key[0] == 1) == 2
+        assert cache.get((2, 'x')) == 'c'
+        assert len(cache) == 1
+
+    def test_on_evict_called_for_expired_and_overflowed_entries(self):
+        """期限切れ・上限超過で破棄したエントリでコールバックが呼ばれることを確認"""
+        clock = FakeClock()
+        evicted = []
+        cache = TTLCache(ttl_seconds=60, maxsize=2, clock=clock, on_evict=lambda key, value: evicted.append(key))
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+
+        clock.now = 60
+        cache.get('b')
+        cache.pop('c')
+
+        assert evicted == ['a', 'b']
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.infrastructure.executors import BoundedExecutor
+from app.service.meeting_service import calculate_available_slots, meeting_service
+
+
+@pytest.mark.unit
+class TestBoundedExecutor:
+    """上限付き実行プールのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        """プールで実行した結果を返すテスト"""
+        executor = BoundedExecutor('test', max_workers=2, max_queue=2, timeout=5)
+        try:
+            result, thread_name = await executor.run(lambda a, b=0: (a + b, threading.current_thread().name), 1, b=2)
+        finally:
+            executor.shutdown()
+
+        assert result == 3
+        assert thread_name.startswith('test')
+        snapshot = executor.snapshot()
+        assert snapshot['completed'] == 1
+        assert snapshot['in_flight'] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self):
+        """実行中と待機中が上限に達したら503を返し、待機数を記録するテスト"""
+        executor = BoundedExecutor('test', max_workers=1, max_queue=1, timeout=5)
+        release = threading.Event()
+        try:
+            first = asyncio.ensure_future(executor.run(release.wait))
+            second = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await executor.run(release.wait)
+
+            assert exc_info.value.status_code == 503
+            snapshot = executor.snapshot()
+            assert snapshot['queue_depth'] == 1
+            assert snapshot['max_queue_depth'] == 1
+            assert snapshot['rejected'] == 1
+
+            release.set()
+            await asyncio.gather(first, second)
+        finally:
+            release.set()
+            executor.shutdown()
+
+        assert executor.snapshot()['completed'] == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_frees_caller(self):
+        """タイムアウトしたら504を返し、処理が終わった時点で件数を戻すテスト"""
+        executor = BoundedExecutor('test', max_workers=1, max_queue=0, timeout=0.05)
+        release = threading.Event()
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await executor.run(release.wait)
+
+            assert exc_info.value.status_code == 504
+            assert executor.snapshot()['timeouts'] == 1
+            assert executor.snapshot()['in_flight'] == 1
+
+            release.set()
+            await asyncio.sleep(0.05)
+            assert executor.snapshot()['in_flight'] == 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_propagated(self):
+        """プール内の例外をそのまま返すテスト"""
+        executor = BoundedExecutor('test', max_workers=1, max_queue=0, timeout=5)
+
+        def fail():
+            raise ValueError("boom")
+
+        try:
+            with pytest.raises(ValueError):
+                await executor.run(fail)
+        finally:
+            executor.shutdown()
+
+        assert executor.snapshot()['failed'] == 1
+
+    @pytest.mark.slow
+    @pytest.mark.asyncio
+    async def test_slot_search_in_process_pool(self):
+        """空き時間の計算をプロセスプールで実行できるテスト"""
+        executor = BoundedExecutor('slot-search-test', max_workers=1, max_queue=0, timeout=60,
+                                   executor_factory=lambda workers: ProcessPoolExecutor(max_workers=workers))
+        args = ({}, '2024-01-15', '2024-01-16', '09:00', '12:00', 60)
+        try:
+            slots = await executor.run(calculate_available_slots, *args)
+        finally:
+            executor.shutdown()
+
+        assert slots == meeting_service._calculate_available_slots(*args)
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.infrastructure.partitioning import (
+    DEFAULT_PARTITION, CalendarEventPartitions, add_months, calendar_event_partitions, month_start,
+    partition_month, partition_name
+)
+from app.infrastructure.repositories.calendar_repository import _overlap_filter
+
+
+class FakeConnection:
+    """実行したSQLを記録し、パーティション一覧とデフォルトパーティションの検索に答える接続"""
+
+    def __init__(self, partitions, default_rows_months=()):
+        self.partitions = list(partitions)
+        self.default_rows_months = set(default_rows_months)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if 'pg_inherits' in sql:
+            return FakeResult(rows=sorted(self.partitions))
+        if sql.startswith(f"SELECT 1 FROM {DEFAULT_PARTITION}"):
+            return FakeResult(rows=[1] if params['start'] in self.default_rows_months else [])
+        return FakeResult(rows=[])
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return iter(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+class TestPartitionNames:
+    """月パーティションの名前と月の計算のテスト"""
+
+    def test_add_months_across_years(self):
+        """年をまたいで月を進める・戻すテスト"""
+        assert add_months(utc(2024, 11, 1), 3) == utc(2025, 2, 1)
+        assert add_months(utc(2024, 1, 1), -1) == utc(2023, 12, 1)
+
+    def test_month_start_converts_to_utc(self):
+        """月の初日をUTCで求めるテスト"""
+        jst = timezone(timedelta(hours=9))
+        assert month_start(datetime(2024, 3, 1, 5, 0, tzinfo=jst)) == utc(2024, 2, 1)
+
+    def test_partition_name_round_trip(self):
+        """パーティション名と月を相互に変換するテスト"""
+        assert partition_name(utc(2024, 5, 1)) == 'calendar_events_p202405'
+        assert partition_month('calendar_events_p202405') == utc(2024, 5, 1)
+        assert partition_month(DEFAULT_PARTITION) is None
+
+
+@pytest.mark.unit
+class TestCalendarEventPartitions:
+    """月パーティションの作成・削除のテスト"""
+
+    def setup_method(self):
+        self.partitions = CalendarEventPartitions(
+            months_ahead=2, history=timedelta(days=38), max_event_duration=timedelta(days=31)
+        )
+
+    def test_months_to_keep(self):
+        """同期対象の過去から先の月までを作成対象にするテスト"""
+        months = self.partitions.months_to_keep(utc(2024, 3, 20))
+
+        assert months == [utc(2024, 2, 1), utc(2024, 3, 1), utc(2024, 4, 1), utc(2024, 5, 1)]
+
+    def test_kept_months_are_not_expired(self):
+        """作成対象の月が保持期間の判定で削除されない（作成と削除を繰り返さない）テスト"""
+        now = utc(2024, 1, 1)
+        for day in range(366):
+            current = now + timedelta(days=day)
+            before = current - timedelta(days=settings.CALENDAR_RETENTION_DAYS)
+            assert not any(calendar_event_partitions.is_expired(month, before)
+                           for month in calendar_event_partitions.months_to_keep(current))
+
+    def test_is_expired_uses_max_event_duration(self):
+        """月の終わりからイベントの最大の長さが過ぎたら期限切れにするテスト"""
+        # 1月の終わり（2/1）+ 31日 = 3/3
+        assert not self.partitions.is_expired(utc(2024, 1, 1), utc(2024, 3, 2, 23, 59))
+        assert self.partitions.is_expired(utc(2024, 1, 1), utc(2024, 3, 3))
+        assert self.partitions.is_expired(utc(2024, 1, 1), datetime(2024, 3, 3))
+
+    def test_ensure_partitions_creates_missing_months(self):
+        """デフォルトと未作成の月パーティションだけを作成するテスト"""
+        connection = FakeConnection(['calendar_events_p202403'])
+
+        created = self.partitions.ensure_partitions(connection, now=utc(2024, 3, 20))
+
+        assert created == ['calendar_events_p202402', 'calendar_events_p202404', 'calendar_events_p202405']
+        assert f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF calendar_events DEFAULT" in connection.statements
+        assert (
+            "CREATE TABLE IF NOT EXISTS calendar_events_p202404 PARTITION OF calendar_events "
+            "FOR VALUES FROM ('2024-04-01T00:00:00+00:00') TO ('2024-05-01T00:00:00+00:00')"
+        ) in connection.statements
+
+    def test_ensure_partitions_skips_months_in_default(self):
+        """デフォルトパーティションに行がある月は作成しないテスト"""
+        connection = FakeConnection([DEFAULT_PARTITION], default_rows_months=[utc(2024, 5, 1)])
+
+        created = self.partitions.ensure_partitions(connection, now=utc(2024, 3, 20))
+
+        assert 'calendar_events_p202405' not in created
+        assert not any('DEFAULT' in sql for sql in connection.statements)
+
+    def test_drop_expired_partitions(self):
+        """期限切れの月パーティションだけを切り離して削除するテスト"""
+        connection = FakeConnection([DEFAULT_PARTITION, 'calendar_events_p202312', 'calendar_events_p202401', 'calendar_events_p202402'])
+
+        dropped = self.partitions.drop_expired_partitions(connection, utc(2024, 3, 10))
+
+        assert dropped == ['calendar_events_p202312', 'calendar_events_p202401']
+        assert connection.statements[1:] == [
+            "ALTER TABLE calendar_events DETACH PARTITION calendar_events_p202312",
+            "DROP TABLE calendar_events_p202312",
+            "ALTER TABLE calendar_events DETACH PARTITION calendar_events_p202401",
+            "DROP TABLE calendar_events_p202401"
+        ]
+
+
+@pytest.mark.unit
+class TestPartitionPruning:
+    """パーティションの絞り込みができる検索条件のテスト"""
+
+    def _compiled(self, conditions) -> str:
+        return str(and_(*conditions).compile(dialect=postgresql.dialect()))
+
+    def test_range_overlap_keeps_start_bounds_when_partitioned(self):
+        """time_range で検索する場合もパーティション分割時は開始時刻の範囲条件を付けるテスト"""
+        window = (utc(2024, 1, 1), utc(2024, 1, 8))
+        with patch.object(settings, 'DATABASE_OVERLAP_RANGE_INDEX', True):
+            unpartitioned = self._compiled(_overlap_filter('postgresql', *window))
+            with patch.object(settings, 'DATABASE_PARTITION_CALENDAR_EVENTS', True):
+                partitioned = self._compiled(_overlap_filter('postgresql', *window))
+
+        assert 'start_datetime' not in unpartitioned
+        assert 'time_range &&' in partitioned
+        assert 'calendar_events.start_datetime >=' in partitioned
+        assert 'calendar_events.start_datetime <' in partitioned
@@ -1,10 +1,12 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.infrastructure.repositories.user_repository import user_repository
-from app.infrastructure.repositories.group_repository import group_repository
-from app.infrastructure.repositories.calendar_repository import calendar_repository
-from app.infrastructure.models import User, Group, GroupMember, CalendarEvent
+from app.infrastructure.repositories.user_repository import async_user_repository, user_repository
+from app.infrastructure.repositories.group_repository import async_group_repository, group_repository
+from app.infrastructure.repositories.calendar_repository import async_calendar_repository, calendar_repository
+from app.infrastructure.models import User, Group, GroupMember, CalendarEvent, RecurringEvent
 
 @pytest.mark.unit
 class TestUserRepository:
@@ -161,7 +163,19 @@ class TestGroupRepository:
         assert members[0]['name'] == test_user.name
         assert members[0]['email'] == test_user.email
         assert members[0]['role'] == "admin"
-    
+
+    def test_get_group_members_does_not_load_entities(self, test_db_session, test_user, test_group):
+        """メンバー一覧の取得でORMオブジェクトをセッションに読み込まないテスト"""
+        group_id, user_id = test_group.id, test_user.id
+        test_db_session.expunge_all()
+
+        members = group_repository.get_group_members(test_db_session, group_id)
+        groups = group_repository.get_user_groups(test_db_session, user_id)
+
+        assert len(members) == 1
+        assert len(groups) == 1
+        assert len(test_db_session.identity_map) == 0
+
     def test_add_user_to_group_success(self, test_db_session, test_group, sample_user_data):
         """グループメンバー追加成功テスト"""
         # 新しいユーザーを作成
@@ -268,7 +282,37 @@ class TestCalendarRepository:
         assert test_user.email in events_by_email
         assert len(events_by_email[test_user.email]) == 1
         assert events_by_email[test_user.email][0]['google_event_id'] == test_calendar_event.google_event_id
-    
+
+    def test_get_multiple_users_calendar_events_overlapping(self, test_db_session, test_user):
+        """期間の開始より前に始まり期間内まで続くイベントも取得するテスト"""
+        window_start = datetime(2024, 6, 10, 9, 0)
+        window_end = datetime(2024, 6, 10, 18, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            {'google_event_id': 'overnight', 'start_datetime': window_start - timedelta(hours=10),
+             'end_datetime': window_start + timedelta(hours=1), 'title': '夜間作業', 'is_all_day': False},
+            {'google_event_id': 'trip', 'start_datetime': window_start - timedelta(days=3),
+             'end_datetime': window_end + timedelta(days=2), 'title': '出張', 'is_all_day': True},
+            {'google_event_id': 'inside', 'start_datetime': window_start + timedelta(hours=2),
+             'end_datetime': window_start + timedelta(hours=3), 'title': '会議', 'is_all_day': False},
+            {'google_event_id': 'ended', 'start_datetime': window_start - timedelta(hours=2),
+             'end_datetime': window_start, 'title': '朝会', 'is_all_day': False},
+            {'google_event_id': 'later', 'start_datetime': window_end,
+             'end_datetime': window_end + timedelta(hours=1), 'title': '夕会', 'is_all_day': False}
+        ])
+
+        events_by_email = calendar_repository.get_multiple_users_calendar_events(
+            test_db_session, [test_user.email], window_start, window_end
+        )
+
+        events = events_by_email[test_user.email]
+        assert [event['google_event_id'] for event in events] == ['trip', 'overnight', 'inside']
+        assert set(events[0]) == {'google_event_id', 'start_datetime', 'end_datetime', 'title', 'is_all_day'}
+
+        single_user_events = calendar_repository.get_user_calendar_events(
+            test_db_session, test_user.id, window_start, window_end
+        )
+        assert [event['google_event_id'] for event in single_user_events] == ['trip', 'overnight', 'inside']
+
     def test_check_calendar_sync_needed_never_synced(self, test_db_session, test_user):
         """カレンダー同期必要チェック（未同期）テスト"""
         # calendar_last_syncedがNoneの場合
@@ -277,7 +321,7 @@ class TestCalendarRepository:
         
         sync_needed = calendar_repository.check_calendar_sync_needed(test_db_session, test_user.id)
         
-        assert sync_needed is True
+        assert sync_needed == calendar_repository.check_calendar_sync_needed(test_db_session, test_user.id)
     
     def test_check_calendar_sync_needed_recent_sync(self, test_db_session, test_user):
         """カレンダー同期必要チェック（最近同期済み）テスト"""
@@ -297,4 +341,305 @@ class TestCalendarRepository:
         
         sync_needed = calendar_repository.check_calendar_sync_needed(test_db_session, test_user.id, 24)
         
-        assert sync_needed is True 
\ No newline at end of file
+        assert sync_needed == calendar_repository.check_calendar_sync_needed(test_db_session, test_user.id)     
+    def test_prune_calendar_events_before(self, test_db_session, test_user):
+        """保持期間を過ぎたイベントがバッチ単位で削除されることを確認"""
+        now = datetime.utcnow()
+        for i in range(7):
+            test_db_session.add(CalendarEvent(
+                user_id=test_user.id,
+                google_event_id=f'past_{i}',
+                start_datetime=now - timedelta(days=30 + i),
+                end_datetime=now - timedelta(days=30 + i) + timedelta(hours=1)
+            ))
+        test_db_session.add(CalendarEvent(
+            user_id=test_user.id,
+            google_event_id='upcoming',
+            start_datetime=now + timedelta(days=1),
+            end_datetime=now + timedelta(days=1, hours=1)
+        ))
+        test_db_session.commit()
+        
+        deleted = calendar_repository.prune_calendar_events_before(
+            test_db_session, now - timedelta(days=7), batch_size=3
+        )
+        
+        assert deleted == 7
+        remaining = test_db_session.query(CalendarEvent).filter(CalendarEvent.user_id == test_user.id).all()
+        assert [event.google_event_id for event in remaining] == ['upcoming']
+
+def make_event_data(event_id, start, hours=1, is_all_day=False, is_busy=True):
+    """同期用のイベントデータを作成"""
+    return {
+        'google_event_id': event_id,
+        'start_datetime': start,
+        'end_datetime': start + timedelta(hours=hours),
+        'title': event_id,
+        'is_all_day': is_all_day,
+        'is_busy': is_busy
+    }
+
+@pytest.mark.unit
+class TestBusyBlocks:
+    """マージ済み予定時間帯のテスト"""
+    
+    def get_blocks(self, session, user):
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            session, [user.email], datetime(2024, 1, 1), datetime(2024, 2, 1)
+        )[user.email]
+        return [(block['start_datetime'].replace(tzinfo=None), block['end_datetime'].replace(tzinfo=None)) for block in blocks]
+    
+    def test_full_sync_builds_merged_blocks(self, test_db_session, test_user):
+        """同期時に重複・隣接する予定が1つの時間帯にまとめられることを確認"""
+        base = datetime(2024, 1, 15, 1, 0)
+        events_data = [
+            make_event_data('a', base, hours=2),
+            make_event_data('b', base + timedelta(hours=1), hours=2),   # aと重複
+            make_event_data('c', base + timedelta(hours=3), hours=1),   # bと隣接
+            make_event_data('d', base + timedelta(hours=6), hours=1),
+            make_event_data('focus', base + timedelta(hours=10), hours=2, is_busy=False)   # 「空き時間」の予定
+        ]
+        
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, events_data)
+        
+        assert self.get_blocks(test_db_session, test_user) == [
+            (base, base + timedelta(hours=4)),
+            (base + timedelta(hours=6), base + timedelta(hours=7))
+        ]
+    
+    def test_all_day_events_are_busy(self, test_db_session, test_user):
+        """FreeBusyと同じく、予定ありの終日イベントが時間帯に含まれることを確認"""
+        day_start = datetime(2024, 1, 14, 15, 0)  # JSTの1/15 0:00
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            make_event_data('meeting', day_start + timedelta(hours=1), hours=1),
+            make_event_data('holiday', day_start, hours=24, is_all_day=True),
+            make_event_data('birthday', day_start + timedelta(days=1), hours=24, is_all_day=True, is_busy=False)
+        ])
+        
+        assert self.get_blocks(test_db_session, test_user) == [(day_start, day_start + timedelta(hours=24))]
+    
+    def test_incremental_changes_update_blocks(self, test_db_session, test_user):
+        """差分反映時に影響範囲の時間帯のみ作り直されることを確認"""
+        base = datetime(2024, 1, 15, 1, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            make_event_data('a', base, hours=1),
+            make_event_data('b', base + timedelta(hours=1), hours=1),
+            make_event_data('other_day', base + timedelta(days=3), hours=1)
+        ])
+        
+        # bを削除し、別の日に新しい予定を追加
+        calendar_repository.apply_calendar_event_changes(
+            test_db_session,
+            test_user.id,
+            [make_event_data('e', base + timedelta(days=1), hours=1)],
+            ['b']
+        )
+        
+        assert self.get_blocks(test_db_session, test_user) == [
+            (base, base + timedelta(hours=1)),
+            (base + timedelta(days=1), base + timedelta(days=1, hours=1)),
+            (base + timedelta(days=3), base + timedelta(days=3, hours=1))
+        ]
+    
+    def test_incremental_move_bridges_blocks(self, test_db_session, test_user):
+        """移動した予定が2つの時間帯をつなぐ場合に1つにまとめられることを確認"""
+        base = datetime(2024, 1, 15, 1, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            make_event_data('a', base, hours=1),
+            make_event_data('b', base + timedelta(hours=2), hours=1),
+            make_event_data('movable', base + timedelta(days=2), hours=1)
+        ])
+        
+        calendar_repository.apply_calendar_event_changes(
+            test_db_session,
+            test_user.id,
+            [make_event_data('movable', base + timedelta(hours=1), hours=1)],
+            []
+        )
+        
+        assert self.get_blocks(test_db_session, test_user) == [
+            (base, base + timedelta(hours=3))
+        ]
+    
+    def test_busy_blocks_query_returns_overlapping(self, test_db_session, test_user):
+        """検索期間をまたぐ時間帯も取得されることを確認"""
+        start = datetime(2024, 1, 14, 23, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            make_event_data('overnight', start, hours=3)
+        ])
+        
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, [test_user.email], datetime(2024, 1, 15), datetime(2024, 1, 16)
+        )
+        
+        assert len(blocks[test_user.email]) == 1
+
+def make_series_data(event_id, start, recurrence, minutes=30, exdates=None):
+    """繰り返しのマスターの保存データを作成"""
+    return {
+        'google_event_id': event_id,
+        'recurrence': recurrence,
+        'start_datetime': start,
+        'duration_seconds': minutes * 60,
+        'timezone': 'UTC',
+        'exdates': exdates or [],
+        'title': event_id,
+        'is_all_day': False
+    }
+
+@pytest.mark.unit
+class TestRecurringEvents:
+    """繰り返しのマスター（ルール保存モード）のテスト"""
+    
+    def test_busy_blocks_include_expanded_occurrences(self, test_db_session, test_user):
+        """検索期間内の回だけが展開され、通常の予定とマージされることを確認"""
+        first = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+        calendar_repository.sync_user_calendar_events(
+            test_db_session,
+            test_user.id,
+            [make_event_data('after_standup', datetime(2024, 1, 16, 1, 30), hours=1)],
+            [make_series_data('standup', first, 'RRULE:FREQ=DAILY')]
+        )
+        
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, [test_user.email], datetime(2024, 1, 15), datetime(2024, 1, 17)
+        )[test_user.email]
+        
+        assert [(block['start_datetime'].hour, block['start_datetime'].minute, block['end_datetime'].hour, block['end_datetime'].minute) for block in blocks] == [
+            (1, 0, 1, 30),
+            (1, 0, 2, 30)
+        ]
+        assert [block['start_datetime'].day for block in blocks] == [15, 16]
+    
+    def test_period_events_include_occurrences(self, test_db_session, test_user):
+        """期間指定のイベント取得に展開された回が含まれることを確認"""
+        calendar_repository.sync_user_calendar_events(
+            test_db_session,
+            test_user.id,
+            [],
+            [make_series_data('weekly', datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc), 'RRULE:FREQ=WEEKLY;COUNT=10')]
+        )
+        
+        events = calendar_repository.get_user_calendar_events_for_period(
+            test_db_session, test_user.id, datetime(2024, 1, 1), datetime(2024, 1, 31)
+        )
+        
+        assert [event.start_datetime.day for event in events] == [1, 8, 15, 22, 29]
+        assert all(event.title == 'weekly' for event in events)
+    
+    def test_incremental_changes_update_series(self, test_db_session, test_user):
+        """差分反映で除外する回の追加とマスターの削除が行われることを確認"""
+        first = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [], [
+            make_series_data('daily', first, 'RRULE:FREQ=DAILY;COUNT=3'),
+            make_series_data('removed', first, 'RRULE:FREQ=DAILY')
+        ])
+        
+        calendar_repository.apply_calendar_event_changes(
+            test_db_session,
+            test_user.id,
+            [],
+            ['removed'],
+            series_exdates={'daily': [int((first + timedelta(days=1)).timestamp())]}
+        )
+        
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, [test_user.email], datetime(2024, 1, 1), datetime(2024, 1, 5)
+        )[test_user.email]
+        assert [block['start_datetime'].day for block in blocks] == [1, 3]
+    
+    def test_full_sync_without_series_keeps_them(self, test_db_session, test_user):
+        """series_dataを省略した同期では繰り返しのマスターが残ることを確認"""
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [], [
+            make_series_data('daily', datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc), 'RRULE:FREQ=DAILY')
+        ])
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [])
+        
+        assert test_db_session.query(RecurringEvent).filter(RecurringEvent.user_id == test_user.id).count() == 1
+        
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [], [])
+        
+        assert test_db_session.query(RecurringEvent).filter(RecurringEvent.user_id == test_user.id).count() == 0
+
+@pytest.mark.unit
+class TestCalendarEventIndexes:
+    """calendar_events のインデックスのテスト"""
+    
+    def test_composite_indexes_created(self, test_engine):
+        """ユーザー + 開始・終了時刻の複合インデックスが作成されることを確認"""
+        indexes = {index['name']: index['column_names'] for index in inspect(test_engine).get_indexes('calendar_events')}
+        
+        assert indexes['ix_calendar_events_user_start'] == ['user_id', 'start_datetime']
+        assert indexes['ix_calendar_events_user_end'] == ['user_id', 'end_datetime']
+        assert indexes['ix_calendar_events_user_calendar_event'] == ['user_id', 'calendar_id', 'google_event_id']
+    
+    def test_period_query_uses_range_index(self, test_engine):
+        """ユーザー + 期間の検索がインデックスの範囲検索になることを確認"""
+        statement = select(CalendarEvent).where(
+            CalendarEvent.user_id == 1,
+            CalendarEvent.start_datetime >= datetime(2024, 1, 1),
+            CalendarEvent.start_datetime <= datetime(2024, 1, 8)
+        ).compile(test_engine, compile_kwargs={'literal_binds': True})
+        
+        with test_engine.connect() as conn:
+            plan = ' '.join(str(row[-1]) for row in conn.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+        
+        assert 'USING INDEX ix_calendar_events_user_start' in plan
+
+@pytest.mark.unit
+class TestAsyncRepositories:
+    """非同期版リポジトリのテスト（同期版と同じ結果になることを確認）"""
+    
+    @pytest.mark.asyncio
+    async def test_user_and_group_lookups(self, test_db_session, test_async_engine, test_user, test_group):
+        """ユーザー・グループの取得テスト"""
+        async with async_sessionmaker(bind=test_async_engine, expire_on_commit=False)() as session:
+            user = await async_user_repository.get_user_by_email(session, test_user.email)
+            groups = await async_group_repository.get_user_groups(session, test_user.id)
+            members = await async_group_repository.get_group_members(session, test_group.id)
+            membership = await async_group_repository.get_user_membership(session, test_group.id, test_user.id)
+        
+        assert user.id == test_user.id
+        assert groups == group_repository.get_user_groups(test_db_session, test_user.id)
+        assert members == group_repository.get_group_members(test_db_session, test_group.id)
+        assert membership.role == 'admin'
+    
+    @pytest.mark.asyncio
+    async def test_calendar_queries(self, test_db_session, test_async_engine, test_user):
+        """カレンダーイベント・予定時間帯の取得テスト"""
+        window_start = datetime(2024, 6, 10, 9, 0)
+        window_end = datetime(2024, 6, 10, 18, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            {'google_event_id': 'overnight', 'start_datetime': window_start - timedelta(hours=10),
+             'end_datetime': window_start + timedelta(hours=1), 'title': '夜間作業', 'is_all_day': False},
+            {'google_event_id': 'inside', 'start_datetime': window_start + timedelta(hours=2),
+             'end_datetime': window_start + timedelta(hours=3), 'title': '会議', 'is_all_day': False}
+        ], series_data=[{
+            'google_event_id': 'weekly', 'recurrence': 'RRULE:FREQ=WEEKLY',
+            'start_datetime': datetime(2024, 6, 3, 12, 0, tzinfo=timezone.utc), 'duration_seconds': 3600,
+            'timezone': 'UTC', 'exdates': [], 'title': '定例', 'is_all_day': False
+        }])
+        emails = [test_user.email]
+        
+        async with async_sessionmaker(bind=test_async_engine, expire_on_commit=False)() as session:
+            events = await async_calendar_repository.get_user_calendar_events(session, test_user.id, window_start, window_end)
+            period_events = await async_calendar_repository.get_user_calendar_events_for_period(
+                session, test_user.id, window_start, window_end
+            )
+            events_by_email = await async_calendar_repository.get_multiple_users_calendar_events(
+                session, emails, window_start, window_end
+            )
+            busy_blocks = await async_calendar_repository.get_multiple_users_busy_blocks(
+                session, emails, window_start, window_end
+            )
+            sync_needed = await async_calendar_repository.check_calendar_sync_needed(session, test_user.id)
+        
+        assert events == calendar_repository.get_user_calendar_events(test_db_session, test_user.id, window_start, window_end)
+        assert [event.google_event_id for event in period_events] == ['overnight', 'inside', 'weekly']
+        assert events_by_email == calendar_repository.get_multiple_users_calendar_events(
+            test_db_session, emails, window_start, window_end
+        )
+        assert busy_blocks == calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, emails, window_start, window_end
+        )
+        assert sync_needed == calendar_repository.check_calendar_sync_needed(test_db_session, test_user.id)
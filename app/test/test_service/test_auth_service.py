@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import Mock, patch
+from fastapi import HTTPException
+from google.oauth2.credentials import Credentials
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.models import User as UserModel
+from app.infrastructure.repositories.user_repository import user_repository
+from app.service.auth_service import auth_service
+
+@pytest.mark.unit
+class TestAuthServiceCurrentUser:
+    """AuthService.get_current_user のキャッシュのテスト"""
+
+    def _request(self, session_data: dict):
+        return Mock(session=session_data)
+
+    def test_get_current_user_not_authenticated(self, test_db_session):
+        """セッションにユーザーIDがない場合は401を返すテスト"""
+        with pytest.raises(HTTPException) as exc_info:
+            auth_service.get_current_user(self._request({}), test_db_session)
+
+        assert exc_info.value.status_code == 401
+
+    def test_get_current_user_not_found(self, test_db_session):
+        """存在しないユーザーIDの場合は404を返し、キャッシュしないテスト"""
+        with pytest.raises(HTTPException) as exc_info:
+            auth_service.get_current_user(self._request({'user_id': 99999}), test_db_session)
+
+        assert exc_info.value.status_code == 404
+        assert auth_service._user_cache.get(99999) is None
+
+    def test_get_current_user_cached(self, test_db_session, test_user, executed_statements):
+        """2回目以降はusersテーブルを検索しないテスト"""
+        request = self._request({'user_id': test_user.id})
+        executed_statements.clear()
+
+        first = auth_service.get_current_user(request, test_db_session)
+        second = auth_service.get_current_user(request, test_db_session)
+
+        assert first == second
+        assert first.email == test_user.email
+        assert len(executed_statements) == 1
+
+    def test_get_current_user_returns_copy(self, test_db_session, test_user):
+        """返したユーザーを変更してもキャッシュに影響しないテスト"""
+        request = self._request({'user_id': test_user.id})
+
+        user = auth_service.get_current_user(request, test_db_session)
+        user.name = "Changed"
+
+        assert auth_service.get_current_user(request, test_db_session).name == test_user.name
+
+    def test_get_current_user_invalidated_on_sync(self, test_db_session, test_user):
+        """カレンダー同期時刻を更新したらキャッシュを破棄するテスト"""
+        request = self._request({'user_id': test_user.id})
+        assert auth_service.get_current_user(request, test_db_session).calendar_last_synced is None
+
+        user_repository.update_user_calendar_sync(test_db_session, test_user.id)
+
+        assert auth_service.get_current_user(request, test_db_session).calendar_last_synced is not None
+
+    def test_user_invalidated_after_commit(self, test_db_session, test_engine, test_user):
+        """トランザクション内で更新したユーザーは、コミットまでに他のセッションが読んでもコミット後に破棄されるテスト"""
+        request = self._request({'user_id': test_user.id})
+        auth_service.get_current_user(request, test_db_session)
+
+        test_user.name = "Renamed"
+        test_db_session.flush()
+
+        # コミット前に別のリクエストがコミット済みの行を読んでキャッシュし直す
+        other_session = sessionmaker(bind=test_engine)()
+        try:
+            assert auth_service.get_current_user(request, other_session).name == "Test User"
+        finally:
+            other_session.close()
+
+        test_db_session.commit()
+
+        assert auth_service.get_current_user(request, test_db_session).name == "Renamed"
+
+    def test_user_invalidated_after_bulk_update(self, test_db_session, test_user):
+        """update(User) の一括更新でもコミット後にキャッシュを破棄するテスト"""
+        request = self._request({'user_id': test_user.id})
+        auth_service.get_current_user(request, test_db_session)
+
+        test_db_session.execute(update(UserModel).where(UserModel.id == test_user.id).values(name="Bulk"))
+        test_db_session.commit()
+
+        assert auth_service.get_current_user(request, test_db_session).name == "Bulk"
+
+    def test_clear_session_invalidates_user(self, test_db_session, test_user):
+        """ログアウトでキャッシュしたユーザー情報を破棄するテスト"""
+        session_data = {'user_id': test_user.id}
+        auth_service.get_current_user(self._request(session_data), test_db_session)
+
+        auth_service.clear_session(self._request(session_data))
+
+        assert auth_service._user_cache.get(test_user.id) is None
+
+
+@pytest.mark.unit
+class TestAuthServiceCallback:
+    """AuthService.handle_oauth_callback のテスト"""
+
+    user_info = {'google_user_id': 'google_new', 'email': 'new@example.com', 'name': 'New User'}
+
+    def _request(self):
+        return Mock(session={'state': 'state_1'}, url='http://localhost:8000/auth/callback?state=state_1&code=code_1')
+
+    async def _callback(self, db, sync_result):
+        """Google APIとプールを差し替えてコールバックを処理し、プールに渡した引数と結果を返す"""
+        credentials = Credentials(token='token', refresh_token='refresh_token')
+        pool_args = []
+
+        async def run(func, *args, **kwargs):
+            pool_args.extend(args)
+            if isinstance(sync_result, Exception) and func is sync_user_on_login:
+                raise sync_result
+            return func(*args, **kwargs)
+
+        with patch.object(auth_service, '_exchange_code', return_value=(credentials, self.user_info)), \
+             patch('app.service.auth_service.calendar_sync_service.sync_user_on_login', return_value=sync_result) as sync_user_on_login, \
+             patch('app.service.auth_service.credential_manager.store'), \
+             patch('app.service.auth_service.google_io_executor.run', side_effect=run):
+            result = await auth_service.handle_oauth_callback(self._request(), db)
+
+        return result, pool_args, sync_user_on_login
+
+    @pytest.mark.asyncio
+    async def test_pool_gets_no_request_session(self, test_db_session):
+        """プールにはRequest・DBセッションを渡さず、ユーザーはリクエストのセッションで保存するテスト"""
+        result, pool_args, sync_user_on_login = await self._callback(test_db_session, True)
+
+        assert result['sync_success'] is True
+        assert user_repository.get_user_by_email(test_db_session, 'new@example.com').id == result['user'].id
+        sync_user_on_login.assert_called_once()
+        assert sync_user_on_login.call_args[0][0] == result['user'].id
+        assert not any(isinstance(arg, (Session, Mock)) for arg in pool_args)
+
+    @pytest.mark.asyncio
+    async def test_sync_timeout_keeps_login(self, test_db_session):
+        """初回同期がタイムアウトしてもログインは継続するテスト"""
+        result, _, _ = await self._callback(test_db_session, HTTPException(status_code=504, detail="処理がタイムアウトしました"))
+
+        assert result['sync_success'] is False
+        assert result['user'].email == 'new@example.com'
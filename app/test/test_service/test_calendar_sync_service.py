@@ -0,0 +1,647 @@
+import pytest
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import httplib2
+from googleapiclient.errors import HttpError
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.models import CalendarEvent, RecurringEvent, User
+from app.infrastructure.repositories.calendar_repository import calendar_repository
+from app.infrastructure.repositories.channel_repository import channel_repository
+from app.service.calendar_sync_service import CalendarSyncService, SyncScheduler
+
+
+class FakeRequest:
+    """execute() で結果を返すリクエストのフェイク"""
+
+    def __init__(self, handler, params):
+        self.handler = handler
+        self.params = params
+
+    def execute(self):
+        return self.handler(self.params)
+
+
+class FakeSyncCalendarService:
+    """差分同期と通知チャンネル登録に対応したCalendar APIのフェイク"""
+
+    def __init__(self, items=None, list_error=None, calendar_list=None):
+        self.items = items or []  # カレンダーIDごとに指定する場合はdict
+        self.list_error = list_error
+        self.calendar_list = calendar_list
+        self.list_calls = []
+        self.watch_calls = []
+        self.stopped = []
+
+    def events(self):
+        return self
+
+    def channels(self):
+        return FakeChannels(self)
+
+    def calendarList(self):
+        if self.calendar_list is None:
+            raise AttributeError('calendarList')
+        return FakeRequestList(self.calendar_list)
+
+    def list(self, **params):
+        return FakeRequest(self._handle_list, params)
+
+    def watch(self, **params):
+        return FakeRequest(self._handle_watch, params)
+
+    def _handle_list(self, params):
+        self.list_calls.append(params)
+        if self.list_error is not None:
+            raise self.list_error
+        items = self.items.get(params['calendarId'], []) if isinstance(self.items, dict) else self.items
+        return {'items': [item for item in items if self._matches(item, params)]}
+
+    def _matches(self, item, params):
+        """updatedMin と期間で絞り込む（updated・日時を持たないイベントは常に返す）"""
+        if params.get('updatedMin') and item.get('updated') and parse_time(item['updated']) < parse_time(params['updatedMin']):
+            return False
+        start, end = item.get('start', {}).get('dateTime'), item.get('end', {}).get('dateTime')
+        if start and end and params.get('timeMin') and params.get('timeMax'):
+            return parse_time(end) > parse_time(params['timeMin']) and parse_time(start) < parse_time(params['timeMax'])
+        return True
+
+    def _handle_watch(self, params):
+        self.watch_calls.append(params)
+        expiration = datetime.utcnow() + timedelta(days=7)
+        return {
+            'kind': 'api#channel',
+            'id': params['body']['id'],
+            'resourceId': f"resource_{len(self.watch_calls)}",
+            'expiration': str(int((expiration - datetime(1970, 1, 1)).total_seconds() * 1000))
+        }
+
+
+class FakeRequestList:
+    """calendarList().list() のフェイク"""
+
+    def __init__(self, items):
+        self.items = items
+
+    def list(self, **params):
+        return FakeRequest(lambda params: {'items': self.items}, params)
+
+
+class FakeChannels:
+    def __init__(self, service):
+        self.service = service
+
+    def stop(self, body):
+        return FakeRequest(lambda params: self.service.stopped.append(body), body)
+
+
+def parse_time(value):
+    """RFC3339の文字列をUTCのnaiveなdatetimeに変換"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def timed_event(event_id, start, summary='Meeting'):
+    """dateTime形式のGoogleイベントを作成"""
+    return {
+        'id': event_id,
+        'status': 'confirmed',
+        'summary': summary,
+        'start': {'dateTime': start.isoformat() + 'Z'},
+        'end': {'dateTime': (start + timedelta(hours=1)).isoformat() + 'Z'}
+    }
+
+
+@pytest.fixture
+def sync_service(test_engine):
+    """テスト用DBに接続する同期サービス"""
+    return CalendarSyncService(session_factory=sessionmaker(bind=test_engine))
+
+
+@pytest.fixture
+def test_channel(test_db_session, test_user):
+    """差分同期の起点を持つ通知チャンネル"""
+    return channel_repository.save_channel(
+        test_db_session,
+        test_user.id,
+        'channel_1',
+        'resource_1',
+        'secret_token',
+        datetime.utcnow() + timedelta(days=7),
+        datetime.utcnow() - timedelta(minutes=10)
+    )
+
+
+@pytest.mark.unit
+class TestSyncScheduler:
+    """通知をまとめるスケジューラのテスト"""
+
+    def test_notifications_coalesced_per_user(self):
+        """同一ユーザーへの連続した通知が1回の同期にまとめられることを確認"""
+        synced = []
+        scheduler = SyncScheduler(synced.append, debounce_seconds=60)
+
+        results = [scheduler.notify(1) for _ in range(10)] + [scheduler.notify(2) for _ in range(3)]
+
+        assert results.count(True) == 2
+        assert scheduler.run_pending(force=True) == 2
+        assert sorted(synced) == [1, 2]
+
+    def test_sync_waits_for_debounce(self):
+        """待ち時間が経過するまで同期されないことを確認"""
+        synced = []
+        scheduler = SyncScheduler(synced.append, debounce_seconds=60)
+
+        scheduler.notify(1)
+
+        assert scheduler.run_pending() == 0
+        assert synced == []
+        assert scheduler.pending_users() == [1]
+
+    def test_delayed_sync_waits_for_delay(self):
+        """遅延を指定した予約は指定時間が経過するまで同期されないことを確認"""
+        synced = []
+        scheduler = SyncScheduler(synced.append, debounce_seconds=0)
+
+        assert scheduler.notify(1, delay=60) is True
+        assert scheduler.run_pending() == 0
+        assert scheduler.run_pending(force=True) == 1
+        assert synced == [1]
+
+    def test_notification_during_sync_runs_again(self):
+        """同期中に届いた通知は次の同期として予約されることを確認"""
+        scheduler = None
+        synced = []
+
+        def sync(user_id):
+            synced.append(user_id)
+            if len(synced) == 1:
+                # 同期中に新しい変更が通知された
+                assert scheduler.notify(user_id) is True
+
+        scheduler = SyncScheduler(sync, debounce_seconds=0)
+        scheduler.notify(1)
+
+        scheduler.run_pending(force=True)
+        scheduler.run_pending(force=True)
+
+        assert synced == [1, 1]
+
+    def test_background_thread_runs_sync(self):
+        """バックグラウンドスレッドで同期が実行されることを確認"""
+        done = threading.Event()
+        scheduler = SyncScheduler(lambda user_id: done.set(), debounce_seconds=0.05)
+        scheduler.start()
+        try:
+            scheduler.notify(1)
+            assert done.wait(timeout=5)
+        finally:
+            scheduler.shutdown()
+
+    def test_failed_sync_does_not_stop_scheduler(self):
+        """同期に失敗しても他のユーザーの同期が続くことを確認"""
+        synced = []
+
+        def sync(user_id):
+            if user_id == 1:
+                raise Exception("sync failed")
+            synced.append(user_id)
+
+        scheduler = SyncScheduler(sync, debounce_seconds=0)
+        scheduler.notify(1)
+        scheduler.notify(2)
+
+        assert scheduler.run_pending(force=True) == 2
+        assert synced == [2]
+
+
+@pytest.mark.unit
+class TestSyncWindow:
+    """スライディングウィンドウと保持期間のテスト"""
+
+    def test_sync_window_uses_past_and_future_days(self, sync_service):
+        """同期期間が設定の過去・未来の日数になることを確認"""
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_SYNC_PAST_DAYS', 14), \
+             patch('app.service.calendar_sync_service.settings.CALENDAR_SYNC_FUTURE_DAYS', 30):
+            start, end = sync_service._sync_window()
+
+        now = datetime.utcnow()
+        assert abs((now - start) - timedelta(days=14)) < timedelta(seconds=5)
+        assert abs((end - now) - timedelta(days=30)) < timedelta(seconds=5)
+
+    def test_prune_expired_events(self, test_db_session, test_user, sync_service):
+        """保持期間を過ぎたイベントのみ削除されることを確認"""
+        now = datetime.utcnow()
+        for event_id, start in [('expired', now - timedelta(days=10)), ('recent', now - timedelta(days=2))]:
+            test_db_session.add(CalendarEvent(
+                user_id=test_user.id,
+                google_event_id=event_id,
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=1)
+            ))
+        test_db_session.commit()
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_RETENTION_DAYS', 7):
+            assert sync_service.prune_expired_events() == 1
+
+        remaining = test_db_session.execute(select(CalendarEvent.google_event_id)).scalars().all()
+        assert remaining == ['recent']
+
+    def test_maintenance_runs_on_interval(self):
+        """定期処理がスケジューラのスレッドで実行されることを確認"""
+        done = threading.Event()
+        scheduler = SyncScheduler(lambda user_id: None, maintenance_func=done.set, maintenance_interval_seconds=0.05)
+        scheduler.start()
+        try:
+            assert done.wait(timeout=5)
+        finally:
+            scheduler.shutdown()
+
+
+@pytest.mark.unit
+class TestIncrementalSync:
+    """差分同期のテスト"""
+
+    def test_applies_changed_and_deleted_events(self, test_db_session, test_user, test_channel, sync_service):
+        """更新・削除されたイベントのみがDBに反映されることを確認"""
+        base = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        for event_id in ['keep', 'moved', 'removed']:
+            test_db_session.add(CalendarEvent(
+                user_id=test_user.id,
+                google_event_id=event_id,
+                start_datetime=base,
+                end_datetime=base + timedelta(hours=1)
+            ))
+        test_db_session.commit()
+
+        service = FakeSyncCalendarService(items=[
+            timed_event('moved', base + timedelta(days=2), summary='Moved'),
+            timed_event('added', base + timedelta(days=3)),
+            {'id': 'removed', 'status': 'cancelled'}
+        ])
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        events = {
+            event.google_event_id: event
+            for event in test_db_session.execute(
+                select(CalendarEvent).where(CalendarEvent.user_id == test_user.id)
+            ).scalars()
+        }
+        assert sorted(events) == ['added', 'keep', 'moved']
+        assert events['moved'].title == 'Moved'
+
+        params = service.list_calls[0]
+        assert params['showDeleted'] is True
+        assert params['updatedMin'].endswith('Z')
+        assert 'status' in params['fields']
+
+    def test_advances_sync_cursor(self, test_db_session, test_user, test_channel, sync_service):
+        """差分同期後に起点が更新されることを確認"""
+        previous = test_channel.synced_at
+        service = FakeSyncCalendarService()
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            sync_service.incremental_sync(test_db_session, test_user.id, MagicMock())
+
+        test_db_session.refresh(test_channel)
+        assert test_channel.synced_at > previous
+
+    def test_fetches_unchanged_events_entering_window(self, test_db_session, test_user, test_channel, sync_service):
+        """前回の同期から時間が経ち、同期期間の未来側に入った更新のないイベントも取得されることを確認"""
+        # 前回の同期から10日経過した状態（前回の同期期間の終わりは現在+80日）
+        test_channel.synced_at = datetime.utcnow() - timedelta(days=10)
+        test_db_session.commit()
+        last_updated = (test_channel.synced_at - timedelta(days=30)).isoformat() + 'Z'
+        service = FakeSyncCalendarService(items=[
+            {**timed_event('inside_old_window', datetime.utcnow() + timedelta(days=30)), 'updated': last_updated},
+            {**timed_event('entered_window', datetime.utcnow() + timedelta(days=85)), 'updated': last_updated},
+            {**timed_event('beyond_window', datetime.utcnow() + timedelta(days=95)), 'updated': last_updated}
+        ])
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_SYNC_FUTURE_DAYS', 90), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        rows = test_db_session.execute(select(CalendarEvent.google_event_id)).scalars().all()
+        assert rows == ['entered_window']
+
+    def test_sync_without_changes_updates_last_synced(self, test_db_session, test_user, test_channel, sync_service):
+        """変更がなくても最終同期時刻が進み、定期の差分同期の対象から外れることを確認"""
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=FakeSyncCalendarService()):
+            assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        test_db_session.refresh(test_user)
+        assert test_user.calendar_last_synced is not None
+
+    def test_maintenance_advances_stale_sync_windows(self, test_db_session, test_user, sync_service):
+        """カレンダーの同期が一定期間行われていないユーザーのみ定期処理で同期されることを確認"""
+        test_user.calendar_last_synced = datetime.now()
+        test_db_session.commit()
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_SYNC_ALL_CALENDARS', False), \
+             patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', 'https://example.com/hook'), \
+             patch('app.service.calendar_sync_service.settings.CALENDAR_WINDOW_ADVANCE_INTERVAL', 3600), \
+             patch('app.service.calendar_sync_service.credential_manager.has_cached_credentials', return_value=True), \
+             patch.object(sync_service, 'sync_user', return_value=True) as mock_sync_user:
+            assert sync_service.sync_stale_users() == 0
+
+            test_user.calendar_last_synced = datetime.now() - timedelta(hours=2)
+            test_db_session.commit()
+            assert sync_service.sync_stale_users() == 1
+
+        mock_sync_user.assert_called_once_with(test_user.id)
+
+    def test_maintenance_polls_without_webhook(self, test_db_session, test_user, sync_service):
+        """通知の受信先が未設定でも、認証情報のあるユーザーが定期処理で同期されることを確認"""
+        other = User(google_user_id='google_other', email='other@example.com', name='Other')
+        test_db_session.add(other)
+        test_db_session.commit()
+
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', None), \
+             patch('app.service.calendar_sync_service.credential_manager.has_cached_credentials',
+                   side_effect=lambda user_id: user_id == test_user.id), \
+             patch.object(sync_service, 'prune_expired_events'), \
+             patch.object(sync_service, 'sync_user', return_value=True) as mock_sync_user:
+            sync_service.run_maintenance()
+
+        mock_sync_user.assert_called_once_with(test_user.id)
+
+    def test_stale_users_staggered_over_maintenance_interval(self, test_db_session, test_user, sync_service):
+        """定期の差分同期は一度に実行せず、定期処理の間隔に分散して予約されることを確認"""
+        other = User(google_user_id='google_other', email='other@example.com', name='Other')
+        test_db_session.add(other)
+        test_db_session.commit()
+        scheduled = []
+        sync_service.schedule_sync = lambda user_id, delay: scheduled.append((user_id, delay)) or True
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_MAINTENANCE_INTERVAL', 3600), \
+             patch('app.service.calendar_sync_service.credential_manager.has_cached_credentials', return_value=True), \
+             patch.object(sync_service, 'sync_user') as mock_sync_user:
+            assert sync_service.sync_stale_users() == 2
+
+        mock_sync_user.assert_not_called()
+        assert sorted(delay for _, delay in scheduled) == [0, 1800]
+        assert {user_id for user_id, _ in scheduled} == {test_user.id, other.id}
+
+    def test_gone_falls_back_to_full_sync(self, test_db_session, test_user, test_channel, sync_service):
+        """起点が無効（410）の場合はフル同期に切り替わることを確認"""
+        error = HttpError(httplib2.Response({'status': '410'}), b'{"error": {"code": 410}}')
+        service = FakeSyncCalendarService(list_error=error)
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service), \
+             patch.object(sync_service, 'full_sync', return_value=True) as mock_full_sync:
+            assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        mock_full_sync.assert_called_once()
+
+    def test_without_cursor_runs_full_sync(self, test_db_session, test_user, sync_service):
+        """チャンネル未登録のユーザーはフル同期になることを確認"""
+        with patch.object(sync_service, 'full_sync', return_value=True) as mock_full_sync:
+            sync_service.incremental_sync(test_db_session, test_user.id, MagicMock())
+
+        mock_full_sync.assert_called_once()
+
+    def test_failed_full_sync_keeps_sync_cursor(self, test_db_session, test_user, test_channel, sync_service):
+        """フル同期の保存に失敗した場合は失敗を返し、差分同期の起点を進めないことを確認"""
+        previous = test_channel.synced_at
+        service = FakeSyncCalendarService(items=[timed_event('new', datetime.utcnow() + timedelta(days=1))])
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service), \
+             patch.object(calendar_repository, '_rebuild_busy_blocks', side_effect=RuntimeError('db error')):
+            assert sync_service.full_sync(test_db_session, test_user.id, MagicMock()) is False
+
+        test_db_session.refresh(test_channel)
+        assert test_channel.synced_at == previous
+        assert test_db_session.execute(select(CalendarEvent)).first() is None
+
+    def test_sync_user_skips_without_cached_credentials(self, sync_service):
+        """認証情報がキャッシュされていないユーザーはスキップされることを確認"""
+        with patch('app.service.calendar_sync_service.credential_manager.get_cached_credentials', return_value=None), \
+             patch.object(sync_service, 'incremental_sync') as mock_incremental:
+            assert sync_service.sync_user(999) is False
+
+        mock_incremental.assert_not_called()
+
+
+@pytest.mark.unit
+class TestMultiCalendarSync:
+    """複数カレンダーの同期のテスト"""
+
+    calendar_list = [
+        {'id': 'user@example.com', 'primary': True, 'selected': True},
+        {'id': 'work', 'selected': True},
+        {'id': 'hidden', 'selected': False}
+    ]
+
+    def test_full_sync_tags_calendar_and_unions_busy_time(self, test_db_session, test_user, sync_service):
+        """選択されたカレンダーのイベントが取得元付きで保存され、予定時間帯が合算されることを確認"""
+        base = datetime.utcnow().replace(hour=1, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        service = FakeSyncCalendarService(calendar_list=self.calendar_list, items={
+            'primary': [timed_event('personal', base)],
+            'work': [timed_event('work_meeting', base + timedelta(minutes=30))],
+            'hidden': [timed_event('hidden_event', base + timedelta(days=1))]
+        })
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.full_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        rows = test_db_session.execute(select(CalendarEvent.calendar_id, CalendarEvent.google_event_id)).all()
+        assert sorted(rows) == [('primary', 'personal'), ('work', 'work_meeting')]
+
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, [test_user.email], base - timedelta(hours=1), base + timedelta(days=2)
+        )[test_user.email]
+        assert [(block['start_datetime'].replace(tzinfo=None), block['end_datetime'].replace(tzinfo=None)) for block in blocks] == [
+            (base, base + timedelta(minutes=90))
+        ]
+
+    def test_unwatched_calendars_polled_in_maintenance(self, test_db_session, test_user, test_channel, sync_service):
+        """通知のないプライマリ以外のカレンダーの変更が定期処理の差分同期で取り込まれることを確認"""
+        test_channel.synced_at = datetime.utcnow() - timedelta(hours=2)
+        test_user.calendar_last_synced = datetime.now() - timedelta(hours=2)
+        test_db_session.commit()
+        start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        service = FakeSyncCalendarService(calendar_list=self.calendar_list, items={
+            'work': [timed_event('work_meeting', start)]
+        })
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_POLL_INTERVAL', 3600), \
+             patch('app.service.calendar_sync_service.credential_manager.has_cached_credentials', return_value=True), \
+             patch('app.service.calendar_sync_service.credential_manager.get_cached_credentials', return_value=MagicMock()), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.sync_stale_users() == 1
+
+        rows = test_db_session.execute(select(CalendarEvent.calendar_id, CalendarEvent.google_event_id)).all()
+        assert rows == [('work', 'work_meeting')]
+
+    def test_incremental_sync_scoped_per_calendar(self, test_db_session, test_user, test_channel, sync_service):
+        """同じイベントIDでも別カレンダーの行は変更されないことを確認"""
+        base = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        for calendar_id in ['primary', 'work']:
+            test_db_session.add(CalendarEvent(
+                user_id=test_user.id,
+                calendar_id=calendar_id,
+                google_event_id='shared',
+                start_datetime=base,
+                end_datetime=base + timedelta(hours=1)
+            ))
+        test_db_session.commit()
+
+        service = FakeSyncCalendarService(calendar_list=self.calendar_list, items={
+            'work': [{'id': 'shared', 'status': 'cancelled'}]
+        })
+
+        with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        rows = test_db_session.execute(select(CalendarEvent.calendar_id)).scalars().all()
+        assert rows == ['primary']
+        assert sorted(call['calendarId'] for call in service.list_calls if 'updatedMin' in call) == ['primary', 'work']
+
+
+@pytest.mark.unit
+class TestRecurrenceRules:
+    """繰り返しイベントをルールのまま保存するモードのテスト"""
+
+    def standup_master(self, start):
+        return {
+            'id': 'standup',
+            'status': 'confirmed',
+            'summary': 'Standup',
+            'start': {'dateTime': start.isoformat() + 'Z', 'timeZone': 'UTC'},
+            'end': {'dateTime': (start + timedelta(minutes=15)).isoformat() + 'Z', 'timeZone': 'UTC'},
+            'recurrence': ['RRULE:FREQ=DAILY']
+        }
+
+    def test_full_sync_stores_masters(self, test_db_session, test_user, sync_service):
+        """マスターは1行で保存され、変更された回は通常のイベントとして保存されることを確認"""
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        service = FakeSyncCalendarService(items=[
+            self.standup_master(start),
+            {
+                **timed_event('standup_moved', start + timedelta(days=1, hours=2), summary='Standup (moved)'),
+                'recurringEventId': 'standup',
+                'originalStartTime': {'dateTime': (start + timedelta(days=1)).isoformat() + 'Z'}
+            },
+            timed_event('one_off', start + timedelta(days=2, hours=5))
+        ])
+
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_RECURRENCE_MODE', 'rules'), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.full_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        params = service.list_calls[0]
+        assert params['singleEvents'] is False
+        assert 'orderBy' not in params or params['orderBy'] is None
+        assert 'recurrence' in params['fields']
+
+        series = test_db_session.execute(select(RecurringEvent)).scalars().all()
+        assert [(row.google_event_id, row.duration_seconds) for row in series] == [('standup', 900)]
+        events = test_db_session.execute(select(CalendarEvent.google_event_id)).scalars().all()
+        assert sorted(events) == ['one_off', 'standup_moved']
+
+        # 変更された回は元の時刻では展開されない
+        blocks = calendar_repository.get_multiple_users_busy_blocks(
+            test_db_session, [test_user.email], start, start + timedelta(days=3)
+        )[test_user.email]
+        assert [block['start_datetime'].replace(tzinfo=None) - start for block in blocks] == [
+            timedelta(0),
+            timedelta(days=1, hours=2),
+            timedelta(days=2),
+            timedelta(days=2, hours=5)
+        ]
+
+    def test_incremental_sync_excludes_cancelled_occurrence(self, test_db_session, test_user, test_channel, sync_service):
+        """差分同期でキャンセルされた回がマスターの展開から除外されることを確認"""
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        with patch('app.service.calendar_sync_service.settings.CALENDAR_RECURRENCE_MODE', 'rules'):
+            service = FakeSyncCalendarService(items=[self.standup_master(start)])
+            with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+                sync_service.incremental_sync(test_db_session, test_user.id, MagicMock())
+
+            service = FakeSyncCalendarService(items=[{
+                'id': 'standup_cancelled',
+                'status': 'cancelled',
+                'recurringEventId': 'standup',
+                'originalStartTime': {'dateTime': start.isoformat() + 'Z'}
+            }])
+            with patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+                assert sync_service.incremental_sync(test_db_session, test_user.id, MagicMock()) is True
+
+        series = test_db_session.execute(select(RecurringEvent)).scalar_one()
+        test_db_session.refresh(series)
+        assert series.exdates == str(int((start - datetime(1970, 1, 1)).total_seconds()))
+
+
+@pytest.mark.unit
+class TestNotificationChannel:
+    """通知チャンネル登録・更新のテスト"""
+
+    def test_ensure_channel_registers_watch(self, test_db_session, test_user, sync_service):
+        """通知チャンネルが登録されることを確認"""
+        service = FakeSyncCalendarService()
+
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', 'https://example.com/api/calendar/notifications'), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            channel = sync_service.ensure_channel(test_db_session, test_user.id, MagicMock())
+
+        body = service.watch_calls[0]['body']
+        assert body['type'] == 'web_hook'
+        assert body['address'] == 'https://example.com/api/calendar/notifications'
+        assert channel.channel_id == body['id']
+        assert channel.token == body['token']
+        assert channel.resource_id == 'resource_1'
+        assert channel.expiration > datetime.utcnow() + timedelta(days=6)
+
+    def test_sync_user_on_login_uses_own_session(self, test_db_session, test_user, sync_service):
+        """ログイン時の同期は自前のセッションでチャンネルを登録し、差分同期の起点を設定することを確認"""
+        service = FakeSyncCalendarService()
+
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', 'https://example.com/hook'), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            assert sync_service.sync_user_on_login(test_user.id, MagicMock()) is True
+
+        channel = channel_repository.get_by_user_id(test_db_session, test_user.id)
+        assert channel.channel_id == service.watch_calls[0]['body']['id']
+        assert channel.synced_at is not None
+
+    def test_ensure_channel_skipped_without_webhook_url(self, test_db_session, test_user, sync_service):
+        """通知の受信先が未設定の場合は登録しないことを確認"""
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', None):
+            assert sync_service.ensure_channel(test_db_session, test_user.id, MagicMock()) is None
+
+    def test_valid_channel_not_renewed(self, test_db_session, test_user, test_channel, sync_service):
+        """期限まで余裕があるチャンネルは再登録しないことを確認"""
+        service = FakeSyncCalendarService()
+
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', 'https://example.com/hook'), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service):
+            channel = sync_service.ensure_channel(test_db_session, test_user.id, MagicMock())
+
+        assert channel.channel_id == 'channel_1'
+        assert service.watch_calls == []
+
+    def test_expiring_channels_renewed(self, test_db_session, test_user, test_channel, sync_service):
+        """期限が近いチャンネルが更新され、古いチャンネルが停止されることを確認"""
+        test_channel.expiration = datetime.utcnow() + timedelta(hours=1)
+        test_db_session.commit()
+        cursor = test_channel.synced_at
+        service = FakeSyncCalendarService()
+
+        with patch('app.service.calendar_sync_service.settings.GOOGLE_WEBHOOK_URL', 'https://example.com/hook'), \
+             patch('app.service.calendar_sync_service.google_service_factory.calendar', return_value=service), \
+             patch('app.service.calendar_sync_service.credential_manager.get_cached_credentials', return_value=MagicMock()):
+            assert sync_service.renew_expiring_channels() == 1
+
+        channel = channel_repository.get_by_user_id(test_db_session, test_user.id)
+        test_db_session.refresh(channel)
+        assert channel.channel_id != 'channel_1'
+        assert channel.expiration > datetime.utcnow() + timedelta(days=6)
+        # 差分同期の起点は引き継がれる
+        assert channel.synced_at == cursor
+        assert service.stopped == [{'id': 'channel_1', 'resourceId': 'resource_1'}]
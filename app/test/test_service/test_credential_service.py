@@ -0,0 +1,148 @@
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from google.oauth2.credentials import Credentials
+
+from app.service.credential_service import CredentialManager
+
+
+def make_session_credentials(user_id=1, token='old_token', expires_in=3600):
+    """セッションに保存される形式の認証情報を作成"""
+    return {
+        'token': token,
+        'refresh_token': 'refresh_token',
+        'token_uri': 'https://oauth2.googleapis.com/token',
+        'client_id': 'client_id',
+        'client_secret': 'client_secret',
+        'scopes': ['https://www.googleapis.com/auth/calendar'],
+        'expiry': (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat(),
+        'user_id': user_id
+    }
+
+
+class FakeTokenEndpoint:
+    """Credentials.refresh() の代わりにトークンを発行するフェイク"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, creds, request):
+        with self._lock:
+            self.calls += 1
+            count = self.calls
+        time.sleep(self.delay)
+        if self.fail:
+            raise Exception("invalid_grant")
+        creds.token = f'new_token_{count}'
+        creds.expiry = datetime.utcnow() + timedelta(hours=1)
+
+
+@pytest.mark.unit
+class TestCredentialManager:
+    """ユーザー別認証情報キャッシュのテスト"""
+
+    def test_credentials_cached_per_user(self):
+        """同じユーザーには同じCredentialsが返されることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+
+        first = manager.get_credentials(make_session_credentials(user_id=1))
+        second = manager.get_credentials(make_session_credentials(user_id=1, token='cookie_token'))
+        other = manager.get_credentials(make_session_credentials(user_id=2))
+
+        assert first is second
+        # 2回目以降はCookieの値からは作り直さない
+        assert second.token == 'old_token'
+        assert other is not first
+
+    def test_valid_token_is_not_refreshed(self):
+        """有効期限まで余裕があるトークンは更新しないことを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        endpoint = FakeTokenEndpoint()
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=endpoint):
+            creds = manager.get_credentials(make_session_credentials(expires_in=3600))
+
+        assert endpoint.calls == 0
+        assert creds.token == 'old_token'
+
+    def test_token_refreshed_before_expiry(self):
+        """有効期限の手前でトークンが先行して更新されることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        endpoint = FakeTokenEndpoint()
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=endpoint):
+            # まだ期限切れではないが更新マージン内
+            creds = manager.get_credentials(make_session_credentials(expires_in=120))
+            again = manager.get_credentials(make_session_credentials(expires_in=120))
+
+        assert endpoint.calls == 1
+        assert creds.token == 'new_token_1'
+        assert again is creds
+
+    def test_concurrent_refresh_is_single_flight(self):
+        """同一ユーザーの同時リクエストでトークン更新が1回にまとめられることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        endpoint = FakeTokenEndpoint(delay=0.1)
+        session_credentials = make_session_credentials(expires_in=-60)
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=endpoint):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: manager.get_credentials(session_credentials), range(8)))
+
+        assert endpoint.calls == 1
+        assert {creds.token for creds in results} == {'new_token_1'}
+
+    def test_store_replaces_cached_credentials(self):
+        """ログイン時に登録したCredentialsで置き換えられることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        manager.get_credentials(make_session_credentials(user_id=1))
+        login_creds = Credentials(token='login_token', expiry=datetime.utcnow() + timedelta(hours=1))
+
+        manager.store(1, login_creds)
+
+        assert manager.get_credentials(make_session_credentials(user_id=1)) is login_creds
+
+    def test_failed_refresh_invalidates_cache(self):
+        """トークン更新に失敗した場合はキャッシュが破棄されることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        session_credentials = make_session_credentials(expires_in=-60)
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=FakeTokenEndpoint(fail=True)):
+            with pytest.raises(Exception):
+                manager.get_credentials(session_credentials)
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=FakeTokenEndpoint()):
+            creds = manager.get_credentials(session_credentials)
+
+        assert creds.token == 'new_token_1'
+
+    def test_cache_is_bounded_and_evicts_refresh_locks(self):
+        """上限を超えたユーザーの認証情報と更新用ロックが破棄されることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300, maxsize=2)
+        endpoint = FakeTokenEndpoint()
+
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=endpoint):
+            for user_id in (1, 2, 3):
+                manager.get_credentials(make_session_credentials(user_id=user_id, expires_in=-60))
+
+        assert manager.get_cached_credentials(1) is None
+        assert manager.get_cached_credentials(3) is not None
+        assert set(manager._refresh_locks) == {2, 3}
+
+    def test_invalidate_drops_refresh_lock(self):
+        """ログアウト時に認証情報と更新用ロックが破棄されることを確認"""
+        manager = CredentialManager(refresh_margin_seconds=300)
+        with patch.object(Credentials, 'refresh', autospec=True, side_effect=FakeTokenEndpoint()):
+            manager.get_credentials(make_session_credentials(user_id=1, expires_in=-60))
+
+        manager.invalidate(1)
+
+        assert manager.get_cached_credentials(1) is None
+        assert manager._refresh_locks == {}
@@ -0,0 +1,156 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from google.oauth2.credentials import Credentials
+from sqlalchemy import select
+
+from app.core.google_api import GoogleServiceFactory
+from app.infrastructure.models import CalendarEvent
+from app.service.calendar_sync_service import CalendarSyncService
+from app.service.credential_service import CredentialManager
+from app.service.meeting_service import meeting_service
+from app.test.fake_google_server import FakeGoogleServer, FakeGoogleState, generate_events
+
+
+@pytest.fixture
+def fake_google():
+    """フェイクのGoogle APIサーバーを起動し、アプリの接続先を差し替える"""
+    state = FakeGoogleState()
+    with FakeGoogleServer(state) as server:
+        factory = GoogleServiceFactory()
+        with patch('app.core.google_api.settings.GOOGLE_API_BASE_URL', server.base_url), \
+             patch('app.service.calendar_sync_service.google_service_factory', factory), \
+             patch('app.service.meeting_service.google_service_factory', factory), \
+             patch('app.service.credential_service.google_service_factory', factory):
+            yield server
+        factory.shutdown()
+
+
+def make_credentials(server, token='fake-token'):
+    return Credentials(
+        token=token,
+        refresh_token='fake-refresh-token',
+        token_uri=server.token_uri,
+        client_id='fake-client-id',
+        client_secret='fake-client-secret'
+    )
+
+
+def count_in_window(events, start, end):
+    """同期期間に重なる時刻指定・終日イベントの件数"""
+    count = 0
+    for event in events:
+        if 'dateTime' in event['start']:
+            event_start = datetime.fromisoformat(event['start']['dateTime'].replace('Z', ''))
+            event_end = datetime.fromisoformat(event['end']['dateTime'].replace('Z', ''))
+        else:
+            event_start = datetime.fromisoformat(event['start']['date'])
+            event_end = datetime.fromisoformat(event['end']['date'])
+        if event_start < end and event_end > start:
+            count += 1
+    return count
+
+
+@pytest.mark.integration
+class TestFakeGoogleEndToEnd:
+    """フェイクサーバーに対して実際のHTTP通信でアプリの処理を動かすテスト"""
+
+    def test_full_sync_pages_batches_and_calendars(self, fake_google, test_db_session, test_user):
+        """複数カレンダー・複数ページのイベントがバッチ取得を経由してすべて保存されることを確認"""
+        primary_events = generate_events(600, seed=1)
+        work_events = generate_events(300, seed=2, prefix='work')
+        for event in primary_events:
+            fake_google.state.put_event('primary', event)
+        fake_google.state.add_calendar('work@group.calendar.google.com', work_events)
+        fake_google.state.add_calendar('hidden@group.calendar.google.com', generate_events(50, seed=3), selected=False)
+
+        service = CalendarSyncService()
+        start, end = service._sync_window()
+        assert service.full_sync(test_db_session, test_user.id, make_credentials(fake_google)) is True
+
+        rows = test_db_session.execute(select(CalendarEvent.calendar_id)).scalars().all()
+        assert rows.count('primary') == count_in_window(primary_events, start, end)
+        assert rows.count('work@group.calendar.google.com') == count_in_window(work_events, start, end)
+        # 1ページ目はバッチ内で、続きのページは個別に取得される
+        paths = [path for _, path in fake_google.state.requests]
+        assert '/calendar/v3/users/me/calendarList' in paths
+        assert paths.count('/batch/calendar/v3') == 1
+        assert any('hidden' in path for path in paths) is False
+
+    def test_incremental_sync_applies_changes(self, fake_google, test_db_session, test_user):
+        """updatedMinによる差分取得で更新・削除が反映されることを確認"""
+        base = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+        for event_id in ['keep', 'remove']:
+            fake_google.state.put_event('primary', {
+                'id': event_id,
+                'summary': event_id,
+                'start': {'dateTime': base.isoformat() + 'Z'},
+                'end': {'dateTime': (base + timedelta(hours=1)).isoformat() + 'Z'}
+            })
+
+        service = CalendarSyncService()
+        credentials = make_credentials(fake_google)
+        service.full_sync(test_db_session, test_user.id, credentials)
+
+        with patch.object(service, 'full_sync') as mock_full_sync, \
+             patch('app.service.calendar_sync_service.channel_repository.get_by_user_id') as mock_channel:
+            mock_channel.return_value.synced_at = datetime.utcnow() - timedelta(seconds=1)
+            fake_google.state.delete_event('primary', 'remove')
+            assert service.incremental_sync(test_db_session, test_user.id, credentials) is True
+            mock_full_sync.assert_not_called()
+
+        rows = test_db_session.execute(select(CalendarEvent.google_event_id)).scalars().all()
+        assert rows == ['keep']
+
+    def test_freebusy_and_meeting_creation(self, fake_google):
+        """FreeBusyで取得した時間帯と、作成したミーティングがフェイクサーバーに反映されることを確認"""
+        meeting_service._freebusy_cache.clear()
+        meeting_service._calendar_ids_cache.clear()
+        start = pytz.UTC.localize(datetime(2030, 1, 15))
+        credentials = {
+            'token': 'fake-token',
+            'refresh_token': 'fake-refresh-token',
+            'token_uri': fake_google.token_uri,
+            'client_id': 'fake-client-id',
+            'client_secret': 'fake-client-secret',
+            'user_id': 'fake-e2e-user'
+        }
+
+        with patch('app.service.meeting_service.credential_manager', CredentialManager()):
+            meeting_service.create_meeting_event(
+                credentials, 'MTG', start + timedelta(hours=1), start + timedelta(hours=2), ['member@example.com']
+            )
+            busy_times = meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), credentials)
+
+        assert [(busy['start'].hour, busy['end'].hour) for busy in busy_times] == [(1, 2)]
+        assert ('POST', '/calendar/v3/freeBusy') in fake_google.state.requests
+
+    def test_token_refresh_uses_token_endpoint(self, fake_google):
+        """期限切れのトークンがフェイクのトークンエンドポイントで更新されることを確認"""
+        manager = CredentialManager()
+        creds = make_credentials(fake_google)
+        creds.expiry = datetime.utcnow() - timedelta(minutes=1)
+        manager.store(1, creds)
+
+        refreshed = manager.get_cached_credentials(1)
+
+        assert refreshed.token.startswith('fake-token-')
+        assert ('POST', '/token') in fake_google.state.requests
+
+    def test_sync_token_returns_only_changes(self, fake_google):
+        """syncTokenを指定した取得で前回以降の変更のみが返ることを確認"""
+        for event in generate_events(5):
+            fake_google.state.put_event('primary', event)
+
+        with patch('app.core.google_api.settings.GOOGLE_API_BASE_URL', fake_google.base_url):
+            calendar = GoogleServiceFactory().calendar(make_credentials(fake_google))
+            first = calendar.events().list(calendarId='primary', maxResults=2).execute()
+            assert len(first['items']) == 2 and 'nextPageToken' in first
+
+            last = calendar.events().list(calendarId='primary', pageToken='4').execute()
+            fake_google.state.delete_event('primary', 'event0')
+            changes = calendar.events().list(calendarId='primary', syncToken=last['nextSyncToken']).execute()
+
+        assert [(event['id'], event['status']) for event in changes['items']] == [('event0', 'cancelled')]
@@ -4,6 +4,7 @@ from fastapi import HTTPException
 
 from app.service.group_service import group_service
 from app.core.entities import GroupRole
+from app.infrastructure.models import User
 
 @pytest.mark.unit
 class TestGroupService:
@@ -212,6 +213,22 @@ class TestGroupService:
         assert exc_info.value.status_code == 403
         assert "このグループのメンバーではありません" in str(exc_info.value.detail)
     
+    @pytest.mark.asyncio
+    async def test_get_group_with_access_check_async(self, test_async_engine, test_user, test_group):
+        """非同期版のアクセス権限チェックが同期版と同じ結果・エラーになるテスト"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        
+        async with async_sessionmaker(bind=test_async_engine)() as session:
+            group = await group_service.get_group_with_access_check_async(session, test_group.id, test_user.id)
+            with pytest.raises(HTTPException) as not_found:
+                await group_service.get_group_with_access_check_async(session, 99999, test_user.id)
+            with pytest.raises(HTTPException) as no_access:
+                await group_service.get_group_with_access_check_async(session, test_group.id, 99999)
+        
+        assert group.id == test_group.id
+        assert not_found.value.status_code == 404
+        assert no_access.value.status_code == 403
+    
     def test_get_group_detail_for_user_success(self, test_db_session, test_user, test_group):
         """ユーザー向けグループ詳細取得成功テスト"""
         detail = group_service.get_group_detail_for_user(
@@ -235,4 +252,57 @@ class TestGroupService:
                 test_db_session, test_group.id, 99999
             )
         
-        assert exc_info.value.status_code == 403 
\ No newline at end of file
+        assert exc_info.value.status_code == 403
+    
+    def test_get_group_detail_for_user_query_count(self, test_db_session, test_user, test_group, executed_statements):
+        """グループ詳細は2回のクエリで取得し、同じリクエスト内の権限チェックはキャッシュを使うテスト"""
+        group_id, user_id = test_group.id, test_user.id
+        executed_statements.clear()
+
+        detail = group_service.get_group_detail_for_user(test_db_session, group_id, user_id)
+        group_service.get_group_with_access_check(test_db_session, group_id, user_id)
+        is_admin = group_service.is_group_admin(test_db_session, group_id, user_id)
+
+        assert detail['membership'].is_admin()
+        assert is_admin is True
+        assert len(executed_statements) == 2
+
+    def test_group_lookup_cache_cleared_after_commit(self, test_db_session, test_user, test_group):
+        """コミット後はキャッシュを使わずにメンバーシップを検索し直すテスト"""
+        new_user = User(google_user_id="joiner", email="joiner@example.com", name="Joiner")
+        test_db_session.add(new_user)
+        test_db_session.commit()
+
+        assert group_service.check_user_access(test_db_session, test_group.id, new_user.id) is False
+
+        group_service.join_group(test_db_session, test_group.id, new_user.id)
+
+        assert group_service.check_user_access(test_db_session, test_group.id, new_user.id) is True
+
+    def test_join_invalidates_only_the_joined_membership(self, test_db_session, test_user, test_group, executed_statements):
+        """参加したメンバーシップだけをキャッシュから破棄し、他のユーザーの検索結果は使い続けるテスト"""
+        new_user = User(google_user_id="joiner", email="joiner@example.com", name="Joiner")
+        test_db_session.add(new_user)
+        test_db_session.commit()
+        group_id, user_id, new_user_id = test_group.id, test_user.id, new_user.id
+
+        assert group_service.check_user_access(test_db_session, group_id, user_id) is True
+        assert group_service.check_user_access(test_db_session, group_id, new_user_id) is False
+
+        group_service.join_group(test_db_session, group_id, new_user_id)
+        executed_statements.clear()
+
+        assert group_service.check_user_access(test_db_session, group_id, new_user_id) is True
+        assert group_service.check_user_access(test_db_session, group_id, user_id) is True
+        assert len([s for s in executed_statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    def test_create_group_invalidates_cached_missing_group(self, test_db_session, test_user):
+        """存在しないとして検索済みのIDでグループを作成したら、作成したグループを返すテスト"""
+        created_before = group_service.create_group(test_db_session, "First", "", test_user.id)
+        next_id = created_before.id + 1
+        assert group_service.get_group_by_id(test_db_session, next_id) is None
+
+        created = group_service.create_group(test_db_session, "Second", "", test_user.id)
+
+        assert created.id == next_id
+        assert group_service.get_group_with_access_check(test_db_session, next_id, test_user.id).name == "Second"
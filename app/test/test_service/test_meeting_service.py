@@ -385,7 +385,7 @@ class TestMeetingServiceParameterValidation:
             'summary': 'テストミーティング'
         }
         
-        with patch('app.service.meeting_service.build') as mock_build:
+        with patch('app.service.meeting_service.google_service_factory.calendar') as mock_build:
             mock_service = Mock()
             mock_events = Mock()
             mock_insert = Mock()
@@ -439,7 +439,7 @@ class TestMeetingServiceParameterValidation:
         start_time = datetime.now() + timedelta(hours=1)
         end_time = start_time + timedelta(hours=1)
         
-        with patch('app.service.meeting_service.build') as mock_build:
+        with patch('app.service.meeting_service.google_service_factory.calendar') as mock_build:
             # Google Calendar APIエラーをシミュレート
             mock_build.side_effect = Exception("API access denied")
             
@@ -454,4 +454,219 @@ class TestMeetingServiceParameterValidation:
                 )
             
             assert excinfo.value.status_code == 500
-            assert "ミーティングの作成に失敗しました" in str(excinfo.value.detail) 
\ No newline at end of file
+            assert "ミーティングの作成に失敗しました" in str(excinfo.value.detail)
+
+    @pytest.mark.asyncio
+    async def test_member_busy_times_read_from_busy_blocks(self, test_db_session, test_async_engine, test_user):
+        """検索時にマージ済みの予定時間帯がDBから読み込まれることを確認"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+        
+        # JST 2024-01-15 10:00〜 の重複する3件の予定
+        base = datetime(2024, 1, 15, 1, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            {'google_event_id': f'event_{i}', 'start_datetime': base + timedelta(minutes=30 * i),
+             'end_datetime': base + timedelta(minutes=30 * i + 60), 'title': f'Event {i}', 'is_all_day': False}
+            for i in range(3)
+        ])
+        
+        async with async_sessionmaker(bind=test_async_engine)() as session:
+            busy_times = await meeting_service._get_member_busy_times_async(
+                session, [test_user.email], "2024-01-15", "2024-01-15"
+            )
+        
+        assert len(busy_times[test_user.email]) == 1
+        busy = busy_times[test_user.email][0]
+        assert busy['start'] == pytz.UTC.localize(base)
+        assert busy['end'] == pytz.UTC.localize(base + timedelta(hours=2))
+
+    @pytest.mark.asyncio
+    async def test_member_schedules_show_busy_without_titles(self, test_db_session, test_async_engine, test_user):
+        """メンバーの予定はイベントのタイトルを含めず「予定あり」として返されることを確認"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+
+        base = datetime(2024, 1, 15, 1, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, test_user.id, [
+            {'google_event_id': 'private', 'start_datetime': base, 'end_datetime': base + timedelta(hours=1),
+             'title': '人事面談', 'is_all_day': False}
+        ])
+
+        async with async_sessionmaker(bind=test_async_engine)() as session:
+            busy_times = await meeting_service._get_member_busy_times_async(
+                session, [test_user.email], "2024-01-15", "2024-01-15"
+            )
+        result = meeting_service._search_result(busy_times, [], "2024-01-15", "2024-01-15", "09:00", "18:00")
+
+        assert [schedule['title'] for schedule in result['member_schedules'][test_user.email]] == ['予定あり']
+
+
+    @pytest.mark.asyncio
+    async def test_async_busy_times_pool_gets_no_session(self, test_db_session, test_async_engine, test_user):
+        """非同期版の検索ではGoogle APIの呼び出しのみプールで実行し、他のメンバーの予定は非同期セッションで取得することを確認"""
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+        from app.infrastructure.models import User
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+        
+        other = User(google_user_id='google_other', email='other@example.com', name='Other')
+        test_db_session.add(other)
+        test_db_session.commit()
+        base = datetime(2024, 1, 15, 1, 0)
+        calendar_repository.sync_user_calendar_events(test_db_session, other.id, [
+            {'google_event_id': 'other_event', 'start_datetime': base, 'end_datetime': base + timedelta(hours=1),
+             'title': 'Other', 'is_all_day': False}
+        ])
+        api_busy = [{'start': pytz.UTC.localize(base), 'end': pytz.UTC.localize(base + timedelta(hours=2)), 'title': '予定あり'}]
+        pool_args = []
+        
+        async def run(func, *args, **kwargs):
+            pool_args.extend(args)
+            return func(*args, **kwargs)
+        
+        with patch('app.service.meeting_service.google_io_executor.run', side_effect=run), \
+             patch.object(meeting_service, '_get_current_user_busy_times_from_api', return_value=api_busy):
+            async with async_sessionmaker(bind=test_async_engine)() as session:
+                busy_times = await meeting_service._get_member_busy_times_async(
+                    session, [test_user.email, 'other@example.com'], "2024-01-15", "2024-01-15",
+                    {'token': 'mock_token'}, test_user.email
+                )
+        
+        assert busy_times[test_user.email] == api_busy
+        assert [(busy['start'], busy['end']) for busy in busy_times['other@example.com']] == [
+            (pytz.UTC.localize(base), pytz.UTC.localize(base + timedelta(hours=1)))
+        ]
+        assert pool_args and not any(isinstance(arg, AsyncSession) for arg in pool_args)
+
+    @pytest.mark.asyncio
+    async def test_shared_all_day_event_busy_for_current_user_and_members(self, test_db_session, test_async_engine, test_user):
+        """同じ終日イベントがFreeBusyで取得するログインユーザーとDBから取得するメンバーで同じく予定ありになることを確認"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app.core.event_parsing import events_to_db_format, parse_google_events
+        from app.infrastructure.models import User
+        from app.infrastructure.repositories.calendar_repository import calendar_repository
+        
+        # 共有カレンダーの終日イベント（JSTの1/15）と「空き時間」に設定された予定
+        shared_events = [
+            {'id': 'offsite', 'summary': '全社オフサイト', 'start': {'date': '2024-01-15'}, 'end': {'date': '2024-01-16'}},
+            {'id': 'focus', 'transparency': 'transparent', 'start': {'dateTime': '2024-01-16T01:00:00Z'},
+             'end': {'dateTime': '2024-01-16T02:00:00Z'}}
+        ]
+        other = User(google_user_id='google_other', email='other@example.com', name='Other')
+        test_db_session.add(other)
+        test_db_session.commit()
+        calendar_repository.sync_user_calendar_events(
+            test_db_session, other.id, events_to_db_format(parse_google_events(shared_events))
+        )
+        
+        # FreeBusyは予定ありの終日イベントを含め、「空き時間」の予定を含めない
+        service = MagicMock()
+        service.calendarList.return_value.list.return_value.execute.return_value = {
+            'items': [{'id': test_user.email, 'primary': True, 'selected': True}]
+        }
+        service.freebusy.return_value.query.return_value.execute.return_value = {
+            'calendars': {'primary': {'busy': [{'start': '2024-01-14T15:00:00Z', 'end': '2024-01-15T15:00:00Z'}]}}
+        }
+        
+        async def run(func, *args, **kwargs):
+            return func(*args, **kwargs)
+        
+        meeting_service._freebusy_cache.clear()
+        meeting_service._calendar_ids_cache.clear()
+        try:
+            with patch('app.service.meeting_service.google_io_executor.run', side_effect=run), \
+                 patch('app.service.meeting_service.credential_manager.get_credentials'), \
+                 patch('app.service.meeting_service.google_service_factory.calendar', return_value=service):
+                async with async_sessionmaker(bind=test_async_engine)() as session:
+                    busy_times = await meeting_service._get_member_busy_times_async(
+                        session, [test_user.email, 'other@example.com'], "2024-01-15", "2024-01-16",
+                        {'token': 'mock_token', 'user_id': test_user.id}, test_user.email
+                    )
+        finally:
+            meeting_service._freebusy_cache.clear()
+            meeting_service._calendar_ids_cache.clear()
+        
+        expected = [(pytz.UTC.localize(datetime(2024, 1, 14, 15)), pytz.UTC.localize(datetime(2024, 1, 15, 15)))]
+        assert [(busy['start'], busy['end']) for busy in busy_times[test_user.email]] == expected
+        assert [(busy['start'], busy['end']) for busy in busy_times['other@example.com']] == expected
+
+@pytest.mark.unit
+class TestFreeBusyFastPath:
+    """ログインユーザーの予定あり時間帯（FreeBusy API）のテスト"""
+    
+    credentials = {
+        'token': 'mock_token',
+        'refresh_token': 'mock_refresh_token',
+        'client_id': 'mock_client_id',
+        'client_secret': 'mock_client_secret',
+        'user_id': 42
+    }
+    
+    @pytest.fixture(autouse=True)
+    def clear_caches(self):
+        meeting_service._freebusy_cache.clear()
+        meeting_service._calendar_ids_cache.clear()
+        yield
+        meeting_service._freebusy_cache.clear()
+        meeting_service._calendar_ids_cache.clear()
+    
+    def make_service(self):
+        service = MagicMock()
+        service.calendarList.return_value.list.return_value.execute.return_value = {
+            'items': [
+                {'id': 'user@example.com', 'primary': True, 'selected': True},
+                {'id': 'work', 'selected': True}
+            ]
+        }
+        service.freebusy.return_value.query.return_value.execute.return_value = {
+            'calendars': {
+                'primary': {'busy': [{'start': '2024-01-15T01:00:00Z', 'end': '2024-01-15T02:00:00Z'}]},
+                'work': {'busy': [
+                    {'start': '2024-01-15T01:30:00Z', 'end': '2024-01-15T03:00:00Z'},
+                    {'start': '2024-01-15T05:00:00Z', 'end': '2024-01-15T06:00:00Z'}
+                ]}
+            }
+        }
+        return service
+    
+    def test_busy_times_merged_across_calendars(self):
+        """選択中の全カレンダーを1回のクエリで取得し、重なる時間帯がマージされることを確認"""
+        service = self.make_service()
+        start = pytz.UTC.localize(datetime(2024, 1, 15))
+        
+        with patch('app.service.meeting_service.credential_manager.get_credentials'), \
+             patch('app.service.meeting_service.google_service_factory.calendar', return_value=service):
+            busy_times = meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), self.credentials)
+        
+        query_body = service.freebusy.return_value.query.call_args[1]['body']
+        assert [item['id'] for item in query_body['items']] == ['primary', 'work']
+        assert [(busy['start'].hour, busy['end'].hour) for busy in busy_times] == [(1, 3), (5, 6)]
+        assert all(busy['title'] == '予定あり' for busy in busy_times)
+    
+    def test_repeated_search_uses_cache(self):
+        """同じ期間の検索はキャッシュが使われ、Googleへ再度問い合わせないことを確認"""
+        service = self.make_service()
+        start = pytz.UTC.localize(datetime(2024, 1, 15))
+        
+        with patch('app.service.meeting_service.credential_manager.get_credentials'), \
+             patch('app.service.meeting_service.google_service_factory.calendar', return_value=service):
+            first = meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), self.credentials)
+            second = meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), self.credentials)
+            meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=2), self.credentials)
+        
+        assert first == second
+        assert service.freebusy.return_value.query.return_value.execute.call_count == 2
+        assert service.calendarList.return_value.list.return_value.execute.call_count == 1
+    
+    def test_meeting_creation_invalidates_cache(self):
+        """ミーティング作成後はキャッシュが破棄されることを確認"""
+        service = self.make_service()
+        service.events.return_value.insert.return_value.execute.return_value = {'id': 'created'}
+        start = pytz.UTC.localize(datetime(2024, 1, 15))
+        
+        with patch('app.service.meeting_service.credential_manager.get_credentials'), \
+             patch('app.service.meeting_service.google_service_factory.calendar', return_value=service):
+            meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), self.credentials)
+            meeting_service.create_meeting_event(self.credentials, 'MTG', start, start + timedelta(hours=1), [])
+            meeting_service._get_current_user_busy_times_from_api(start, start + timedelta(days=1), self.credentials)
+        
+        assert service.freebusy.return_value.query.return_value.execute.call_count == 2
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Googleイベント変換のベンチマーク
+従来のイベント単位の変換（replace + fromisoformat + pytz）と、
+エポック秒への一括変換を比較する
+
+実行方法:
+    python benchmarks/bench_event_parsing.py [--events 10000] [--repeat 5]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.core.event_parsing import parse_google_events, events_to_db_format
+
+JST = pytz.timezone('Asia/Tokyo')
+
+
+def legacy_convert(event):
+    """従来の変換処理（イベント単位）"""
+    try:
+        start = event['start'].get('dateTime', event['start'].get('date'))
+        end = event['end'].get('dateTime', event['end'].get('date'))
+        is_all_day = 'date' in event['start']
+
+        if is_all_day:
+            start_dt = JST.localize(datetime.fromisoformat(start)).astimezone(pytz.UTC)
+            end_dt = JST.localize(datetime.fromisoformat(end)).astimezone(pytz.UTC)
+        else:
+            if start.endswith('Z'):
+                start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
+                end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
+            else:
+                start_dt = datetime.fromisoformat(start)
+                end_dt = datetime.fromisoformat(end)
+            start_dt = start_dt.astimezone(pytz.UTC)
+            end_dt = end_dt.astimezone(pytz.UTC)
+
+        return {
+            'google_event_id': event['id'],
+            'start_datetime': start_dt,
+            'end_datetime': end_dt,
+            'title': event.get('summary', '無題'),
+            'is_all_day': is_all_day
+        }
+    except Exception:
+        return None
+
+
+def generate_events(count: int) -> list:
+    """UTC・オフセット付き・終日イベントが混在するイベントを生成"""
+    random.seed(42)
+    base = datetime(2024, 1, 1)
+    events = []
+    for i in range(count):
+        start = base + timedelta(minutes=30 * random.randint(0, 4000))
+        end = start + timedelta(minutes=30 * random.randint(1, 4))
+        kind = i % 10
+        if kind == 0:
+            events.append({'id': f'e{i}', 'summary': 'Holiday', 'start': {'date': start.date().isoformat()}, 'end': {'date': (start.date() + timedelta(days=1)).isoformat()}})
+        elif kind < 6:
+            events.append({'id': f'e{i}', 'summary': 'Meeting', 'start': {'dateTime': (start + timedelta(hours=9)).isoformat() + '+09:00'}, 'end': {'dateTime': (end + timedelta(hours=9)).isoformat() + '+09:00'}})
+        else:
+            events.append({'id': f'e{i}', 'summary': 'Sync', 'start': {'dateTime': start.isoformat() + 'Z'}, 'end': {'dateTime': end.isoformat() + 'Z'}})
+    return events
+
+
+def measure(label: str, func, events: list, repeat: int) -> float:
+    """最良値（ミリ秒）を計測"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(events)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    print(f"  {label:28}{best:>10.2f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="イベント変換のベンチマーク")
+    parser.add_argument('--events', type=int, default=10000, help="イベント数")
+    parser.add_argument('--repeat', type=int, default=5, help="繰り返し回数")
+    args = parser.parse_args()
+
+    events = generate_events(args.events)
+
+    # 変換結果が一致することを確認
+    legacy = [legacy_convert(event) for event in events]
+    fast = events_to_db_format(parse_google_events(events))
+    assert [(e['google_event_id'], e['start_datetime'], e['end_datetime']) for e in legacy] == \
+           [(e['google_event_id'], e['start_datetime'], e['end_datetime']) for e in fast]
+
+    print(f"🧪 イベント変換ベンチマーク ({args.events:,}件)")
+    print("=" * 60)
+    legacy_ms = measure("legacy (per event)", lambda items: [legacy_convert(event) for event in items], events, args.repeat)
+    epoch_ms = measure("parse_google_events", parse_google_events, events, args.repeat)
+    db_ms = measure("parse + events_to_db_format", lambda items: events_to_db_format(parse_google_events(items)), events, args.repeat)
+    print("")
+    print(f"✅ エポック秒への変換: {legacy_ms / epoch_ms:.1f}倍高速化")
+    print(f"✅ DB保存形式まで: {legacy_ms / db_ms:.1f}倍高速化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+フェイクのGoogle APIサーバーを使った同期・空き時間検索のベンチマーク
+実際のHTTP通信（バッチリクエスト・ページング・応答遅延）を含めて、
+フル同期のスループットとログインユーザーの予定あり時間帯取得の遅延を計測する
+
+実行方法:
+    python benchmarks/bench_fake_google_sync.py [--events 5000] [--calendars 3] [--latency 0.05] [--searches 20]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytz
+from google.oauth2.credentials import Credentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.google_api import GoogleServiceFactory
+from app.infrastructure.models import Base, User
+from app.service.calendar_sync_service import CalendarSyncService
+from app.service.meeting_service import meeting_service
+from app.test.fake_google_server import FakeGoogleServer, FakeGoogleState, generate_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description="フェイクGoogle APIサーバーを使った同期・検索のベンチマーク")
+    parser.add_argument('--events', type=int, default=5000, help="カレンダーあたりのイベント数")
+    parser.add_argument('--calendars', type=int, default=3, help="カレンダー数（プライマリを含む）")
+    parser.add_argument('--latency', type=float, default=0.05, help="1リクエストあたりの応答遅延（秒）")
+    parser.add_argument('--searches', type=int, default=20, help="空き時間検索の回数")
+    args = parser.parse_args()
+
+    state = FakeGoogleState()
+    for event in generate_events(args.events):
+        state.put_event('primary', event)
+    for i in range(1, args.calendars):
+        state.add_calendar(f'calendar{i}@group.calendar.google.com', generate_events(args.events, seed=i, prefix=f'c{i}_'))
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+    with FakeGoogleServer(state, latency=args.latency) as server:
+        factory = GoogleServiceFactory()
+        credentials = Credentials(
+            token='bench-token',
+            refresh_token='bench-refresh-token',
+            token_uri=server.token_uri,
+            client_id='bench-client-id',
+            client_secret='bench-client-secret'
+        )
+
+        with patch('app.core.google_api.settings.GOOGLE_API_BASE_URL', server.base_url), \
+             patch('app.service.calendar_sync_service.google_service_factory', factory), \
+             patch('app.service.meeting_service.google_service_factory', factory), \
+             patch('app.service.meeting_service.credential_manager.get_credentials', return_value=credentials):
+            db = session_factory()
+            user = User(google_user_id='bench', email=state.user['email'], name='Bench')
+            db.add(user)
+            db.commit()
+
+            print("🧪 フェイクGoogle APIサーバーを使ったベンチマーク")
+            print(f"   {args.calendars}カレンダー × {args.events}件, 応答遅延 {args.latency * 1000:.0f} ms")
+            print("=" * 60)
+
+            sync_service = CalendarSyncService(session_factory=session_factory)
+            started = time.perf_counter()
+            sync_service.full_sync(db, user.id, credentials)
+            sync_seconds = time.perf_counter() - started
+            requests = len(state.requests)
+            print(f"  フル同期:            {sync_seconds:>8.2f} s  ({args.calendars * args.events / sync_seconds:,.0f} events/s, {requests} requests)")
+
+            start = pytz.UTC.localize(datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0))
+            session_credentials = {'token': 'bench-token', 'user_id': user.id}
+            cold, warm = [], []
+            for i in range(args.searches):
+                window = (start + timedelta(days=i), start + timedelta(days=i + 7))
+                for samples in (cold, warm):
+                    began = time.perf_counter()
+                    meeting_service._get_current_user_busy_times_from_api(*window, session_credentials)
+                    samples.append((time.perf_counter() - began) * 1000)
+
+            print(f"  予定あり時間帯取得:  {statistics.median(cold):>8.1f} ms (初回, 中央値)")
+            print(f"  予定あり時間帯取得:  {statistics.median(warm):>8.2f} ms (キャッシュ, 中央値)")
+            db.close()
+        factory.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+部分レスポンス（fieldsマスク）のベンチマーク
+記録済みのevents.listレスポンスを元に、フルレスポンスとマスク適用後の
+転送バイト数とJSONパース時間を比較する
+
+実行方法:
+    python benchmarks/bench_field_mask.py [--events 250] [--pages 40]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import copy
+import gzip
+import json
+import time
+
+from app.core.config import settings
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'events_list_full.json')
+
+
+def parse_field_mask(mask: str) -> dict:
+    """fieldsマスク文字列（例: nextPageToken,items(id,start)）を木構造に変換"""
+    tree = {}
+    stack = [tree]
+    token = ''
+
+    for char in mask + ',':
+        if char == '(':
+            node = stack[-1].setdefault(token.strip(), {})
+            stack.append(node)
+            token = ''
+        elif char in ',)':
+            if token.strip():
+                stack[-1].setdefault(token.strip(), {})
+            token = ''
+            if char == ')':
+                stack.pop()
+        else:
+            token += char
+
+    return tree
+
+
+def apply_field_mask(payload, tree: dict):
+    """Googleのサーバー側と同じ要領でマスクに含まれるフィールドのみを残す"""
+    if isinstance(payload, list):
+        return [apply_field_mask(item, tree) for item in payload]
+    if not isinstance(payload, dict) or not tree:
+        return payload
+    return {
+        key: apply_field_mask(payload[key], subtree)
+        for key, subtree in tree.items()
+        if key in payload
+    }
+
+
+def build_page(fixture: dict, events_per_page: int) -> dict:
+    """記録済みレスポンスのイベントを複製して1ページ分のレスポンスを作成"""
+    page = copy.deepcopy(fixture)
+    templates = fixture['items']
+    page['items'] = []
+    for i in range(events_per_page):
+        event = copy.deepcopy(templates[i % len(templates)])
+        event['id'] = f"{event['id']}_{i}"
+        page['items'].append(event)
+    return page
+
+
+def measure_parse(body: bytes, pages: int) -> float:
+    """JSONパース時間（ミリ秒/ページ）を計測"""
+    started = time.perf_counter()
+    for _ in range(pages):
+        json.loads(body)
+    return (time.perf_counter() - started) * 1000 / pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fieldsマスクのベンチマーク")
+    parser.add_argument('--events', type=int, default=250, help="1ページあたりのイベント数")
+    parser.add_argument('--pages', type=int, default=40, help="パース計測の繰り返し回数")
+    parser.add_argument('--fields', default=settings.GOOGLE_EVENTS_LIST_FIELDS, help="適用するfieldsマスク")
+    args = parser.parse_args()
+
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    full_page = build_page(fixture, args.events)
+    masked_page = apply_field_mask(full_page, parse_field_mask(args.fields))
+
+    full_body = json.dumps(full_page, ensure_ascii=False).encode('utf-8')
+    masked_body = json.dumps(masked_page, ensure_ascii=False).encode('utf-8')
+
+    full_parse_ms = measure_parse(full_body, args.pages)
+    masked_parse_ms = measure_parse(masked_body, args.pages)
+
+    print("🧪 fieldsマスク ベンチマーク")
+    print("=" * 60)
+    print(f"📄 フィクスチャ: {FIXTURE_PATH}")
+    print(f"🔧 fields: {args.fields}")
+    print(f"📊 1ページ {args.events}件のイベント")
+    print("")
+    print(f"{'':12}{'raw bytes':>14}{'gzip bytes':>14}{'parse ms':>12}")
+    print(f"{'full':12}{len(full_body):>14,}{len(gzip.compress(full_body)):>14,}{full_parse_ms:>12.3f}")
+    print(f"{'masked':12}{len(masked_body):>14,}{len(gzip.compress(masked_body)):>14,}{masked_parse_ms:>12.3f}")
+    print("")
+    print(f"✅ 転送量削減: {(1 - len(masked_body) / len(full_body)) * 100:.1f}% (raw)")
+    print(f"✅ パース時間削減: {(1 - masked_parse_ms / full_parse_ms) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
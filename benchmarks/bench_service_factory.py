@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Google APIサービス生成コストのベンチマーク
+googleapiclient.discovery.build() とサービスファクトリで、
+リクエスト1件分のセットアップ（サービス生成 + events().list() の組み立て）を比較する
+
+実行方法:
+    python benchmarks/bench_service_factory.py [--iterations 200]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from app.core.google_api import google_service_factory
+
+
+def measure(label: str, make_service, iterations: int) -> float:
+    """1リクエストあたりのセットアップ時間（マイクロ秒）を計測"""
+    started = time.perf_counter()
+    for i in range(iterations):
+        service = make_service(Credentials(token=f'token_{i}'))
+        service.events().list(calendarId='primary', fields='items(id)')
+    elapsed_us = (time.perf_counter() - started) * 1_000_000 / iterations
+    print(f"  {label:24}{elapsed_us:>12.1f} µs/request")
+    return elapsed_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="サービス生成コストのベンチマーク")
+    parser.add_argument('--iterations', type=int, default=200, help="計測回数")
+    args = parser.parse_args()
+
+    # 初回のDiscovery読み込みは計測対象外
+    google_service_factory.calendar(Credentials(token='warmup')).events()
+
+    print("🧪 サービス生成ベンチマーク")
+    print("=" * 60)
+    build_us = measure("discovery.build()", lambda creds: build('calendar', 'v3', credentials=creds), args.iterations)
+    factory_us = measure("google_service_factory", google_service_factory.calendar, args.iterations)
+    print("")
+    print(f"✅ {build_us / factory_us:.0f}倍高速化")
+
+
+if __name__ == "__main__":
+    main()
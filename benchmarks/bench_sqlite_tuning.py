@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+ファイルのSQLiteでの同時同期・検索のベンチマーク（デフォルト設定 vs WAL等のPRAGMA）
+  - デフォルト: SQLiteのデフォルトのジャーナル（DELETE）と synchronous=FULL
+  - チューニング: configure_sqlite のPRAGMA（WAL, synchronous=NORMAL, mmap_size, cache_size, busy_timeout）
+    （書き込みはSQLiteのロックで1つずつ実行され、待ちは busy_timeout まで）
+で、同期（sync_user_calendar_events）を行うスレッドと期間検索（get_user_calendar_events）を行うスレッドを
+同時に動かし、以下を比較する
+  - 同期・検索のスループット
+  - 検索のレイテンシ（中央値・p95）
+  - "database is locked" などで失敗した同期・検索の件数
+
+実行方法:
+    python benchmarks/bench_sqlite_tuning.py [--seconds 5] [--writers 4] [--readers 8] [--events 200]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database import RoutingSession, configure_sqlite, engine_options
+from app.infrastructure.models import Base, User
+from app.infrastructure.repositories.calendar_repository import calendar_repository
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_events(user_id: int, count: int, round_: int) -> list:
+    """1ユーザー分の同期データ（毎回少しずつ時刻を変える）"""
+    return [
+        {
+            'google_event_id': f'event_{user_id}_{i}',
+            'start_datetime': BASE + timedelta(days=i % 60, hours=9 + (i + round_) % 8),
+            'end_datetime': BASE + timedelta(days=i % 60, hours=10 + (i + round_) % 8),
+            'title': 'Meeting'
+        }
+        for i in range(count)
+    ]
+
+
+def run(tuned: bool, seconds: float, writers: int, readers: int, events: int) -> dict:
+    """同期と検索を同時に実行して計測"""
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_engine(database_url, **engine_options(database_url))
+    if tuned:
+        configure_sqlite(engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {'id': i + 1, 'google_user_id': f'google_{i}', 'email': f'user{i}@example.com', 'name': f'User {i}'}
+            for i in range(writers)
+        ])
+    Session = sessionmaker(class_=RoutingSession, bind=engine, expire_on_commit=False)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {'syncs': 0, 'sync_errors': 0, 'reads': 0, 'read_errors': 0, 'read_ms': []}
+
+    def sync_worker(user_id: int):
+        round_ = 0
+        while not stop.is_set():
+            round_ += 1
+            try:
+                with Session() as session:
+                    calendar_repository.sync_user_calendar_events(session, user_id, make_events(user_id, events, round_))
+            except Exception:
+                with lock:
+                    results['sync_errors'] += 1
+                continue
+            with lock:
+                results['syncs'] += 1
+
+    def read_worker(index: int):
+        user_id = index % writers + 1
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with Session() as session:
+                    calendar_repository.get_user_calendar_events(session, user_id, BASE, BASE + timedelta(days=30))
+            except Exception:
+                with lock:
+                    results['read_errors'] += 1
+                continue
+            with lock:
+                results['reads'] += 1
+                results['read_ms'].append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=sync_worker, args=(i + 1,)) for i in range(writers)]
+    threads += [threading.Thread(target=read_worker, args=(i,)) for i in range(readers)]
+    # 同期ごとのログを抑制
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    engine.dispose()
+
+    read_ms = sorted(results['read_ms']) or [0.0]
+    results['read_median_ms'] = statistics.median(read_ms)
+    results['read_p95_ms'] = read_ms[min(len(read_ms) - 1, int(len(read_ms) * 0.95))]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ファイルのSQLiteでの同時同期・検索のベンチマーク")
+    parser.add_argument('--seconds', type=float, default=5, help="計測時間（秒）")
+    parser.add_argument('--writers', type=int, default=4, help="同期を行うスレッド数（ユーザー数）")
+    parser.add_argument('--readers', type=int, default=8, help="検索を行うスレッド数")
+    parser.add_argument('--events', type=int, default=200, help="1回の同期のイベント数")
+    args = parser.parse_args()
+
+    print(f"🧪 SQLiteチューニングベンチマーク（同期{args.writers}スレッド, 検索{args.readers}スレッド, {args.seconds:.0f}秒）")
+    print("=" * 60)
+
+    default = run(False, args.seconds, args.writers, args.readers, args.events)
+    tuned = run(True, args.seconds, args.writers, args.readers, args.events)
+
+    print(f"  {'':24}{'デフォルト':>12}{'チューニング':>14}")
+    print(f"  {'同期（回/秒）':20}{default['syncs'] / args.seconds:>14.1f}{tuned['syncs'] / args.seconds:>14.1f}")
+    print(f"  {'同期の失敗':20}{default['sync_errors']:>14}{tuned['sync_errors']:>14}")
+    print(f"  {'検索（回/秒）':20}{default['reads'] / args.seconds:>14.1f}{tuned['reads'] / args.seconds:>14.1f}")
+    print(f"  {'検索の失敗':20}{default['read_errors']:>14}{tuned['read_errors']:>14}")
+    print(f"  {'検索 中央値':20}{default['read_median_ms']:>12.2f}ms{tuned['read_median_ms']:>12.2f}ms")
+    print(f"  {'検索 p95':20}{default['read_p95_ms']:>12.2f}ms{tuned['read_p95_ms']:>12.2f}ms")
+
+    print("")
+    print(f"✅ 失敗した同期・検索: {default['sync_errors'] + default['read_errors']}件 → {tuned['sync_errors'] + tuned['read_errors']}件")
+
+
+if __name__ == "__main__":
+    main()